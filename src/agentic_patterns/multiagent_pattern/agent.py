@@ -1,8 +1,39 @@
 from textwrap import dedent
+from typing import Callable
+from weakref import WeakSet
 from agentic_patterns.tool_pattern.tool import Tool
 from agentic_patterns.planning_pattern.react_agent import ReactAgent
 
 from agentic_patterns.multiagent_pattern.crew import Crew
+from agentic_patterns.utils.metrics import metrics_context
+from agentic_patterns.utils.tracing import span
+
+AGENT_PROMPT_TEMPLATE = dedent(
+    """
+    You are an AI agent. You are part of a team of agents working together to complete a task.
+    I'm going to give you the task description enclosed in <task_description></task_description> tags. I'll also give
+    you the available context from the other agents in <context></context> tags. If the context
+    is not available, the <context></context> tags will be empty. You'll also receive the task
+    expected output enclosed in <task_expected_output></task_expected_output> tags. With all this information
+    you need to create the best possible response, always respecting the format as describe in
+    <task_expected_output></task_expected_output> tags. If expected output is not available, just create
+    a meaningful response to complete the task.
+
+    <task_description>
+    {task_description}
+    </task_description>
+
+    <task_expected_output>
+    {task_expected_output}
+    </task_expected_output>
+
+    <context>
+    {context}
+    </context>
+
+    Your response:
+    """
+).strip()
 
 
 class Agent:
@@ -21,6 +52,10 @@ class Agent:
         dependencies (list[Agent]): A list of Agent instances that this agent depends on.
         dependents (list[Agent]): A list of Agent instances that depend on this agent.
         context (str): Accumulated context information from other agents.
+        edge_conditions (dict[Agent, Callable[[str], bool]]): Predicates on this agent's output that
+            decide whether the edge to a dependent is taken.
+        active_dependents (list[Agent]): The dependents whose edge was taken by the last output pushed.
+        crews (WeakSet[Crew]): The crews this agent belongs to, whose plans are rebuilt when an edge is added.
 
     Args:
         name (str): The name of the agent.
@@ -46,8 +81,12 @@ class Agent:
                 self.react_agent = ReactAgent(tools = tools or [], model = llm, system_prompt=backstory)
                 self.dependencies: list[Agent] = []
                 self.dependents: list[Agent] = []
+                self.edge_conditions: dict[Agent, Callable[[str], bool]] = {}
+                self.active_dependents: list[Agent] = []
+                self.crews: WeakSet[Crew] = WeakSet()
 
                 self.context = ""
+                self._prompt_template: tuple[str, str, str, str] | None = None
 
                 #Automatically register this agent to the active crew context if one exists
                 Crew.register_agent(self)
@@ -76,69 +115,115 @@ class Agent:
                 self.add_dependent(other)
                 return self
 
-        def add_dependency(self, other):
-                
+        def add_dependency(self, other, condition: Callable[[str], bool] | None = None):
+                """ Makes this agent depend on `other`. If `condition` is given, the edge is only
+                taken when `condition(output of other)` is true."""
                 if isinstance(other,Agent):
-                        self.dependencies.append(other)
-                        other.dependents.append(self)
+                        self._link(other, self, condition)
                 elif isinstance(other,list) and all(isinstance(item,Agent) for item in other):
                         for item in other:
-                                self.dependencies.append(other)
-                                item.dependents.append(self)
+                                self._link(item, self, condition)
                 else:
                         raise TypeError("The dependency must be an instance or list of Agent")
 
-        def add_dependent(self,other):
-
+        def add_dependent(self,other, condition: Callable[[str], bool] | None = None):
+                """ Makes `other` depend on this agent. If `condition` is given, the edge is only
+                taken when `condition(output of this agent)` is true."""
                 if isinstance(other,Agent):
-                        other.dependencies.append(self)
-                        self.dependents.append(other)
+                        self._link(self, other, condition)
                 elif isinstance(other,list) and all(isinstance(item,Agent) for item in other):
                         for item in other:
-                                item.dependencies.append(self)
-                                self.dependents.append(item)
+                                self._link(self, item, condition)
                 else:
                     raise TypeError("The dependent must be an instance or list of Agent.")
 
+        @staticmethod
+        def _link(upstream, downstream, condition=None):
+                """ Adds the edge upstream -> downstream once, ignoring duplicates."""
+                if upstream not in downstream.dependencies:
+                        downstream.dependencies.append(upstream)
+                if downstream not in upstream.dependents:
+                        upstream.dependents.append(downstream)
+                if condition is not None:
+                        upstream.edge_conditions[downstream] = condition
+                for crew in {*upstream.crews, *downstream.crews}:
+                        crew.touch()
+
+        def edge_is_active(self, dependent, output: str) -> bool:
+                """ Returns whether the edge to `dependent` is taken for the given output."""
+                condition = self.edge_conditions.get(dependent)
+                return condition is None or bool(condition(output))
+
+        def forward_output(self, output: str, context: str) -> str:
+                """ Returns what the dependents receive as context. By default, the agent output."""
+                return output
+
+        def propagate(self, output: str):
+                """ Pushes the output to every dependent whose edge is active, and records them in
+                `active_dependents` so that each condition is evaluated once per output."""
+                forwarded = self.forward_output(output, self.context)
+                self.active_dependents = [d for d in self.dependents if self.edge_is_active(d, output)]
+                for dependent in self.active_dependents:
+                        dependent.recieve_context(forwarded)
+
         def recieve_context(self, input_data):
-                self.context += f"{self.name} recieved context: \n {input_data}"
-
-        def create_prompt(self):
-            prompt = dedent(
-                f"""
-            You are an AI agent. You are part of a team of agents working together to complete a task.
-            I'm going to give you the task description enclosed in <task_description></task_description> tags. I'll also give
-            you the available context from the other agents in <context></context> tags. If the context
-            is not available, the <context></context> tags will be empty. You'll also receive the task
-            expected output enclosed in <task_expected_output></task_expected_output> tags. With all this information
-            you need to create the best possible response, always respecting the format as describe in
-            <task_expected_output></task_expected_output> tags. If expected output is not available, just create
-            a meaningful response to complete the task.
-
-            <task_description>
-            {self.task_description}
-            </task_description>
-
-            <task_expected_output>
-            {self.task_expected_output}
-            </task_expected_output>
-
-            <context>
-            {self.context}
-            </context>
-
-            Your response:
+                self.context += self.format_context(input_data)
+
+        def format_context(self, input_data) -> str:
+                """ Formats an upstream output the way it is appended to the context."""
+                return f"{self.name} recieved context: \n {input_data}"
+
+        def _compiled_prompt_template(self) -> tuple[str, str, str]:
+                """ Splits the prompt template around the task and the context, with the expected output baked in.
+                The result is cached until `task_expected_output` changes."""
+                cached = self._prompt_template
+                if cached is None or cached[0] != self.task_expected_output:
+                        head, rest = AGENT_PROMPT_TEMPLATE.split("{task_description}")
+                        middle, tail = rest.split("{context}")
+                        middle = middle.replace("{task_expected_output}", self.task_expected_output)
+                        cached = (self.task_expected_output, head, middle, tail)
+                        self._prompt_template = cached
+                return cached[1:]
+
+        def create_prompt(self, task: str | None = None, context: str | None = None):
             """
-            ).strip()
+            Builds the prompt for the agent.
 
-            return prompt
-        
-        def run(self):
-                msg = self.create_prompt()
-                output = self.react_agent.run(user_msg=msg)
+            Args:
+                task (str | None, optional): Overrides the task description. Defaults to `self.task_description`.
+                context (str | None, optional): Overrides the context. Defaults to `self.context`.
 
-                for dependent in self.dependents:
-                        dependent.recieve_context(output)
+            Returns:
+                str: The prompt sent to the underlying ReactAgent.
+            """
+            head, middle, tail = self._compiled_prompt_template()
+            task = self.task_description if task is None else task
+            context = self.context if context is None else context
+
+            return f"{head}{task}{middle}{context}{tail}"
+        
+        def run(self, task: str | None = None, context: str | None = None):
+                """
+                Runs the agent on its task.
+
+                When `task` or `context` are given, the prompt is built from them instead of the
+                instance attributes and the output is not pushed to the dependents, so the same
+                agent can safely serve many concurrent calls.
+
+                Args:
+                    task (str | None, optional): Overrides the task description for this call.
+                    context (str | None, optional): Overrides the context for this call.
+
+                Returns:
+                    str: The agent output.
+                """
+                with span("agent.run", agent=self.name), metrics_context(agent=self.name):
+                        with span("agent.prompt", agent=self.name):
+                                msg = self.create_prompt(task=task, context=context)
+                        output = self.react_agent.run(user_msg=msg)
+
+                if task is None and context is None:
+                        self.propagate(output)
                 return output
 
 
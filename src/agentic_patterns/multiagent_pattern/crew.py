@@ -1,9 +1,32 @@
-from collections import deque
+import itertools
+import time
+from contextvars import ContextVar
 
-from colorama import Fore
 from graphviz import Digraph  # type: ignore
 
-from agentic_patterns.utils.logging import fancy_print
+from agentic_patterns.multiagent_pattern.execution_plan import ExecutionPlan
+from agentic_patterns.multiagent_pattern.profiling import AgentTiming
+from agentic_patterns.multiagent_pattern.profiling import CrewProfile
+from agentic_patterns.utils import events
+from agentic_patterns.utils.metrics import collect_calls
+from agentic_patterns.utils.metrics import format_summary
+from agentic_patterns.utils.metrics import summarize_calls
+from agentic_patterns.utils.scheduler import current_tenant
+from agentic_patterns.utils.scheduler import scheduling_context
+from agentic_patterns.utils.tracing import span
+
+# The stack of crews entered in the current thread or asyncio task, innermost last.
+_crew_stack: ContextVar[tuple] = ContextVar("crew_stack", default=())
+_run_ids = itertools.count(1)
+
+
+class _CurrentCrew:
+    """
+    Read-only class attribute returning the crew active in the current context.
+    """
+
+    def __get__(self, instance, owner):
+        return Crew.current()
 
 
 class Crew:
@@ -14,23 +37,34 @@ class Crew:
     for running the agents in a topologically sorted order.
 
     Attributes:
-        current_crew (Crew): Class-level variable to track the active Crew context.
+        current_crew (Crew): The innermost Crew context active in the current thread or asyncio task.
         agents (list): A list of agents in the crew.
+        skipped (list): The agents pruned during the last run.
+        last_usage (list[AgentUsage]): The per-agent LLM usage of the last run.
+        last_profile (CrewProfile | None): The timings and critical path of the last run.
     """
 
-    current_crew = None
+    current_crew = _CurrentCrew()
 
     def __init__(self):
         self.agents = []
+        self._plan: ExecutionPlan | None = None
+        self._version = 0
+        self.skipped = []
+        self.last_usage = []
+        self.last_profile: CrewProfile | None = None
     
     def __enter__(self):
         """
         Enters the context manager, setting this crew as the current active context.
 
+        The active crew is tracked with a context variable, so crews built concurrently in
+        different threads or asyncio tasks do not interfere, and crews can be nested.
+
         Returns:
             Crew: The current Crew instance.
         """
-        Crew.current_crew = self
+        _crew_stack.set(_crew_stack.get() + (self,))
         return self
     def __exit__(self, exc_type, exc_val, ecx_tb):
         """
@@ -41,10 +75,70 @@ class Crew:
             exc_val: The exception value, if an exception was raised.
             exc_tb: The traceback, if an exception was raised.
         """
-        Crew.current_crew = None
+        stack = _crew_stack.get()
+        if stack and stack[-1] is self:
+            _crew_stack.set(stack[:-1])
+
+    @staticmethod
+    def current():
+        """
+        Returns:
+            Crew | None: The innermost crew entered in the current thread or asyncio task.
+        """
+        stack = _crew_stack.get()
+        return stack[-1] if stack else None
 
     def add_agent(self, agent):
         self.agents.append(agent)
+        agent.crews.add(self)
+        self.touch()
+
+    def remove_agent(self, agent):
+        """
+        Removes an agent from the crew, if present.
+
+        Args:
+            agent: The agent to be removed.
+        """
+        if agent in self.agents:
+            self.agents.remove(agent)
+            agent.crews.discard(self)
+            self.touch()
+
+    def touch(self):
+        """
+        Marks the dependency graph of this crew as changed, so that its plan is rebuilt.
+        Agents call it when an edge is added to one of them.
+        """
+        self._version += 1
+
+    def map(self, template, items, name=None, max_concurrency=4, item_formatter=None):
+        """
+        Adds a fan-out step that runs an agent template once per item, in parallel.
+
+        Args:
+            template (Agent): The agent used as a blueprint for every item.
+            items (list | Callable[[str], list]): The items, or a callable returning them from the context.
+            name (str | None, optional): The name of the map step.
+            max_concurrency (int, optional): The maximum number of concurrent items. Defaults to 4.
+            item_formatter (Callable | None, optional): Builds the task description for one item.
+
+        Returns:
+            MapAgent: The map step, which can be chained with `>>` like any other agent.
+        """
+        from agentic_patterns.multiagent_pattern.map_agent import MapAgent
+
+        self.remove_agent(template)
+        map_agent = MapAgent(
+            template,
+            items,
+            name=name,
+            max_concurrency=max_concurrency,
+            item_formatter=item_formatter,
+        )
+        if map_agent not in self.agents:
+            self.add_agent(map_agent)
+        return map_agent
 
     @staticmethod
     def register_agent(agent):
@@ -54,8 +148,29 @@ class Crew:
         Args:
             agent: The agent to be registered.
         """
-        if Crew.current_crew is not None:
-            Crew.current_crew.add_agent(agent)
+        crew = Crew.current()
+        if crew is not None:
+            crew.add_agent(agent)
+
+    def compile(self) -> ExecutionPlan:
+        """
+        Freezes the dependency graph into an integer-indexed execution plan.
+
+        The plan is cached and only rebuilt when an agent of this crew, or one of their
+        dependencies, is added or removed.
+
+        Returns:
+            ExecutionPlan: The compiled plan, with topological order, levels and critical path.
+
+        Raises:
+            ValueError: If there's a circular dependency among the agents, or a dependency
+                outside the crew.
+        """
+        plan = self._plan
+        if plan is None or plan.version != self._version or len(plan.agents) != len(self.agents):
+            plan = ExecutionPlan.compile(self.agents, version=self._version)
+            self._plan = plan
+        return plan
 
     def topological_sort(self):
         """
@@ -67,27 +182,21 @@ class Crew:
         Raises:
             ValueError: If there's a circular dependency among the agents.
         """
-        in_degree = {agent: len(agent.dependencies) for agent in self.agents}
-        queue = deque([agent for agent in self.agents if in_degree[agent]==0])
-
-        sorted_agents =  []
-
-        while queue:
-            current_agent = queue.popleft()
-            sorted_agents.append(current_agent)
+        return self.compile().sorted_agents()
+    
+    def plot(self, profile: CrewProfile | None = None):
+        """
+        Draws the dependency graph.
 
-            for dependent in current_agent.dependents:
-                in_degree[dependent] -= 1
-                if in_degree[dependent] == 0:
-                    queue.append(dependent)
+        Args:
+            profile (CrewProfile | None, optional): A run profile, e.g. `crew.last_profile`. When
+                given, nodes are annotated with timings and the critical path is highlighted.
 
-        if len(sorted_agents) != len(self.agents):
-            raise ValueError(
-                "Circular dependencies detected among agents, preventing a valid topological sort"
-            )
-        return sorted_agents
-    
-    def plot(self):
+        Returns:
+            Digraph: The graph.
+        """
+        if profile is not None:
+            return profile.plot()
         dot = Digraph(format="png")
         for agent in self.agents:
             dot.node(agent.name)
@@ -96,8 +205,119 @@ class Crew:
         return dot
     
     def run(self):
-        sorted_agents = self.topological_sort()
-        for agent in sorted_agents:
-            fancy_print(f"RUNNING AGENT: {agent}")
-            print(Fore.RED + f"{agent.run()}")
+        """
+        Runs the agents in topological order and reports their LLM usage.
+
+        Agents whose incoming edges are all inactive, because a condition on an upstream
+        output is false or because the upstream agent was skipped, are pruned.
+
+        Each run is its own tenant of the LLM request scheduler, unless it is nested in a
+        `scheduling_context` that already names one, so concurrent runs share capacity fairly.
+
+        Returns:
+            dict[str, str]: The output of every agent that ran, keyed by agent name.
+        """
+        start = time.perf_counter()
+        tenant = current_tenant() or f"crew-run-{next(_run_ids)}"
+        with (
+            span("crew.run", agents=len(self.agents)),
+            collect_calls() as calls,
+            scheduling_context(tenant=tenant),
+        ):
+            outputs, timings = self._run_plan()
+
+        self.last_usage = summarize_calls(calls)
+        self.last_profile = CrewProfile.build(
+            self.compile(), timings, calls, total_time=time.perf_counter() - start
+        )
+        events.emit(
+            events.METRICS_SUMMARY,
+            usage=self.last_usage,
+            report=format_summary(self.last_usage),
+        )
+        events.emit(events.PROFILE, profile=self.last_profile, report=self.last_profile.report())
+        return outputs
+
+    def _run_plan(self):
+        plan = self.compile()
+        activated = set()
+        outputs = {}
+        timings: dict[int, AgentTiming] = {}
+        self.skipped = []
+        start = time.perf_counter()
+        events.emit(events.RUN_STARTED, agents=len(plan.agents))
+
+        for i in plan.order:
+            agent = plan.agents[i]
+            if plan.predecessors[i] and i not in activated:
+                events.emit(events.AGENT_SKIPPED, agent=agent.name)
+                self.skipped.append(agent)
+                continue
+
+            ready = max((timings[j].end for j in plan.predecessors[i] if j in timings), default=start)
+            events.emit(events.AGENT_STARTED, agent=agent.name)
+            agent_start = time.perf_counter()
+            output = agent.run()
+            timings[i] = AgentTiming(ready=ready, start=agent_start, end=time.perf_counter())
+            events.emit(
+                events.AGENT_FINISHED,
+                agent=agent.name,
+                output=output,
+                elapsed=timings[i].end - agent_start,
+            )
+            outputs[agent.name] = output
+
+            # The agent evaluated its edge conditions when it pushed its output.
+            for dependent in agent.active_dependents:
+                j = plan.index.get(dependent)
+                if j is not None:
+                    activated.add(j)
+
+        events.emit(
+            events.RUN_FINISHED,
+            agents=len(outputs),
+            skipped=[agent.name for agent in self.skipped],
+            elapsed=time.perf_counter() - start,
+        )
+        return outputs, timings
+
+    def pipeline(self, inputs, workers=1, queue_size=8):
+        """
+        Streams many inputs through the crew, running the agents as pipelined stages.
+
+        Args:
+            inputs (Iterable): The inputs. Each one is given to the root agents as context and
+                replaces `{item}` in the task descriptions.
+            workers (int | dict[str, int], optional): Worker threads per stage, globally or by
+                agent name. Defaults to 1.
+            queue_size (int, optional): The capacity of each stage queue. Defaults to 8.
+
+        Returns:
+            Iterator[PipelineResult]: The results, yielded as each input completes.
+        """
+        from agentic_patterns.multiagent_pattern.pipeline import CrewPipeline
+
+        return CrewPipeline(self, workers=workers, queue_size=queue_size).run(inputs)
+
+    def run_distributed(self, broker=None, processes=None, timeout=600.0):
+        """
+        Runs the crew with its agents executing in worker processes.
+
+        Args:
+            broker (TaskBroker | None, optional): The broker shared with the workers. Defaults to
+                a local multiprocessing queue.
+            processes (int | None, optional): The number of local worker processes to start.
+                Defaults to the number of CPUs. Use 0 when only remote workers pull from the broker.
+            timeout (float | None, optional): Seconds to wait for any single result. Defaults to
+                600. None waits forever.
+
+        Returns:
+            DistributedRun: The outputs, the pruned agents and the worker of each agent.
+        """
+        import os
+
+        from agentic_patterns.multiagent_pattern.distributed import DistributedCrew
 
+        if processes is None:
+            processes = os.cpu_count() or 1
+        return DistributedCrew(self, broker=broker, processes=processes).run(timeout=timeout)
@@ -0,0 +1,575 @@
+import importlib
+import multiprocessing
+import pickle
+import queue
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass
+from dataclasses import field
+from dataclasses import replace
+from multiprocessing.managers import BaseManager
+from typing import Any
+
+from agentic_patterns.multiagent_pattern.agent import Agent
+from agentic_patterns.planning_pattern.react_agent import ReactAgent
+from agentic_patterns.tool_pattern.observations import ObservationPolicy
+from agentic_patterns.tool_pattern.observations import READ_ARTIFACT
+from agentic_patterns.tool_pattern.tool import XML
+from agentic_patterns.utils.compaction import RollingSummary
+
+# Seconds the coordinator waits for a result before giving up on the workers.
+DEFAULT_RESULT_TIMEOUT = 600.0
+
+# Seconds a coordinator waits after handing back a result of another run sharing the queue.
+_REQUEUE_DELAY = 0.01
+
+
+@dataclass(frozen=True)
+class AgentSpec:
+    """
+    A picklable description of an agent, used to rebuild it inside a worker process.
+
+    Tools are referenced by import path ("module:attribute"), so they must be defined at module
+    level in an importable module. The attribute may be the `@tool`-decorated object itself.
+    Tools built at run time, such as closures or lambdas, cannot be sent. The `read_artifact`
+    tool an agent gets with an observation policy is left out and rebuilt by the worker over an
+    artifact store of its own.
+
+    The compaction settings are sent without their client: worker summaries use the client of
+    the rebuilt agent.
+
+    Attributes:
+        name (str): The name of the agent.
+        backstory (str): The backstory or background of the agent.
+        task_description (str): A description of the task assigned to the agent.
+        task_expected_output (str): The expected format or content of the task output.
+        tools (tuple[str, ...]): Import paths of the tools available to the agent.
+        llm (str): The name of the language model to use.
+        function_calling (str): How the agent calls tools, "xml" or "native".
+        observation_policy (ObservationPolicy | None): How tool results are put in the conversation.
+        compaction (RollingSummary | None): How older rounds of long runs are summarized.
+    """
+
+    name: str
+    backstory: str
+    task_description: str
+    task_expected_output: str = ""
+    tools: tuple[str, ...] = ()
+    llm: str = "llama-3.3-70b-versatile"
+    function_calling: str = XML
+    observation_policy: ObservationPolicy | None = None
+    compaction: RollingSummary | None = None
+
+    @classmethod
+    def from_agent(cls, agent: Agent) -> "AgentSpec":
+        """
+        Args:
+            agent (Agent): The agent to describe.
+
+        Returns:
+            AgentSpec: The spec of the agent.
+
+        Raises:
+            ValueError: If a tool of the agent cannot be resolved from its import path.
+        """
+        react_agent = agent.react_agent
+        compaction = react_agent.compaction
+        return cls(
+            name=agent.name,
+            backstory=agent.backstory,
+            task_description=agent.task_description,
+            task_expected_output=agent.task_expected_output,
+            tools=tuple(
+                _tool_path(agent, tool)
+                for tool in react_agent.tools
+                if not (tool.name == READ_ARTIFACT and react_agent.artifact_store is not None)
+            ),
+            llm=react_agent.model,
+            function_calling=react_agent.function_calling,
+            observation_policy=react_agent.observation_policy,
+            compaction=replace(compaction, client=None) if compaction is not None else None,
+        )
+
+    def build(self) -> Agent:
+        """
+        Returns:
+            Agent: A new agent, with the tools resolved from their import paths.
+        """
+        agent = Agent(
+            name=self.name,
+            backstory=self.backstory,
+            task_description=self.task_description,
+            task_expected_output=self.task_expected_output,
+            llm=self.llm,
+        )
+        # Agent only takes the common settings: the ReAct agent is rebuilt with the others.
+        agent.react_agent = ReactAgent(
+            tools=[_resolve(path) for path in self.tools],
+            model=self.llm,
+            system_prompt=self.backstory,
+            client=agent.react_agent.client,
+            function_calling=self.function_calling,
+            observation_policy=self.observation_policy,
+            compaction=self.compaction,
+        )
+        return agent
+
+
+def _resolve(path: str):
+    module_name, attribute = path.split(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def _tool_path(agent: Agent, tool) -> str:
+    """
+    Returns the import path of a tool, checking that a worker can resolve it to the same tool.
+    """
+    path = f"{tool.fn.__module__}:{tool.fn.__name__}"
+    try:
+        resolved = _resolve(path)
+    except (ImportError, AttributeError):
+        resolved = None
+    if resolved is not tool and getattr(resolved, "fn", resolved) is not tool.fn:
+        raise ValueError(
+            f"Tool '{tool.name}' of agent '{agent.name}' cannot be sent to a worker: {path} does not "
+            f"resolve to it. Define the tool at module level, or run this agent in the coordinator."
+        )
+    return path
+
+
+@dataclass
+class AgentTask:
+    """
+    A unit of work sent to the workers.
+
+    Attributes:
+        task_id (str): The identifier of the task. None asks the worker to stop.
+        spec (AgentSpec | None): The agent to run.
+        task (str): The task description for this call.
+        context (str): The context for this call.
+        run_id (str): The run of the coordinator that sent the task, copied to its result.
+    """
+
+    task_id: str | None
+    spec: AgentSpec | None = None
+    task: str = ""
+    context: str = ""
+    run_id: str = ""
+
+
+@dataclass
+class AgentResult:
+    """
+    The result of an AgentTask, posted back to the coordinator.
+
+    Attributes:
+        task_id (str): The identifier of the task.
+        output (str | None): The agent output, if the task succeeded.
+        error (str | None): A description of the error, if the task failed.
+        worker (str): An identifier of the worker that ran the task.
+        run_id (str): The run of the coordinator waiting for the result.
+    """
+
+    task_id: str
+    output: str | None = None
+    error: str | None = None
+    worker: str = ""
+    run_id: str = ""
+
+
+class TaskBroker:
+    """
+    The interface between the coordinator and the workers.
+
+    Implementations only need to move picklable AgentTask and AgentResult objects, so the
+    broker can be swapped without touching the coordinator or the workers. Several coordinators
+    may share a broker: each only receives the results of its own run.
+    """
+
+    def put_task(self, task: AgentTask) -> None:
+        raise NotImplementedError
+
+    def get_task(self, timeout: float | None = None) -> AgentTask | None:
+        raise NotImplementedError
+
+    def put_result(self, result: AgentResult) -> None:
+        raise NotImplementedError
+
+    def get_result(self, run_id: str, timeout: float | None = None) -> AgentResult | None:
+        raise NotImplementedError
+
+
+class QueueBroker(TaskBroker):
+    """
+    A broker backed by a pair of queues.
+
+    Use `QueueBroker()` for worker processes on the same host, or `QueueBroker.serve()` on the
+    coordinator and `QueueBroker.connect()` on other hosts to share the queues over a socket.
+
+    Args:
+        tasks (Any, optional): The task queue. Defaults to a new multiprocessing queue.
+        results (Any, optional): The result queue. Defaults to a new multiprocessing queue.
+    """
+
+    def __init__(self, tasks: Any = None, results: Any = None):
+        self.tasks = tasks if tasks is not None else multiprocessing.Queue()
+        self.results = results if results is not None else multiprocessing.Queue()
+        self._manager: BaseManager | None = None
+
+    @classmethod
+    def serve(cls, address: tuple[str, int], authkey: bytes) -> "QueueBroker":
+        """
+        Starts a queue server that workers on other hosts can connect to.
+
+        Args:
+            address (tuple[str, int]): The (host, port) to listen on.
+            authkey (bytes): The shared secret used to authenticate workers.
+
+        Returns:
+            QueueBroker: A broker bound to the served queues.
+        """
+        _QueueManager.register("get_tasks", callable=_served_tasks)
+        _QueueManager.register("get_results", callable=_served_results)
+        manager = _QueueManager(address=address, authkey=authkey)
+        manager.start()
+        broker = cls(manager.get_tasks(), manager.get_results())
+        broker._manager = manager
+        return broker
+
+    @classmethod
+    def connect(cls, address: tuple[str, int], authkey: bytes) -> "QueueBroker":
+        """
+        Connects to a queue server started with `QueueBroker.serve()`.
+
+        Args:
+            address (tuple[str, int]): The (host, port) of the server.
+            authkey (bytes): The shared secret.
+
+        Returns:
+            QueueBroker: A broker bound to the remote queues.
+        """
+        _QueueManager.register("get_tasks")
+        _QueueManager.register("get_results")
+        manager = _QueueManager(address=address, authkey=authkey)
+        manager.connect()
+        return cls(manager.get_tasks(), manager.get_results())
+
+    def put_task(self, task: AgentTask) -> None:
+        self.tasks.put(task)
+
+    def get_task(self, timeout: float | None = None) -> AgentTask | None:
+        try:
+            return self.tasks.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def put_result(self, result: AgentResult) -> None:
+        self.results.put(result)
+
+    def get_result(self, run_id: str, timeout: float | None = None) -> AgentResult | None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                result = self.results.get(timeout=wait)
+            except queue.Empty:
+                return None
+            if result.run_id == run_id:
+                return result
+            # The result of another coordinator sharing the queue: hand it back.
+            self.results.put(result)
+            time.sleep(_REQUEUE_DELAY)
+
+    def shutdown(self) -> None:
+        """
+        Stops the queue server, if this broker started one.
+        """
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+
+class SQLiteBroker(TaskBroker):
+    """
+    A broker backed by a SQLite file, for workers that share a filesystem.
+
+    Tasks are claimed atomically, so any number of worker processes can poll the same file.
+    Results are claimed by the run they belong to. Rows are deleted as they are claimed, so the
+    file does not grow with the number of runs.
+
+    Args:
+        path (str): The path of the SQLite database.
+        poll_interval (float, optional): Seconds between polls while waiting. Defaults to 0.05.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.05):
+        self.path = path
+        self.poll_interval = poll_interval
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks (seq INTEGER PRIMARY KEY AUTOINCREMENT, payload BLOB)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(seq INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT, payload BLOB)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_run_id ON results (run_id, seq)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def _pop(self, table: str, timeout: float | None, run_id: str | None = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        where, params = ("WHERE run_id = ?", (run_id,)) if run_id is not None else ("", ())
+        while True:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    f"SELECT seq, payload FROM {table} {where} ORDER BY seq LIMIT 1", params
+                ).fetchone()
+                if row:
+                    conn.execute(f"DELETE FROM {table} WHERE seq = ?", (row[0],))
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+            if row:
+                return pickle.loads(row[1])
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def _push(self, table: str, item, run_id: str | None = None) -> None:
+        conn = self._connect()
+        try:
+            if run_id is None:
+                conn.execute(f"INSERT INTO {table} (payload) VALUES (?)", (pickle.dumps(item),))
+            else:
+                conn.execute(f"INSERT INTO {table} (run_id, payload) VALUES (?, ?)", (run_id, pickle.dumps(item)))
+        finally:
+            conn.close()
+
+    def put_task(self, task: AgentTask) -> None:
+        self._push("tasks", task)
+
+    def get_task(self, timeout: float | None = None) -> AgentTask | None:
+        return self._pop("tasks", timeout)
+
+    def put_result(self, result: AgentResult) -> None:
+        self._push("results", result, result.run_id)
+
+    def get_result(self, run_id: str, timeout: float | None = None) -> AgentResult | None:
+        return self._pop("results", timeout, run_id)
+
+
+def run_worker(
+    broker: TaskBroker, poll_timeout: float = 1.0, max_tasks: int | None = None, stop: Any = None
+) -> int:
+    """
+    Pulls agent tasks from the broker, runs them and posts the results back.
+
+    The worker stops when it receives a stop task, when `stop` is set, or after `max_tasks` tasks.
+
+    Args:
+        broker (TaskBroker): The broker to pull tasks from.
+        poll_timeout (float, optional): Seconds to wait for a task before polling again. Defaults to 1.0.
+        max_tasks (int | None, optional): The maximum number of tasks to run. Defaults to None.
+        stop (Event | None, optional): A multiprocessing event that stops this worker only, unlike
+            a stop task which any worker of the broker may receive. Defaults to None.
+
+    Returns:
+        int: The number of tasks run.
+    """
+    worker_id = f"{multiprocessing.current_process().name}-{uuid.uuid4().hex[:6]}"
+    # Keyed by the pickled spec, since policies and compaction settings are not hashable.
+    agents: dict[bytes, Agent] = {}
+    done = 0
+
+    while (max_tasks is None or done < max_tasks) and not (stop is not None and stop.is_set()):
+        task = broker.get_task(timeout=poll_timeout)
+        if task is None:
+            continue
+        if task.task_id is None:
+            break
+
+        try:
+            key = pickle.dumps(task.spec)
+            agent = agents.get(key)
+            if agent is None:
+                agent = agents[key] = task.spec.build()
+            output = agent.run(task=task.task, context=task.context)
+            result = AgentResult(task_id=task.task_id, output=output, worker=worker_id, run_id=task.run_id)
+        except Exception as e:
+            result = AgentResult(
+                task_id=task.task_id, error=f"{type(e).__name__}: {e}", worker=worker_id, run_id=task.run_id
+            )
+        broker.put_result(result)
+        done += 1
+    return done
+
+
+@dataclass
+class DistributedRun:
+    """
+    The result of a distributed crew run.
+
+    Attributes:
+        outputs (dict[str, str]): The output of every agent that ran, keyed by agent name.
+        skipped (list[str]): The names of the agents pruned by conditional edges.
+        workers (dict[str, str]): The worker that ran each remote agent, keyed by agent name.
+    """
+
+    outputs: dict[str, str] = field(default_factory=dict)
+    skipped: list[str] = field(default_factory=list)
+    workers: dict[str, str] = field(default_factory=dict)
+
+
+class DistributedCrew:
+    """
+    Coordinates a crew run whose agents execute in worker processes.
+
+    The coordinator keeps the DAG state: it sends every ready agent to the broker as an
+    AgentTask, evaluates conditional edges on the results and accumulates the contexts.
+    Plain Agent instances are sent to the workers; specialised agents such as routers and
+    map steps, which cannot be described by an AgentSpec, run in the coordinator.
+
+    Every run tags its tasks with a run id and only receives the results carrying it, so other
+    coordinators can share the broker and its workers. The local workers are stopped through an
+    event of their own for the same reason. A local worker that exits during the run fails it,
+    since the task it held is lost.
+
+    Attributes:
+        crew (Crew): The crew to run.
+        broker (TaskBroker): The broker shared with the workers.
+        processes (int): The number of local worker processes to start. Remote workers
+            can join through the same broker.
+    """
+
+    def __init__(self, crew, broker: TaskBroker | None = None, processes: int = 0):
+        self.crew = crew
+        self.broker = broker or QueueBroker()
+        self.processes = processes
+
+    def run(self, timeout: float | None = DEFAULT_RESULT_TIMEOUT) -> DistributedRun:
+        """
+        Runs the crew once.
+
+        Args:
+            timeout (float | None, optional): Seconds to wait for any single result. Defaults to
+                DEFAULT_RESULT_TIMEOUT. None waits forever.
+
+        Returns:
+            DistributedRun: The outputs, the pruned agents and the worker of each agent.
+
+        Raises:
+            RuntimeError: If an agent fails in a worker, or a local worker process exits.
+            TimeoutError: If no result arrives within `timeout`.
+        """
+        plan = self.crew.compile()
+        contexts = [agent.context for agent in plan.agents]
+        remaining = [len(preds) for preds in plan.predecessors]
+        activated: set[int] = set()
+        pending: dict[str, int] = {}
+        result = DistributedRun()
+        run_id = uuid.uuid4().hex
+
+        stop = multiprocessing.Event()
+        workers = [
+            multiprocessing.Process(target=run_worker, args=(self.broker,), kwargs={"stop": stop}, daemon=True)
+            for _ in range(self.processes)
+        ]
+        for worker in workers:
+            worker.start()
+
+        def resolve(i: int, output: str | None):
+            ready = []
+            stack = [(i, output)]
+            while stack:
+                i, output = stack.pop()
+                agent = plan.agents[i]
+                for j in plan.successors[i]:
+                    if output is not None and agent.edge_is_active(plan.agents[j], output):
+                        contexts[j] += plan.agents[j].format_context(
+                            agent.forward_output(output, contexts[i])
+                        )
+                        activated.add(j)
+                    remaining[j] -= 1
+                    if remaining[j] == 0:
+                        if j in activated:
+                            ready.append(j)
+                        else:
+                            result.skipped.append(plan.agents[j].name)
+                            stack.append((j, None))
+            return ready
+
+        def submit(ready: list[int]):
+            local = []
+            for i in ready:
+                agent = plan.agents[i]
+                if type(agent) is not Agent:
+                    local.append(i)
+                    continue
+                task_id = uuid.uuid4().hex
+                pending[task_id] = i
+                self.broker.put_task(
+                    AgentTask(
+                        task_id=task_id,
+                        spec=AgentSpec.from_agent(agent),
+                        task=agent.task_description,
+                        context=contexts[i],
+                        run_id=run_id,
+                    )
+                )
+            for i in local:
+                agent = plan.agents[i]
+                output = agent.run(task=agent.task_description, context=contexts[i])
+                result.outputs[agent.name] = output
+                submit(resolve(i, output))
+
+        try:
+            submit([i for i, preds in enumerate(plan.predecessors) if not preds])
+            while pending:
+                message = self._next_result(run_id, timeout, workers)
+                i = pending.pop(message.task_id, None)
+                if i is None:
+                    continue
+                agent = plan.agents[i]
+                if message.error is not None:
+                    raise RuntimeError(f"Agent '{agent}' failed in worker {message.worker}: {message.error}")
+                result.outputs[agent.name] = message.output
+                result.workers[agent.name] = message.worker
+                submit(resolve(i, message.output))
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join(timeout=5)
+        return result
+
+    def _next_result(self, run_id: str, timeout: float | None, workers: list) -> AgentResult:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = 1.0 if deadline is None else max(0.0, min(1.0, deadline - time.monotonic()))
+            message = self.broker.get_result(run_id, timeout=wait)
+            if message is not None:
+                return message
+            for worker in workers:
+                if not worker.is_alive():
+                    raise RuntimeError(f"Worker process {worker.name} exited with code {worker.exitcode}")
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError("Timed out waiting for a worker result")
+
+
+class _QueueManager(BaseManager):
+    pass
+
+
+_served_queues: dict[str, queue.Queue] = {}
+
+
+def _served_tasks() -> queue.Queue:
+    return _served_queues.setdefault("tasks", queue.Queue())
+
+
+def _served_results() -> queue.Queue:
+    return _served_queues.setdefault("results", queue.Queue())
@@ -0,0 +1,186 @@
+from collections import deque
+from dataclasses import dataclass
+from dataclasses import field
+
+
+@dataclass
+class ExecutionPlan:
+    """
+    A frozen, integer-indexed representation of a crew's dependency graph.
+
+    Attributes:
+        agents (list): The agents of the crew. The position of an agent is its index in the plan.
+        index (dict): A mapping from agent to its integer index.
+        successors (list[tuple[int, ...]]): For each agent index, the indices of its dependents.
+        predecessors (list[tuple[int, ...]]): For each agent index, the indices of its dependencies.
+        order (list[int]): The agent indices in topological order.
+        levels (list[list[int]]): Agent indices grouped by depth. Agents in the same level are independent.
+        critical_path (list[int]): The longest chain of agent indices, counting one unit per agent.
+        version (int): The version of the crew graph this plan was compiled against.
+    """
+
+    agents: list
+    index: dict
+    successors: list[tuple[int, ...]]
+    predecessors: list[tuple[int, ...]]
+    order: list[int]
+    levels: list[list[int]]
+    critical_path: list[int] = field(default_factory=list)
+    version: int = 0
+
+    @classmethod
+    def compile(cls, agents: list, version: int = 0) -> "ExecutionPlan":
+        """
+        Builds an execution plan from a list of agents.
+
+        Args:
+            agents (list): The agents to include in the plan.
+            version (int, optional): The version of the crew graph the plan is built against. Defaults to 0.
+
+        Returns:
+            ExecutionPlan: The compiled plan.
+
+        Raises:
+            ValueError: If an agent depends on an agent outside the list, or if the graph has a cycle.
+        """
+        agents = list(dict.fromkeys(agents))
+        index = {agent: i for i, agent in enumerate(agents)}
+
+        successors: list[tuple[int, ...]] = []
+        predecessors: list[tuple[int, ...]] = []
+        for agent in agents:
+            for dependency in agent.dependencies:
+                if dependency not in index:
+                    raise ValueError(
+                        f"Agent '{agent}' depends on '{dependency}', which is not part of this crew"
+                    )
+            predecessors.append(tuple(dict.fromkeys(index[d] for d in agent.dependencies)))
+            successors.append(
+                tuple(dict.fromkeys(index[d] for d in agent.dependents if d in index))
+            )
+
+        in_degree = [len(preds) for preds in predecessors]
+        depth = [0] * len(agents)
+        queue = deque(i for i, degree in enumerate(in_degree) if degree == 0)
+        order = []
+
+        while queue:
+            current = queue.popleft()
+            order.append(current)
+            for dependent in successors[current]:
+                depth[dependent] = max(depth[dependent], depth[current] + 1)
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    queue.append(dependent)
+
+        if len(order) != len(agents):
+            cycle = _find_cycle(successors, [i for i, degree in enumerate(in_degree) if degree > 0])
+            path = " -> ".join(str(agents[i]) for i in cycle)
+            raise ValueError(
+                f"Circular dependencies detected among agents, preventing a valid topological sort: {path}"
+            )
+
+        levels: list[list[int]] = [[] for _ in range(max(depth, default=-1) + 1)]
+        for i in order:
+            levels[depth[i]].append(i)
+
+        plan = cls(
+            agents=agents,
+            index=index,
+            successors=successors,
+            predecessors=predecessors,
+            order=order,
+            levels=levels,
+            version=version,
+        )
+        plan.critical_path = plan.longest_path()
+        return plan
+
+    def longest_path(self, weights: list[float] | None = None) -> list[int]:
+        """
+        Computes the heaviest chain of agents through the graph.
+
+        Args:
+            weights (list[float] | None, optional): A weight per agent index. Defaults to one per agent.
+
+        Returns:
+            list[int]: The agent indices on the heaviest path, from source to sink.
+        """
+        if not self.agents:
+            return []
+        if weights is None:
+            weights = [1.0] * len(self.agents)
+
+        best = [0.0] * len(self.agents)
+        previous = [-1] * len(self.agents)
+        for i in self.order:
+            best[i] += weights[i]
+            for dependent in self.successors[i]:
+                if best[i] > best[dependent] or previous[dependent] == -1:
+                    best[dependent] = best[i]
+                    previous[dependent] = i
+
+        node = max(range(len(self.agents)), key=best.__getitem__)
+        path = []
+        while node != -1:
+            path.append(node)
+            node = previous[node]
+        return path[::-1]
+
+    def sorted_agents(self) -> list:
+        """
+        Returns:
+            list: The agents in topological order.
+        """
+        return [self.agents[i] for i in self.order]
+
+    def agent_levels(self) -> list[list]:
+        """
+        Returns:
+            list[list]: The agents grouped by level.
+        """
+        return [[self.agents[i] for i in level] for level in self.levels]
+
+    def critical_agents(self) -> list:
+        """
+        Returns:
+            list: The agents on the critical path.
+        """
+        return [self.agents[i] for i in self.critical_path]
+
+
+def _find_cycle(successors: list[tuple[int, ...]], candidates: list[int]) -> list[int]:
+    """
+    Finds one cycle among the nodes left over by Kahn's algorithm.
+
+    Args:
+        successors (list[tuple[int, ...]]): The adjacency list of the graph.
+        candidates (list[int]): Nodes that are part of, or downstream of, a cycle.
+
+    Returns:
+        list[int]: The nodes of the cycle, with the first node repeated at the end.
+    """
+    remaining = set(candidates)
+    state: dict[int, int] = {}  # 1 = on the current path, 2 = fully explored
+
+    for start in candidates:
+        if start in state:
+            continue
+        path = [start]
+        iterators = [iter(successors[start])]
+        state[start] = 1
+        while iterators:
+            for nxt in iterators[-1]:
+                if nxt not in remaining:
+                    continue
+                if state.get(nxt) == 1:
+                    return path[path.index(nxt):] + [nxt]
+                if nxt not in state:
+                    state[nxt] = 1
+                    path.append(nxt)
+                    iterators.append(iter(successors[nxt]))
+                    break
+            else:
+                state[path.pop()] = 2
+                iterators.pop()
+    return []
@@ -0,0 +1,144 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Callable
+
+from agentic_patterns.multiagent_pattern.agent import Agent
+from agentic_patterns.multiagent_pattern.crew import Crew
+from agentic_patterns.utils.metrics import metrics_context
+from agentic_patterns.utils.semantic_cache import cache_subject
+from agentic_patterns.utils.tracing import span
+
+
+class MapAgent(Agent):
+    """
+    Runs one agent template over many items in parallel and gathers the outputs in order.
+
+    The template is never run on its own: it is removed from the active crew and only
+    used as a blueprint. At run time one task is spawned per item, the tasks run concurrently
+    (at most `max_concurrency` at a time) and the ordered results are passed as context
+    to the dependents of the MapAgent, typically a reducer agent.
+
+    Attributes:
+        template (Agent): The agent used as a blueprint for every item.
+        items (list | Callable[[str], list]): The items to map over, or a callable that
+            receives the MapAgent context at run time and returns the items.
+        max_concurrency (int): The maximum number of items processed at the same time.
+        item_formatter (Callable[[Agent, Any], str]): Builds the task description for one item.
+        outputs (list[str]): The outputs of the last run, in the same order as the items.
+
+    Args:
+        template (Agent): The agent used as a blueprint for every item.
+        items (list | Callable[[str], list]): The items to map over.
+        name (str | None, optional): The name of the agent. Defaults to "<template name> (map)".
+        max_concurrency (int, optional): The maximum number of concurrent items. Defaults to 4.
+        item_formatter (Callable[[Agent, Any], str] | None, optional): Builds the task description
+            for one item. Defaults to replacing `{item}` in the template task description, or
+            appending the item when the placeholder is missing.
+    """
+
+    def __init__(
+        self,
+        template: Agent,
+        items: list | Callable[[str], list],
+        name: str | None = None,
+        max_concurrency: int = 4,
+        item_formatter: Callable[[Agent, Any], str] | None = None,
+    ):
+        super().__init__(
+            name=name or f"{template.name} (map)",
+            backstory=template.backstory,
+            task_description=template.task_description,
+            task_expected_output=template.task_expected_output,
+            tools=template.react_agent.tools,
+            llm=template.react_agent.model,
+        )
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self.template = template
+        self.items = items
+        self.max_concurrency = max_concurrency
+        self.item_formatter = item_formatter or default_item_formatter
+        self.outputs: list[str] = []
+
+        crew = Crew.current()
+        if crew is not None:
+            crew.remove_agent(template)
+
+    def resolve_items(self, context: str) -> list:
+        """
+        Args:
+            context (str): The context of the current run.
+
+        Returns:
+            list: The items for this run, evaluating `items` against the context if it is callable.
+        """
+        if callable(self.items):
+            return list(self.items(context))
+        return list(self.items)
+
+    def run_item(self, item: Any, context: str) -> str:
+        """
+        Runs the template for a single item without touching the template state.
+
+        Args:
+            item (Any): The item to process.
+            context (str): The context shared by all the items.
+
+        Returns:
+            str: The output of the template for this item.
+        """
+        # The item is the only varying part of the prompt: fuzzy cache matching compares items only.
+        # The calls are attributed to the map step, which is what the crew schedules and profiles.
+        with cache_subject(str(item)), span("agent.run", agent=self.name), metrics_context(agent=self.name):
+            with span("agent.prompt", agent=self.name):
+                msg = self.template.create_prompt(task=self.item_formatter(self.template, item), context=context)
+            return self.template.react_agent.run(user_msg=msg)
+
+    def run(self, task: str | None = None, context: str | None = None):
+        """
+        Runs the template over every item and joins the outputs in item order.
+
+        Args:
+            task (str | None, optional): Ignored; each item builds its own task.
+            context (str | None, optional): Overrides the context for this call. When given,
+                the output is not pushed to the dependents.
+
+        Returns:
+            str: The outputs of all the items, tagged with their item.
+        """
+        shared_context = self.context if context is None else context
+        items = self.resolve_items(shared_context)
+        # Each item runs in a copy of the caller's context, so metrics and events stay attributed to this run.
+        parent = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            outputs = list(
+                pool.map(lambda item: parent.copy().run(self.run_item, item, shared_context), items)
+            )
+        self.outputs = outputs
+
+        output = "\n\n".join(
+            f"<item>\n{item}\n</item>\n<output>\n{result}\n</output>"
+            for item, result in zip(items, outputs)
+        )
+
+        if task is None and context is None:
+            self.propagate(output)
+        return output
+
+
+def default_item_formatter(template: Agent, item: Any) -> str:
+    """
+    Builds the task description of a template for one item.
+
+    Args:
+        template (Agent): The template agent.
+        item (Any): The item to process.
+
+    Returns:
+        str: The template task description with `{item}` replaced, or with the item appended.
+    """
+    if "{item}" in template.task_description:
+        return template.task_description.replace("{item}", str(item))
+    return f"{template.task_description}\n\nItem: {item}"
@@ -0,0 +1,196 @@
+import contextvars
+import itertools
+import queue
+import threading
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Iterable
+from typing import Iterator
+
+from agentic_patterns.multiagent_pattern.execution_plan import ExecutionPlan
+
+_STOP = object()
+
+
+@dataclass
+class PipelineResult:
+    """
+    The result of pushing one input through a crew pipeline.
+
+    Attributes:
+        index (int): The position of the input in the input stream.
+        item (Any): The input itself.
+        outputs (dict[str, str]): The output of every agent that ran, keyed by agent name.
+        skipped (list[str]): The names of the agents pruned by conditional edges.
+        error (BaseException | None): The exception raised by an agent, if any.
+    """
+
+    index: int
+    item: Any
+    outputs: dict[str, str] = field(default_factory=dict)
+    skipped: list[str] = field(default_factory=list)
+    error: BaseException | None = None
+
+
+class _InFlight:
+    """
+    The per-input state of the DAG: contexts, pending dependencies and activated agents.
+    """
+
+    def __init__(self, index: int, item: Any, plan: ExecutionPlan):
+        self.result = PipelineResult(index=index, item=item)
+        self.contexts = ["" for _ in plan.agents]
+        self.remaining = [len(preds) for preds in plan.predecessors]
+        self.activated: set[int] = set()
+        self.unresolved = len(plan.agents)
+        self.lock = threading.Lock()
+
+
+class CrewPipeline:
+    """
+    Runs a stream of inputs through a crew, with every agent acting as a pipeline stage.
+
+    Each agent gets its own bounded queue and worker pool, so input N+1 can be in the
+    first stage while input N is in a later one. A full queue blocks the stage that feeds it,
+    which applies backpressure all the way up to the input stream. Throughput approaches that
+    of the slowest stage instead of the sum of all stages.
+
+    Every input is given to the root agents as context, and replaces the `{item}`
+    placeholder in any task description. Agents are invoked with task and context overrides,
+    so they are never mutated and can serve several inputs at once.
+
+    Attributes:
+        crew (Crew): The crew whose agents form the stages.
+        workers (int | dict[str, int]): Worker threads per stage, globally or by agent name.
+        queue_size (int): The capacity of each stage queue.
+    """
+
+    def __init__(self, crew, workers: int | dict[str, int] = 1, queue_size: int = 8):
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self.crew = crew
+        self.workers = workers
+        self.queue_size = queue_size
+
+    def _workers_for(self, agent) -> int:
+        if isinstance(self.workers, dict):
+            return max(1, self.workers.get(agent.name, 1))
+        return max(1, self.workers)
+
+    def run(self, inputs: Iterable[Any]) -> Iterator[PipelineResult]:
+        """
+        Pushes the inputs through the crew and yields results as each input completes.
+
+        Args:
+            inputs (Iterable[Any]): The input stream. It is consumed lazily.
+
+        Yields:
+            PipelineResult: The outputs for one input, in completion order.
+
+        Raises:
+            Exception: The error raised by the input stream, once the inputs read before it are done.
+        """
+        plan = self.crew.compile()
+        if not plan.agents:
+            return
+
+        stages = [queue.Queue(maxsize=self.queue_size) for _ in plan.agents]
+        results: queue.Queue = queue.Queue()
+        stop = threading.Event()
+        fed = {"count": None, "error": None}
+
+        def finish(state: _InFlight, agent_index: int, output: str | None, error=None):
+            """Resolves one agent for one input and schedules or prunes its dependents."""
+            ready = []
+            with state.lock:
+                if error is not None and state.result.error is None:
+                    state.result.error = error
+                pending = [(agent_index, output)]
+                while pending:
+                    i, out = pending.pop()
+                    state.unresolved -= 1
+                    agent = plan.agents[i]
+                    for j in plan.successors[i]:
+                        if out is not None and agent.edge_is_active(plan.agents[j], out):
+                            dependent = plan.agents[j]
+                            state.contexts[j] += dependent.format_context(
+                                agent.forward_output(out, state.contexts[i])
+                            )
+                            state.activated.add(j)
+                        state.remaining[j] -= 1
+                        if state.remaining[j] == 0:
+                            if j in state.activated and state.result.error is None:
+                                ready.append(j)
+                            else:
+                                state.result.skipped.append(plan.agents[j].name)
+                                pending.append((j, None))
+                done = state.unresolved == 0
+
+            for j in ready:
+                stages[j].put(state)
+            if done:
+                results.put(state.result)
+
+        def worker(agent_index: int):
+            agent = plan.agents[agent_index]
+            while True:
+                state = stages[agent_index].get()
+                if state is _STOP:
+                    return
+                if stop.is_set():
+                    continue
+                task = agent.task_description.replace("{item}", str(state.result.item))
+                try:
+                    output = agent.run(task=task, context=state.contexts[agent_index])
+                except Exception as e:
+                    finish(state, agent_index, None, error=e)
+                    continue
+                with state.lock:
+                    state.result.outputs[agent.name] = output
+                finish(state, agent_index, output)
+
+        def feeder():
+            count = 0
+            try:
+                for index, item in zip(itertools.count(), inputs):
+                    if stop.is_set():
+                        break
+                    state = _InFlight(index, item, plan)
+                    for i, preds in enumerate(plan.predecessors):
+                        if not preds:
+                            state.contexts[i] = plan.agents[i].format_context(item)
+                            stages[i].put(state)
+                    count += 1
+            except BaseException as e:
+                fed["error"] = e
+            finally:
+                fed["count"] = count
+                results.put(None)
+
+        # Every thread runs in a copy of the caller's context, so metrics and events stay attributed to this run.
+        parent = contextvars.copy_context()
+        threads = [
+            threading.Thread(target=parent.copy().run, args=(worker, i), daemon=True)
+            for i, agent in enumerate(plan.agents)
+            for _ in range(self._workers_for(agent))
+        ]
+        threads.append(threading.Thread(target=parent.copy().run, args=(feeder,), daemon=True))
+        for thread in threads:
+            thread.start()
+
+        yielded = 0
+        try:
+            while fed["count"] is None or yielded < fed["count"]:
+                result = results.get()
+                if result is None:
+                    continue
+                yielded += 1
+                yield result
+            if fed["error"] is not None:
+                raise fed["error"]
+        finally:
+            stop.set()
+            for i, agent in enumerate(plan.agents):
+                for _ in range(self._workers_for(agent)):
+                    stages[i].put(_STOP)
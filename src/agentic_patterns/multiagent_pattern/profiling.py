@@ -0,0 +1,204 @@
+from dataclasses import dataclass
+from dataclasses import field
+
+from graphviz import Digraph  # type: ignore
+
+from agentic_patterns.multiagent_pattern.execution_plan import ExecutionPlan
+from agentic_patterns.utils.metrics import CallMetrics
+from agentic_patterns.utils.metrics import ToolMetrics
+
+
+@dataclass
+class AgentTiming:
+    """
+    When an agent became ready, started and finished during a crew run (perf_counter seconds).
+    """
+
+    ready: float
+    start: float
+    end: float
+
+
+@dataclass
+class AgentProfile:
+    """
+    The runtime profile of one agent in a crew run.
+
+    Attributes:
+        name (str): The name of the agent.
+        wall_time (float): Seconds between the start and the end of the agent.
+        llm_time (float): Seconds spent in LLM calls.
+        tool_time (float): Seconds spent in tool calls.
+        queue_wait (float): Seconds between the agent becoming ready and starting.
+        prompt_tokens (int): Prompt tokens sent by the agent.
+        completion_tokens (int): Completion tokens received by the agent.
+        llm_calls (int): The number of LLM calls.
+        tool_calls (int): The number of tool calls.
+        skipped (bool): Whether the agent was pruned by a conditional edge.
+    """
+
+    name: str
+    wall_time: float = 0.0
+    llm_time: float = 0.0
+    tool_time: float = 0.0
+    queue_wait: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    llm_calls: int = 0
+    tool_calls: int = 0
+    skipped: bool = False
+
+    @property
+    def other_time(self) -> float:
+        """
+        Returns:
+            float: The wall time not spent in LLM or tool calls (prompt building, parsing...).
+        """
+        return max(0.0, self.wall_time - self.llm_time - self.tool_time)
+
+
+@dataclass
+class CrewProfile:
+    """
+    The profile of a crew run: per-agent timings and the critical path through the DAG.
+
+    Attributes:
+        plan (ExecutionPlan): The plan the crew ran.
+        agents (list[AgentProfile]): One profile per agent, indexed like the plan.
+        critical_path (list[int]): The agent indices on the longest path, weighted by wall time.
+        total_time (float): The wall time of the whole run.
+    """
+
+    plan: ExecutionPlan
+    agents: list[AgentProfile]
+    critical_path: list[int] = field(default_factory=list)
+    total_time: float = 0.0
+
+    @classmethod
+    def build(
+        cls,
+        plan: ExecutionPlan,
+        timings: dict[int, AgentTiming],
+        calls: list[CallMetrics | ToolMetrics],
+        total_time: float = 0.0,
+    ) -> "CrewProfile":
+        """
+        Builds the profile of a run.
+
+        Args:
+            plan (ExecutionPlan): The plan the crew ran.
+            timings (dict[int, AgentTiming]): The timing of every agent that ran, by plan index.
+            calls (list[CallMetrics | ToolMetrics]): The LLM and tool calls made during the run.
+            total_time (float, optional): The wall time of the whole run. Defaults to 0.0.
+
+        Returns:
+            CrewProfile: The profile.
+        """
+        profiles = [AgentProfile(name=agent.name, skipped=i not in timings) for i, agent in enumerate(plan.agents)]
+        by_name = {profile.name: profile for profile in profiles}
+
+        for i, timing in timings.items():
+            profiles[i].wall_time = timing.end - timing.start
+            profiles[i].queue_wait = max(0.0, timing.start - timing.ready)
+
+        for call in calls:
+            profile = by_name.get(call.agent or "")
+            if profile is None:
+                continue
+            if isinstance(call, CallMetrics):
+                profile.llm_calls += 1
+                profile.llm_time += call.latency
+                profile.prompt_tokens += call.prompt_tokens
+                profile.completion_tokens += call.completion_tokens
+            elif isinstance(call, ToolMetrics):
+                profile.tool_calls += 1
+                profile.tool_time += call.latency
+
+        critical_path = plan.longest_path([profile.wall_time for profile in profiles])
+        return cls(plan=plan, agents=profiles, critical_path=critical_path, total_time=total_time)
+
+    def critical_agents(self) -> list[str]:
+        """
+        Returns:
+            list[str]: The names of the agents on the critical path.
+        """
+        return [self.agents[i].name for i in self.critical_path]
+
+    def report(self) -> str:
+        """
+        Formats the profile as a text table. Agents on the critical path are marked with `*`.
+
+        Returns:
+            str: The report.
+        """
+        on_path = set(self.critical_path)
+        header = (
+            f"  {'agent':<30} {'wall s':>7} {'llm s':>7} {'tool s':>7} {'other s':>7} "
+            f"{'wait s':>7} {'tok in':>7} {'tok out':>7}"
+        )
+        lines = [header, "-" * len(header)]
+        for i in self.plan.order:
+            profile = self.agents[i]
+            marker = "*" if i in on_path and not profile.skipped else " "
+            if profile.skipped:
+                lines.append(f"{marker} {profile.name[:30]:<30} {'skipped':>7}")
+                continue
+            lines.append(
+                f"{marker} {profile.name[:30]:<30} {profile.wall_time:>7.2f} {profile.llm_time:>7.2f} "
+                f"{profile.tool_time:>7.2f} {profile.other_time:>7.2f} {profile.queue_wait:>7.2f} "
+                f"{profile.prompt_tokens:>7} {profile.completion_tokens:>7}"
+            )
+        critical_time = sum(self.agents[i].wall_time for i in self.critical_path)
+        lines.append("")
+        lines.append(f"Total: {self.total_time:.2f}s, critical path: {critical_time:.2f}s")
+        lines.append("Critical path: " + " -> ".join(self.critical_agents()))
+        return "\n".join(lines)
+
+    def plot(self) -> Digraph:
+        """
+        Draws the dependency graph annotated with the profile.
+
+        Nodes are shaded by wall time and labelled with their time split and tokens.
+        Edges on the critical path are drawn in bold red; skipped agents are dashed.
+
+        Returns:
+            Digraph: The annotated graph.
+        """
+        dot = Digraph(format="png")
+        dot.attr("node", shape="box", style="filled", fontname="Helvetica")
+        longest = max((profile.wall_time for profile in self.agents), default=0.0) or 1.0
+        on_path = set(self.critical_path)
+        critical_edges = set(zip(self.critical_path, self.critical_path[1:]))
+
+        for i, profile in enumerate(self.agents):
+            if profile.skipped:
+                dot.node(profile.name, f"{profile.name}\nskipped", style="dashed", color="gray", fontcolor="gray")
+                continue
+            label = (
+                f"{profile.name}\n{profile.wall_time:.2f}s "
+                f"(llm {profile.llm_time:.2f}s, tool {profile.tool_time:.2f}s)\n"
+                f"wait {profile.queue_wait:.2f}s, tokens {profile.prompt_tokens}/{profile.completion_tokens}"
+            )
+            dot.node(
+                profile.name,
+                label,
+                fillcolor=_heat_color(profile.wall_time / longest),
+                penwidth="3" if i in on_path else "1",
+            )
+
+        for i, successors in enumerate(self.plan.successors):
+            for j in successors:
+                if (i, j) in critical_edges:
+                    dot.edge(self.agents[i].name, self.agents[j].name, color="red", penwidth="3")
+                else:
+                    dot.edge(self.agents[i].name, self.agents[j].name)
+        return dot
+
+
+def _heat_color(fraction: float) -> str:
+    """
+    Maps a fraction in [0, 1] to a color between white and red.
+    """
+    fraction = min(max(fraction, 0.0), 1.0)
+    other = int(255 * (1 - 0.75 * fraction))
+    return f"#ff{other:02x}{other:02x}"
@@ -0,0 +1,115 @@
+from agentic_patterns.multiagent_pattern.agent import Agent
+from agentic_patterns.utils.extraction import extract_tag_content
+from agentic_patterns.utils.metrics import metrics_context
+from agentic_patterns.utils.tracing import span
+
+ROUTER_TASK_SUFFIX = """
+
+You must choose exactly one of the following branches to continue the work:
+
+%s
+
+Answer with the name of the chosen branch enclosed in <route></route> tags, e.g. <route>%s</route>.
+"""
+
+
+class Router(Agent):
+    """
+    An agent that picks which downstream branch runs next.
+
+    Each route is wired as a conditional edge, so only the chosen branch (and what
+    depends on it) is scheduled by the Crew; the other branches are pruned. The chosen
+    branch receives the context the router received, not the routing decision.
+
+    Attributes:
+        routes (dict[str, Agent]): The branches, keyed by route name.
+        default_route (str | None): The route taken when the model output names no valid route.
+
+    Args:
+        name (str): The name of the router.
+        backstory (str): The backstory or background of the router.
+        task_description (str): Describes how to choose between the branches.
+        routes (dict[str, Agent]): The branches, keyed by route name. A route name may be
+            mapped to a short description with `route_descriptions`.
+        route_descriptions (dict[str, str] | None, optional): Descriptions shown to the model. Defaults to None.
+        default_route (str | None, optional): The fallback route. Defaults to None (no branch runs).
+        llm (str, optional): The name of the language model to use. Defaults to "llama-3.3-70b-versatile".
+    """
+
+    def __init__(
+        self,
+        name: str,
+        backstory: str,
+        task_description: str,
+        routes: dict[str, Agent],
+        route_descriptions: dict[str, str] | None = None,
+        default_route: str | None = None,
+        llm: str = "llama-3.3-70b-versatile",
+    ):
+        if not routes:
+            raise ValueError("A Router needs at least one route")
+        if default_route is not None and default_route not in routes:
+            raise ValueError(f"Unknown default route '{default_route}'")
+
+        route_descriptions = route_descriptions or {}
+        branches = "\n".join(
+            f"- {route}: {route_descriptions.get(route, agent.task_description)}"
+            for route, agent in routes.items()
+        )
+        super().__init__(
+            name=name,
+            backstory=backstory,
+            task_description=task_description
+            + ROUTER_TASK_SUFFIX % (branches, next(iter(routes))),
+            task_expected_output="The name of the chosen branch inside <route></route> tags",
+            llm=llm,
+        )
+        self.routes = routes
+        self.default_route = default_route
+
+        for route, agent in routes.items():
+            self.add_dependent(agent, condition=_route_condition(route))
+
+    def parse_route(self, completion: str) -> str | None:
+        """
+        Extracts the chosen route from the model output.
+
+        Args:
+            completion (str): The model output.
+
+        Returns:
+            str | None: The chosen route, the default route if none is valid, or None.
+        """
+        route = extract_tag_content(str(completion), "route")
+        if route.found and route.content[0] in self.routes:
+            return route.content[0]
+        for name in self.routes:
+            if name == str(completion).strip():
+                return name
+        return self.default_route
+
+    def run(self, task: str | None = None, context: str | None = None):
+        """
+        Asks the model to choose a branch.
+
+        Args:
+            task (str | None, optional): Overrides the task description for this call.
+            context (str | None, optional): Overrides the context for this call.
+
+        Returns:
+            str: The chosen route name, or an empty string when no route applies.
+        """
+        msg = self.create_prompt(task=task, context=context)
+        with span("agent.run", agent=self.name, router=True), metrics_context(agent=self.name):
+            route = self.parse_route(self.react_agent.run(user_msg=msg)) or ""
+
+        if task is None and context is None:
+            self.propagate(route)
+        return route
+
+    def forward_output(self, output: str, context: str) -> str:
+        return context
+
+
+def _route_condition(route: str):
+    return lambda output: output == route
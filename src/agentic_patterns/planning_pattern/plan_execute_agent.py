@@ -0,0 +1,398 @@
+import contextvars
+import json
+import re
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+
+from agentic_patterns.planning_pattern.react_agent import BASE_SYSTEM_PROMPT
+from agentic_patterns.planning_pattern.react_agent import ReactAgent
+from agentic_patterns.tool_pattern.observations import ArtifactStore
+from agentic_patterns.tool_pattern.observations import observe
+from agentic_patterns.tool_pattern.observations import ObservationPolicy
+from agentic_patterns.tool_pattern.tool import Tool
+from agentic_patterns.tool_pattern.tool import validate_arguments
+from agentic_patterns.utils import events
+from agentic_patterns.utils.completions import build_prompt_structure
+from agentic_patterns.utils.extraction import extract_tag_content
+from agentic_patterns.utils.json_repair import loads_lenient
+from agentic_patterns.utils.metrics import metrics_context
+from agentic_patterns.utils.routing import answers_on_synthesis_route
+from agentic_patterns.utils.routing import PLANNING
+from agentic_patterns.utils.routing import route_completion
+from agentic_patterns.utils.routing import SYNTHESIS
+from agentic_patterns.utils.tracing import span
+
+PLAN_SYSTEM_PROMPT = """
+You solve the user's question by planning all the tool calls up front. You are provided with function
+signatures within <tools></tools> XML tags. Pay special attention to the properties 'types'.
+
+Output the whole plan as a JSON list of steps within <plan></plan> XML tags. Every step has a unique "id",
+the tool "name" and its "arguments". An argument may reuse the result of an earlier step by referencing
+its id as "${<id>}". Steps that do not depend on each other are run in parallel.
+
+<tools>
+%s
+</tools>
+
+Example:
+
+<question>What is the log of the sum of 2 and 3, and the product of 4 and 5?</question>
+<plan>
+[
+    {"id": "s1", "name": "sum_two_elements", "arguments": {"a": 2, "b": 3}},
+    {"id": "s2", "name": "multiply_two_elements", "arguments": {"a": 4, "b": 5}},
+    {"id": "s3", "name": "compute_log", "arguments": {"x": "${s1}"}}
+]
+</plan>
+
+If the question needs no tool, answer directly enclosing your answer with <response></response> tags.
+"""
+
+REPLAN_PROMPT = """
+Executing the plan failed:
+
+<plan>
+%s
+</plan>
+
+<results>
+%s
+</results>
+
+<errors>
+%s
+</errors>
+
+Output a new plan for the remaining work within <plan></plan> tags. You may reference the results above
+by their ids.
+"""
+
+SYNTHESIS_PROMPT = """
+<observation>
+%s
+</observation>
+
+Answer the question using these tool results, enclosing your answer with <response></response> tags.
+"""
+
+# "${s1}" rather than "$s1", so that prices ("$USD") and shell variables ("$HOME") are left alone.
+_REFERENCE = re.compile(r"\$\{(\w+)\}")
+
+
+class PlanError(ValueError):
+    """
+    Raised when a plan cannot be executed as written: bad JSON, an unknown tool, or a cycle.
+    """
+
+
+@dataclass
+class PlanStep:
+    """
+    One tool call of a plan.
+
+    Attributes:
+        id (str): The identifier other steps reference the result by, as "${<id>}".
+        name (str): The name of the tool.
+        arguments (dict): The arguments, possibly holding references.
+        dependencies (set[str]): The ids of the steps whose results are referenced.
+    """
+
+    id: str
+    name: str
+    arguments: dict
+    dependencies: set[str] = field(default_factory=set)
+
+
+def parse_plan(text: str, tools: dict[str, Tool], known_ids=()) -> list[PlanStep]:
+    """
+    Parses and checks the `<plan>` of a model output. References to ids that are neither steps
+    of the plan nor `known_ids` are not references: they are left in the arguments as written.
+
+    Args:
+        text (str): The model output.
+        tools (dict[str, Tool]): The available tools, by name.
+        known_ids (Iterable[str], optional): The ids of results from earlier plans, which may be referenced.
+
+    Returns:
+        list[PlanStep]: The steps.
+
+    Raises:
+        PlanError: If the plan is missing or invalid.
+    """
+    plan = extract_tag_content(str(text), "plan")
+    if not plan.found:
+        raise PlanError("No <plan> found")
+    try:
+        raw_steps = loads_lenient(plan.content[0])
+    except json.JSONDecodeError as e:
+        raise PlanError(f"The plan is not valid JSON: {e}") from e
+    if not isinstance(raw_steps, list):
+        raise PlanError("The plan must be a JSON list of steps")
+
+    steps = []
+    for i, raw in enumerate(raw_steps):
+        if not isinstance(raw, dict) or "name" not in raw:
+            raise PlanError(f"Step {i} has no tool name")
+        if raw["name"] not in tools:
+            raise PlanError(f"Step {i} uses the unknown tool '{raw['name']}'")
+        steps.append(
+            PlanStep(id=str(raw.get("id", f"s{i + 1}")), name=raw["name"], arguments=raw.get("arguments") or {})
+        )
+
+    ids = {step.id for step in steps}
+    if len(ids) != len(steps):
+        raise PlanError("Step ids must be unique")
+    available = ids | set(known_ids)
+    for step in steps:
+        step.dependencies = _references(step.arguments, available) & ids
+    _check_acyclic(steps)
+    return steps
+
+
+def resolve_arguments(arguments: Any, results: dict[str, Any]) -> Any:
+    """
+    Replaces the references in the arguments by the results they point to. A value that is
+    exactly "${<id>}" becomes the result itself; references inside longer strings are formatted.
+    References to ids without a result are left as written.
+
+    Args:
+        arguments (Any): The arguments of a step.
+        results (dict[str, Any]): The results so far, by step id.
+
+    Returns:
+        Any: The resolved arguments.
+    """
+    if isinstance(arguments, dict):
+        return {key: resolve_arguments(value, results) for key, value in arguments.items()}
+    if isinstance(arguments, list):
+        return [resolve_arguments(value, results) for value in arguments]
+    if isinstance(arguments, str):
+        match = _REFERENCE.fullmatch(arguments)
+        if match and match.group(1) in results:
+            return results[match.group(1)]
+        return _REFERENCE.sub(
+            lambda m: str(results[m.group(1)]) if m.group(1) in results else m.group(0), arguments
+        )
+    return arguments
+
+
+def _references(arguments: Any, ids: set[str]) -> set[str]:
+    if isinstance(arguments, dict):
+        return set().union(*(_references(value, ids) for value in arguments.values()))
+    if isinstance(arguments, list):
+        return set().union(*(_references(value, ids) for value in arguments))
+    if isinstance(arguments, str):
+        return set(_REFERENCE.findall(arguments)) & ids
+    return set()
+
+
+def _check_acyclic(steps: list[PlanStep]) -> None:
+    remaining = {step.id: set(step.dependencies) for step in steps}
+    while remaining:
+        ready = [id for id, dependencies in remaining.items() if not dependencies]
+        if not ready:
+            raise PlanError(f"The plan has a cycle between steps {sorted(remaining)}")
+        for id in ready:
+            del remaining[id]
+        for dependencies in remaining.values():
+            dependencies.difference_update(ready)
+
+
+class PlanExecuteAgent(ReactAgent):
+    """
+    A ReactAgent variant that asks the model for the whole plan of tool calls up front.
+
+    The plan is a dependency graph: steps reference earlier results as "${<id>}". It is executed
+    locally, every step starting as soon as the steps it references are done, and the model is
+    called again only to synthesize the answer, or to replan when a step fails.
+
+    Args:
+        tools (Tool | list[Tool]): The tools available to the agent.
+        model (str, optional): The model. Defaults to "llama-3.3-70b-versatile".
+        system_prompt (str, optional): Prepended to the planning system prompt.
+        max_workers (int, optional): The maximum number of tool calls run in parallel. Defaults to 8.
+        client (optional): The LLM client. Defaults to a Groq client.
+        observation_policy (ObservationPolicy | None, optional): How results are shown to the model;
+            steps always receive the full results of the steps they reference. Defaults to None.
+        artifact_store (ArtifactStore | None, optional): Where oversized results are kept. Defaults to None.
+    """
+
+    def __init__(
+            self,
+            tools: Tool | list[Tool],
+            model: str = "llama-3.3-70b-versatile",
+            system_prompt: str = BASE_SYSTEM_PROMPT,
+            max_workers: int = 8,
+            observation_policy: ObservationPolicy | None = None,
+            artifact_store: ArtifactStore | None = None,
+            client=None,
+    ) -> None:
+        super().__init__(
+            tools,
+            model=model,
+            system_prompt=system_prompt,
+            client=client,
+            observation_policy=observation_policy,
+            artifact_store=artifact_store,
+        )
+        self.max_workers = max_workers
+
+    def execute_plan(self, steps: list[PlanStep], results: dict[str, Any]) -> dict[str, str]:
+        """
+        Runs the steps of a plan with maximum parallelism.
+
+        Args:
+            steps (list[PlanStep]): The steps.
+            results (dict[str, Any]): The results of earlier plans; filled with the new results.
+
+        Returns:
+            dict[str, str]: The errors of the failed steps, by step id. Steps depending on a
+            failed step are not run.
+        """
+        errors: dict[str, str] = {}
+        pending = {step.id: step for step in steps}
+        running: dict[Future, PlanStep] = {}
+
+        with span("plan.execute", steps=len(steps)), ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                # Skips propagate down chains of steps listed in any order.
+                skipped = True
+                while skipped:
+                    skipped = False
+                    for id, step in list(pending.items()):
+                        if step.dependencies & errors.keys():
+                            errors[id] = "Skipped: a step it depends on failed"
+                            del pending[id]
+                            skipped = True
+                for id, step in list(pending.items()):
+                    if step.dependencies <= results.keys():
+                        del pending[id]
+                        future = executor.submit(contextvars.copy_context().run, self._run_step, step, dict(results))
+                        running[future] = step
+                if not running:
+                    for id in pending:
+                        errors[id] = "Not run: a step it depends on never completed"
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    try:
+                        results[step.id] = future.result()
+                    except Exception as e:
+                        errors[step.id] = f"{type(e).__name__}: {e}"
+        return errors
+
+    def _run_step(self, step: PlanStep, results: dict[str, Any]) -> Any:
+        tool = self.tools_dict[step.name]
+        tool_call = validate_arguments(
+            {"name": step.name, "arguments": resolve_arguments(step.arguments, results), "id": step.id},
+            json.loads(tool.fn_signature),
+        )
+        events.emit(events.TOOL_CALL, tool=step.name, call=tool_call)
+        with span("plan.step", step=step.id, tool=step.name):
+            result = tool.run(**tool_call["arguments"])
+        events.emit(events.TOOL_RESULT, tool=step.name, result=result)
+        return result
+
+    def _observations(self, results: dict[str, Any], step_tools: dict[str, str]) -> dict[str, Any]:
+        """
+        Returns the results as shown to the model, under the observation policies of their tools.
+        """
+        return {
+            id: observe(self.tools_dict[step_tools[id]], result, self.observation_policy, self.artifact_store)
+            for id, result in results.items()
+        }
+
+    def run(
+            self,
+            user_msg: str,
+            max_rounds: int = 3,
+    ) -> str:
+        """
+        Plans, executes the plan and synthesizes the answer.
+
+        Args:
+            user_msg (str): The user's question.
+            max_rounds (int, optional): The maximum number of plans, including replans. Defaults to 3.
+
+        Returns:
+            str: The answer.
+        """
+        question = build_prompt_structure(user_msg, role="user", tag="question")
+        chat_history = [
+            build_prompt_structure(
+                self.system_prompt + "\n" + PLAN_SYSTEM_PROMPT % self.add_tool_signatures(), role="system"
+            ),
+            question,
+        ]
+        results: dict[str, Any] = {}
+        step_tools: dict[str, str] = {}
+
+        for round in range(max_rounds):
+            events.emit(events.ROUND, events.DEBUG, round=round, max_rounds=max_rounds)
+            with span("plan.round", round=round), metrics_context(round=round):
+                completion = route_completion(
+                    self.client,
+                    chat_history,
+                    self.model,
+                    PLANNING,
+                    validate=lambda output: _is_plan_or_response(output, self.tools_dict, results),
+                )
+                response = extract_tag_content(str(completion), "response")
+                if response.found and "<plan>" not in str(completion):
+                    if answers_on_synthesis_route(PLANNING, self.model):
+                        return response.content[0]
+                    # Planning runs on a model final answers do not use: answer on the synthesis route.
+                    break
+
+                try:
+                    steps = parse_plan(completion, self.tools_dict, results)
+                except PlanError as e:
+                    chat_history += [
+                        build_prompt_structure(completion, role="assistant"),
+                        build_prompt_structure(f"Invalid plan: {e}. Output a corrected plan.", role="user"),
+                    ]
+                    continue
+
+                events.emit(events.PLAN, steps=[step.__dict__ for step in steps])
+                step_tools.update((step.id, step.name) for step in steps)
+                errors = self.execute_plan(steps, results)
+                events.emit(events.OBSERVATIONS, observations=results)
+                if not errors:
+                    break
+                chat_history += [
+                    build_prompt_structure(completion, role="assistant"),
+                    build_prompt_structure(
+                        REPLAN_PROMPT % (
+                            extract_tag_content(completion, "plan").content[0],
+                            self._observations(results, step_tools),
+                            errors,
+                        ),
+                        role="user",
+                    ),
+                ]
+
+        with metrics_context(round=max_rounds):
+            answer = route_completion(
+                self.client,
+                [chat_history[0], question, build_prompt_structure(SYNTHESIS_PROMPT % self._observations(results, step_tools), role="user")],
+                self.model,
+                SYNTHESIS,
+            )
+        response = extract_tag_content(str(answer), "response")
+        return response.content[0] if response.found else answer
+
+
+def _is_plan_or_response(output: str, tools: dict[str, Tool], results: dict) -> bool:
+    if "<plan>" not in str(output):
+        return extract_tag_content(str(output), "response").found
+    try:
+        parse_plan(output, tools, results)
+    except PlanError:
+        return False
+    return True
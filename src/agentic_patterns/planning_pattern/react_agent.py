@@ -1,17 +1,32 @@
 import json
 import re
 
-from colorama import Fore
 from dotenv import load_dotenv
 from groq import Groq
 
+from agentic_patterns.tool_pattern.observations import ArtifactStore
+from agentic_patterns.tool_pattern.observations import observe
+from agentic_patterns.tool_pattern.observations import ObservationPolicy
+from agentic_patterns.tool_pattern.observations import with_artifact_tool
+from agentic_patterns.tool_pattern.tool import NATIVE
 from agentic_patterns.tool_pattern.tool import Tool
 from agentic_patterns.tool_pattern.tool import validate_arguments
+from agentic_patterns.tool_pattern.tool import XML
+from agentic_patterns.utils import events
+from agentic_patterns.utils.compaction import RollingSummary
 from agentic_patterns.utils.completions import build_prompt_structure
 from agentic_patterns.utils.completions import ChatHistory
-from agentic_patterns.utils.completions import completions_create
+from agentic_patterns.utils.completions import function_calls_create
 from agentic_patterns.utils.completions import update_chat_history
 from agentic_patterns.utils.extraction import extract_tag_content
+from agentic_patterns.utils.json_repair import loads_lenient
+from agentic_patterns.utils.metrics import metrics_context
+from agentic_patterns.utils.routing import answers_on_synthesis_route
+from agentic_patterns.utils.routing import route_completion
+from agentic_patterns.utils.routing import SYNTHESIS
+from agentic_patterns.utils.routing import TOOL_SELECTION
+from agentic_patterns.utils.routing import valid_tool_calls
+from agentic_patterns.utils.tracing import span
 
 load_dotenv()
 
@@ -55,41 +70,106 @@ Additional constraints:
 - If the user asks you something unrelated to any of the tools above, answer freely enclosing your answer with <response></response> tags.
 """
 
+NATIVE_SYSTEM_PROMPT = """
+Use the provided functions when they help to answer the user's question. You may call several functions
+at once. When you have everything you need, answer the question directly.
+"""
+
+NUDGE_PROMPTS = {
+    "repetition": "You already made these exact calls and their results are in the observations above. "
+    "Do not repeat them: call a different tool or answer with <response></response> tags.",
+    "no_action": "Your reply had neither a tool call nor a response. "
+    "Call a tool or answer with <response></response> tags.",
+}
+
+STOP_PROMPT = """
+You are not making progress. Answer the question now with the observations you have, enclosing your
+answer with <response></response> tags.
+"""
+
+STOP_ANSWERED = "answered"
+STOP_REPETITION = "repetition"
+STOP_NO_ACTION = "no_action"
+STOP_MAX_ROUNDS = "max_rounds"
+
+
+def _call_key(name: str, arguments: dict) -> str:
+    return name + json.dumps(arguments, sort_keys=True, default=str)
+
+
 class ReactAgent:
+    """
+    An agent that alternates thoughts, tool calls and observations until it can answer.
+
+    Tool calls are written by the model as `<tool_call>` JSON inside its text (the "xml" mode,
+    parsed leniently), or use the provider's native function-calling fields ("native" mode).
+
+    Within a run, a call repeating the tool and arguments of an earlier call returns the earlier
+    observation without running the tool. A round that makes no progress (only repeated calls,
+    or neither a tool call nor a response) gets a nudge; after `max_stalls` such rounds in a row
+    the agent stops and answers with what it has.
+
+    Args:
+        tools (Tool | list[Tool]): The tools available to the agent.
+        model (str, optional): The model. Defaults to "llama-3.3-70b-versatile".
+        system_prompt (str, optional): Prepended to the ReAct system prompt.
+        client (optional): The LLM client. Defaults to a Groq client.
+        function_calling (str, optional): "xml" or "native". Defaults to "xml".
+        observation_policy (ObservationPolicy | None, optional): How the results of tools without
+            their own policy are put in the conversation. Defaults to None (in full).
+        artifact_store (ArtifactStore | None, optional): Where oversized results are kept. When a
+            policy is in use the agent gets a `read_artifact` tool over it. Defaults to a temporary store.
+        compaction (RollingSummary | None, optional): Summarizes older rounds of long runs. The system
+            prompt and the question are always kept. Defaults to None (the history grows with every round).
+
+    Attributes:
+        last_stop_reason (str | None): Why the last run stopped: STOP_ANSWERED, STOP_REPETITION,
+            STOP_NO_ACTION or STOP_MAX_ROUNDS.
+    """
 
     def __init__(
             self,
             tools : Tool | list[Tool],
             model: str = "llama-3.3-70b-versatile",
             system_prompt: str = BASE_SYSTEM_PROMPT,
+            client=None,
+            function_calling: str = XML,
+            observation_policy: ObservationPolicy | None = None,
+            artifact_store: ArtifactStore | None = None,
+            compaction: RollingSummary | None = None,
     ) -> None:
-        self.client = Groq()
+        if function_calling not in (XML, NATIVE):
+            raise ValueError(f"Unknown function calling mode '{function_calling}', expected 'xml' or 'native'")
+        self.client = client or Groq()
+        self.function_calling = function_calling
         self.model = model
         self.system_prompt = system_prompt
         self.tools = tools if isinstance(tools,list) else [tools]
+        self.compaction = compaction
+        self.observation_policy = observation_policy
+        self.artifact_store = artifact_store
+        if observation_policy is not None or any(tool.observation for tool in self.tools):
+            self.artifact_store = artifact_store or ArtifactStore()
+            self.tools = with_artifact_tool(self.tools, self.artifact_store)
         self.tools_dict = {tool.name: tool for tool in self.tools}
+        self.last_stop_reason: str | None = None
 
     def add_tool_signatures(self) -> str:
         return "".join([tool.fn_signature for tool in self.tools])
     
-    def process_tool_calls(self, tool_calls_content:list)-> dict:
+    def process_tool_calls(self, tool_calls_content:list, seen: dict | None = None)-> dict:
         observations={}
         for tool_call_str in tool_calls_content:
-            tool_call = json.loads(tool_call_str)
+            tool_call = loads_lenient(tool_call_str)
             tool_name = tool_call['name']
             tool = self.tools_dict[tool_name]
 
-            print(Fore.GREEN + f"\nUsing Tool: {tool_name}")
-
             # Validate and execute tool call
 
             validated_tool_call = validate_arguments(
                 tool_call, json.loads(tool.fn_signature) 
             )
-            print(Fore.GREEN + f"\nTool call dict: \n{validated_tool_call}")
-
-            result = tool.run(**validated_tool_call["arguments"])
-            print(Fore.GREEN + f"\nTool result: \n{result}")
+            result = self._run_tool(tool, validated_tool_call, seen)
 
             #Store the result using tool call id
             observations[validated_tool_call["id"]] = result
@@ -100,41 +180,199 @@ class ReactAgent:
             self,
             user_msg: str,
             max_rounds: int = 10,
+            max_stalls: int | None = 2,
     ) -> str:
-        
+        """
+        Answers the user's message, calling tools for at most `max_rounds` rounds.
+
+        Args:
+            user_msg (str): The user's message.
+            max_rounds (int, optional): The maximum number of rounds. Defaults to 10.
+            max_stalls (int | None, optional): The number of rounds in a row without progress after
+                which the agent stops and answers. Defaults to 2. None only nudges the model.
+
+        Returns:
+            str: The answer.
+        """
+        if self.function_calling == NATIVE and self.tools:
+            return self._run_native(user_msg, max_rounds, max_stalls)
+
         user_prompt = build_prompt_structure(user_msg,role="user",tag="question")
 
+        system_prompt = self.system_prompt
         if self.tools:
-            self.system_prompt += (
+            system_prompt += (
                 "\n" + REACT_SYSTEM_PROMPT % self.add_tool_signatures()
             )
         
         chat_history = ChatHistory([
-            build_prompt_structure(self.system_prompt,role="system"),
+            build_prompt_structure(system_prompt,role="system"),
             user_prompt,
-        ])
+        ], compaction=self._compaction())
 
+        seen = {}
+        stalls = 0
+        self.last_stop_reason = STOP_MAX_ROUNDS
         if self.tools:
-            for _ in range(max_rounds):
-
-                completion = completions_create(self.client, chat_history, self.model)
-
-                response = extract_tag_content(str(completion),"response")
-                if response.found:
-                    return response.content[0]
-                
-                thought = extract_tag_content(str(completion),"thought")
-                tool_calls = extract_tag_content(str(completion),"tool_call")
-
-                update_chat_history(chat_history, completion, "assistant")
-                if thought.found:
-                    print(Fore.MAGENTA + f"\n Thought: {thought.content[0]}")
-
-                if tool_calls.found:
-                    observations = self.process_tool_calls(tool_calls.content)
-                    print(Fore.BLUE + f"\n Observations \n{observations}")
-                    update_chat_history(chat_history, f"{observations}", "user")
-
-        return completions_create(self.client, chat_history, self.model)
-
-
+            for round in range(max_rounds):
+                events.emit(events.ROUND, events.DEBUG, round=round, max_rounds=max_rounds)
+
+                with span("react.round", round=round), metrics_context(round=round):
+                    completion = route_completion(
+                        self.client,
+                        chat_history,
+                        self.model,
+                        TOOL_SELECTION,
+                        validate=lambda output: _is_tool_round(output, self.tools_dict),
+                    )
+
+                    response = extract_tag_content(str(completion),"response")
+                    if response.found:
+                        self.last_stop_reason = STOP_ANSWERED
+                        if not answers_on_synthesis_route(TOOL_SELECTION, self.model):
+                            # Tool selection runs on a model final answers do not use, e.g. a small one.
+                            return self._answer(chat_history, round)
+                        return response.content[0]
+                    
+                    thought = extract_tag_content(str(completion),"thought")
+                    tool_calls = extract_tag_content(str(completion),"tool_call")
+
+                    update_chat_history(chat_history, completion, "assistant")
+                    if thought.found:
+                        events.emit(events.THOUGHT, thought=thought.content[0])
+
+                    stall = STOP_NO_ACTION
+                    if tool_calls.found:
+                        known = len(seen)
+                        observations = self.process_tool_calls(tool_calls.content, seen)
+                        events.emit(events.OBSERVATIONS, observations=observations)
+                        update_chat_history(chat_history, f"{observations}", "user")
+                        stall = STOP_REPETITION if len(seen) == known else None
+
+                    stalls = stalls + 1 if stall else 0
+                    if stall and max_stalls is not None and stalls >= max_stalls:
+                        return self._stop(chat_history, stall, round)
+                    if stall:
+                        events.emit(events.LOOP_DETECTED, round=round, reason=stall)
+                        update_chat_history(chat_history, NUDGE_PROMPTS[stall], "user")
+
+        return route_completion(self.client, chat_history, self.model, SYNTHESIS)
+
+    def _compaction(self) -> RollingSummary | None:
+        return self.compaction.bind(self.client, self.model) if self.compaction is not None else None
+
+    def _run_tool(self, tool: Tool, tool_call: dict, seen: dict | None):
+        """
+        Runs a validated tool call, or returns the observation of an identical earlier call in `seen`.
+        """
+        events.emit(events.TOOL_CALL, tool=tool.name, call=tool_call)
+        key = _call_key(tool.name, tool_call["arguments"])
+        if seen is not None and key in seen:
+            result = seen[key]
+            events.emit(events.TOOL_RESULT, events.DEBUG, tool=tool.name, result=result, repeated=True)
+            return result
+
+        result = tool.run(**tool_call["arguments"])
+        events.emit(events.TOOL_RESULT, tool=tool.name, result=result)
+        result = observe(tool, result, self.observation_policy, self.artifact_store)
+        if seen is not None:
+            seen[key] = result
+        return result
+
+    def _stop(self, messages: list, reason: str, round: int) -> str:
+        """
+        Ends a run that stopped making progress with one last completion answering from the observations.
+        """
+        self.last_stop_reason = reason
+        events.emit(
+            events.STOPPED,
+            message=f"{reason.upper()}..stopping ReAct loop after {round + 1} rounds",
+            reason=reason,
+            rounds=round + 1,
+        )
+        update_chat_history(messages, STOP_PROMPT, "user")
+        return self._answer(messages, round)
+
+    def _answer(self, messages: list, round: int) -> str:
+        """
+        Writes the final answer on the SYNTHESIS route.
+        """
+        with metrics_context(round=round + 1):
+            answer = route_completion(self.client, messages, self.model, SYNTHESIS)
+        response = extract_tag_content(str(answer), "response")
+        return response.content[0] if response.found else answer
+
+    def _run_native(self, user_msg: str, max_rounds: int, max_stalls: int | None) -> str:
+        """
+        Runs the loop with native function calling: tool calls and their results travel in the
+        `tool_calls` and `tool` message fields instead of the text.
+        """
+        messages = ChatHistory([
+            build_prompt_structure(self.system_prompt + NATIVE_SYSTEM_PROMPT, role="system"),
+            build_prompt_structure(user_msg, role="user"),
+        ], compaction=self._compaction())
+        schemas = [tool.schema() for tool in self.tools]
+        seen = {}
+        stalls = 0
+        self.last_stop_reason = STOP_MAX_ROUNDS
+
+        for round in range(max_rounds):
+            events.emit(events.ROUND, events.DEBUG, round=round, max_rounds=max_rounds)
+
+            with span("react.round", round=round), metrics_context(round=round):
+                message = function_calls_create(self.client, messages, self.model, schemas)
+                if not message.tool_calls:
+                    self.last_stop_reason = STOP_ANSWERED
+                    return message.content or ""
+
+                messages.append({
+                    "role": "assistant",
+                    "content": message.content or "",
+                    "tool_calls": [
+                        {
+                            "id": tool_call.id,
+                            "type": "function",
+                            "function": {"name": tool_call.function.name, "arguments": tool_call.function.arguments},
+                        }
+                        for tool_call in message.tool_calls
+                    ],
+                })
+                observations = {}
+                known = len(seen)
+                for tool_call in message.tool_calls:
+                    observations[tool_call.id] = self._run_native_tool_call(tool_call, seen)
+                    messages.append({
+                        "role": "tool",
+                        "tool_call_id": tool_call.id,
+                        "name": tool_call.function.name,
+                        "content": str(observations[tool_call.id]),
+                    })
+                events.emit(events.OBSERVATIONS, observations=observations)
+
+                stalls = stalls + 1 if len(seen) == known else 0
+                if stalls and max_stalls is not None and stalls >= max_stalls:
+                    return self._stop(messages, STOP_REPETITION, round)
+                if stalls:
+                    events.emit(events.LOOP_DETECTED, round=round, reason=STOP_REPETITION)
+                    update_chat_history(messages, NUDGE_PROMPTS[STOP_REPETITION], "user")
+
+        return route_completion(self.client, messages, self.model, SYNTHESIS)
+
+    def _run_native_tool_call(self, tool_call, seen: dict | None = None):
+        tool = self.tools_dict.get(tool_call.function.name)
+        if tool is None:
+            return f"Error: unknown tool '{tool_call.function.name}'"
+        try:
+            arguments = loads_lenient(tool_call.function.arguments or "{}")
+        except json.JSONDecodeError as e:
+            return f"Error: invalid arguments: {e}"
+
+        validated_tool_call = validate_arguments(
+            {"name": tool.name, "arguments": arguments, "id": tool_call.id}, json.loads(tool.fn_signature)
+        )
+        return self._run_tool(tool, validated_tool_call, seen)
+
+
+def _is_tool_round(output: str, tool_names) -> bool:
+    # Answers are left to the last model of the cascade, the one closest to the synthesis route.
+    return valid_tool_calls(output, tool_names) and extract_tag_content(str(output), "tool_call").found
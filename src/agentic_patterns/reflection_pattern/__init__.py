@@ -1 +1,3 @@
-from .reflection_agent import Reflection_Agent as ReflectionAgent
\ No newline at end of file
+from .reflection_agent import Reflection_Agent as ReflectionAgent
+from .scorers import HeuristicScorer
+from .scorers import LLMJudgeScorer
@@ -0,0 +1,83 @@
+import re
+from dataclasses import dataclass
+
+from ..utils.extraction import extract_tag_content
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass
+class Edit:
+    """
+    A localized change to a document: replace the first occurrence of `find` with `replace`.
+
+    Attributes:
+        find (str): The exact passage to replace.
+        replace (str): The new passage.
+    """
+
+    find: str
+    replace: str
+
+
+def parse_edits(text: str) -> list[Edit]:
+    """
+    Extracts the `<edit><find>...</find><replace>...</replace></edit>` blocks of a model output.
+
+    Args:
+        text (str): The model output.
+
+    Returns:
+        list[Edit]: The edits, in order. Blocks without a `<find>` passage are ignored.
+    """
+    edits = []
+    for block in extract_tag_content(text, "edit").content:
+        find = extract_tag_content(block, "find")
+        replace = re.search(r"<replace>(.*?)</replace>", block, re.DOTALL)
+        if find.found and find.content[0]:
+            edits.append(Edit(find=find.content[0], replace=replace.group(1).strip() if replace else ""))
+    return edits
+
+
+def apply_edits(document: str, edits: list[Edit]) -> tuple[str, list[Edit], list[Edit]]:
+    """
+    Applies edits to a document. A passage that is not found verbatim is matched again
+    ignoring differences in whitespace; if it is still not found the edit is skipped.
+
+    Args:
+        document (str): The document.
+        edits (list[Edit]): The edits to apply, in order.
+
+    Returns:
+        tuple[str, list[Edit], list[Edit]]: The new document, the applied edits and the skipped edits.
+    """
+    applied, skipped = [], []
+    for edit in edits:
+        start = document.find(edit.find)
+        end = start + len(edit.find)
+        if start == -1:
+            pattern = r"\s+".join(re.escape(word) for word in _WHITESPACE.split(edit.find.strip()))
+            match = re.search(pattern, document)
+            if match is None:
+                skipped.append(edit)
+                continue
+            start, end = match.span()
+        document = document[:start] + edit.replace + document[end:]
+        applied.append(edit)
+    return document, applied, skipped
+
+
+def format_edits(edits: list[Edit]) -> str:
+    """
+    Formats applied edits for the critic, as before/after pairs.
+
+    Args:
+        edits (list[Edit]): The applied edits.
+
+    Returns:
+        str: The revisions, one `<revision>` block per edit.
+    """
+    return "\n".join(
+        f"<revision>\n<before>\n{edit.find}\n</before>\n<after>\n{edit.replace}\n</after>\n</revision>"
+        for edit in edits
+    )
@@ -1,13 +1,28 @@
+import contextvars
+import difflib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from typing import TypeVar
+
 from dotenv import load_dotenv
 from groq import Groq
-from colorama import Fore
 
-from ..utils.completions import completions_create
 from ..utils.completions import build_prompt_structure
 
 from ..utils.completions import FixedFirstChatHistory
-from ..utils.logging import fancy_print
-from ..utils.logging import fancy_step_tracker
+from ..utils import events
+from ..utils.extraction import extract_tag_content
+from ..utils.metrics import collect_calls
+from ..utils.metrics import metrics_context
+from ..utils.routing import CRITIQUE
+from ..utils.routing import GENERATION
+from ..utils.routing import route_completion
+from ..utils.tracing import span
+from .patch import apply_edits
+from .patch import format_edits
+from .patch import parse_edits
+from .scorers import HeuristicScorer
+from .scorers import Scorer
 
 
 from ..utils.completions import update_chat_history
@@ -18,6 +33,9 @@ from ..utils.completions import update_chat_history
 
 load_dotenv()
 
+T = TypeVar("T")
+R = TypeVar("R")
+
 BASE_GENERATION_SYSTEM_PROMPT = """
 Your task is to Generate the best content possible for the user's request.
 If the user provides critique, respond with a revised version of your previous attempt.
@@ -30,6 +48,55 @@ If the user content has something wrong or something to be improved, output a li
 and critiques. If the user content is ok and there's nothing to change, output this: <OK>
 """
 
+SEVERITY_SYSTEM_PROMPT = """
+Start your answer with the overall severity of the remaining issues enclosed in <severity></severity> tags:
+none, minor or major.
+"""
+
+DIFF_REFLECTION_SYSTEM_PROMPT = """
+Quote every passage you criticise verbatim inside <quote></quote> tags, followed by your recommendation,
+so that it can be fixed with a localized edit.
+"""
+
+DIFF_GENERATION_SYSTEM_PROMPT = """
+Do not rewrite your previous answer. Fix the passages quoted in the critique with localized edits,
+one block per edit, where <find> holds the exact passage to replace:
+<edit><find>old passage</find><replace>new passage</replace></edit>
+Output only the edit blocks.
+"""
+
+DIFF_CRITIQUE_PROMPT = """
+Critique of your previous answer:
+
+%s
+"""
+
+DIFF_REWRITE_PROMPT = """
+Critique of your previous answer:
+
+%s
+
+Rewrite your previous answer in full, addressing the critique. Output only the new answer.
+"""
+DIFF_REVISION_PROMPT = """
+The following passages of the content you critiqued were revised:
+
+%s
+"""
+
+SEVERITY_LEVELS = {"none": 0, "minor": 1, "major": 2}
+
+STOP_ACCEPTED = "accepted"
+STOP_CONVERGED = "converged"
+STOP_SEVERITY = "severity"
+STOP_TOKEN_BUDGET = "token_budget"
+STOP_MAX_STEPS = "max_steps"
+
+# Makes the concurrent candidates differ, also when identical requests are coalesced or cached.
+CANDIDATE_SYSTEM_PROMPT = """
+You are writing candidate %d of %d: take your own approach to the request.
+"""
+
 class Reflection_Agent:
     """
     A class that implements a Reflection Agent, which generates responses and reflects
@@ -37,46 +104,52 @@ class Reflection_Agent:
     Attributes:
         model (str): The model name used for generating and reflecting on responses.
         client (Groq): An instance of the Groq client to interact with the language model.
+            Defaults to a new Groq client.
+        last_stop_reason (str | None): Why the last run stopped, e.g. "accepted" or "converged".
+        last_rounds (int): The number of rounds of the last run.
     """
 
-    def __init__(self, model: str = "llama-3.3-70b-versatile"):
-        self.client=Groq()
+    def __init__(self, model: str = "llama-3.3-70b-versatile", client=None):
+        self.client = client or Groq()
         self.model = model
+        self.last_stop_reason: str | None = None
+        self.last_rounds = 0
 
     def _request_completion(
             self,
             history:list,
             verbose:int=0,
-            log_title: str = "COMPLETION",
-            log_color : str = "",
+            event_type: str = events.GENERATION,
+            step: str = GENERATION,
     ):
         """
         A private method to request a completion from the Groq model.
 
         Args:
             history (list): A list of messages forming the conversation or reflection history.
-            verbose (int, optional): The verbosity level. Defaults to 0 (no output).
+            verbose (int, optional): The verbosity level. Defaults to 0 (events at DEBUG level only).
+            event_type (str, optional): The type of the event emitted with the output.
+            step (str, optional): The step type, used to pick the model when routing is configured.
 
         Returns:
             str: The model-generated response.
         """
 
-        output = completions_create(self.client, history,self.model)
+        output = route_completion(self.client, history, self.model, step)
 
-        if verbose>0:
-            print(log_color, f"\n\n{log_title}\n\n", output)
+        events.emit(event_type, _verbosity_level(verbose), output=output)
 
         return output
 
     def generate(self, generation_history: list, verbose:int=0) -> str:
 
         return self._request_completion(
-            generation_history, verbose, log_title="GENERATION", log_color=Fore.BLUE
+            generation_history, verbose, event_type=events.GENERATION
         )
     
     def reflect(self, reflection_history: list, verbose: int = 0) -> str:
         return self._request_completion(
-            reflection_history,verbose, log_title="REFLECTION", log_color=Fore.GREEN
+            reflection_history,verbose, event_type=events.REFLECTION, step=CRITIQUE
         ) 
 
     def run(
@@ -86,47 +159,259 @@ class Reflection_Agent:
             reflection_system_prompt: str= "",
             n_steps: int = 4,
             verbose: int = 0,
+            n_candidates: int = 1,
+            top_k: int = 1,
+            scorer: Scorer | None = None,
+            min_change: float | None = None,
+            stop_severity: str | None = None,
+            token_budget: int | None = None,
+            diff_mode: bool = False,
     ) -> str:
+        """
+        Generates a response and refines it with critiques for up to `n_steps` rounds.
+
+        With `n_candidates` > 1, the first round generates and critiques that many candidates
+        concurrently; they are ranked by `scorer` and only the `top_k` best are refined in the
+        next rounds, again concurrently.
+
+        The loop stops as soon as a critique contains `<OK>`, or one of the optional convergence
+        criteria fires: the best generation changed by less than `min_change` since the previous
+        round, the critic rated the remaining issues at most `stop_severity`, or another round
+        would exceed `token_budget`. The reason is stored in `last_stop_reason` and the number
+        of rounds in `last_rounds`.
+
+        In `diff_mode`, the critic quotes the passages it criticises and, after the first round,
+        the generator answers with localized edits that are applied to the document here. Later
+        rounds then send the critique and the revised passages instead of the whole document.
+
+        Args:
+            user_msg (str): The user's request.
+            generation_system_prompt (str, optional): Prepended to the generation system prompt.
+            reflection_system_prompt (str, optional): Prepended to the reflection system prompt.
+            n_steps (int, optional): The maximum number of rounds. Defaults to 4.
+            verbose (int, optional): The verbosity level. Defaults to 0.
+            n_candidates (int, optional): The number of candidates of the first round. Defaults to 1.
+            top_k (int, optional): The number of candidates kept after each round. Defaults to 1.
+            scorer (Scorer | None, optional): Ranks the candidates. Defaults to a HeuristicScorer.
+            min_change (float | None, optional): The minimum word-level edit distance, between 0
+                and 1, between consecutive generations. Defaults to None (not checked).
+            stop_severity (str | None, optional): "minor" to stop once the critic only reports
+                minor issues. The critic is then asked to rate its critique. Defaults to None.
+            token_budget (int | None, optional): The maximum prompt plus completion tokens of the run.
+                Defaults to None (no budget).
+            diff_mode (bool, optional): Whether later rounds exchange edits instead of whole documents.
+                Defaults to False.
+
+        Returns:
+            str: The best generation.
+        """
         generation_system_prompt += BASE_GENERATION_SYSTEM_PROMPT
         reflection_system_prompt += BASE_REFLECTION_SYSTEM_PROMPT
+        if stop_severity is not None:
+            if stop_severity not in SEVERITY_LEVELS:
+                raise ValueError(f"Unknown severity '{stop_severity}', expected one of {list(SEVERITY_LEVELS)}")
+            reflection_system_prompt += SEVERITY_SYSTEM_PROMPT
+        if diff_mode:
+            reflection_system_prompt += DIFF_REFLECTION_SYSTEM_PROMPT
+        scorer = scorer or HeuristicScorer()
+        self.last_stop_reason = STOP_MAX_STEPS
+        self.last_rounds = 0
+
+        n_candidates = max(1, n_candidates)
+        candidates = [
+            _Candidate(
+                generation_system_prompt
+                + (CANDIDATE_SYSTEM_PROMPT % (i + 1, n_candidates) if n_candidates > 1 else ""),
+                reflection_system_prompt,
+                user_msg,
+            )
+            for i in range(n_candidates)
+        ]
+
+        with collect_calls() as calls:
+            for step in range(n_steps):
+                events.emit(events.STEP, _verbosity_level(verbose), step=step, total_steps=n_steps)
+                spent_before = _tokens(calls)
+
+                with span("reflection.step", step=step, candidates=len(candidates)), metrics_context(round=step):
+                    _map(lambda candidate: self._refine(candidate, verbose, diff_mode), candidates)
+                    if len(candidates) > 1:
+                        scores = _map(
+                            lambda candidate: scorer(user_msg, candidate.generation, candidate.critique), candidates
+                        )
+                        for candidate, score in zip(candidates, scores):
+                            candidate.score = score
+                self.last_rounds = step + 1
 
-        generation_history = FixedFirstChatHistory(
+                candidates.sort(key=lambda candidate: candidate.score, reverse=True)
+                if any(candidate.accepted for candidate in candidates):
+                    candidates = [candidate for candidate in candidates if candidate.accepted]
+                    self.last_stop_reason = STOP_ACCEPTED
+                    events.emit(
+                        events.STOPPED,
+                        message="STOP SEQUENCE FOUND..stopping reflection loop",
+                        reason=STOP_ACCEPTED,
+                        rounds=self.last_rounds,
+                    ) 
+                    break
+                candidates = candidates[: max(1, top_k)]
+
+                best = candidates[0]
+                spent = _tokens(calls)
+                reason = None
+                if (
+                    min_change is not None
+                    and best.previous
+                    and edit_distance(best.previous, best.generation) < min_change
+                ):
+                    reason = STOP_CONVERGED
+                elif stop_severity is not None and _severity_rank(best.critique) <= SEVERITY_LEVELS[stop_severity]:
+                    reason = STOP_SEVERITY
+                elif token_budget is not None and spent + (spent - spent_before) > token_budget:
+                    reason = STOP_TOKEN_BUDGET
+                if reason is not None:
+                    self.last_stop_reason = reason
+                    events.emit(
+                        events.STOPPED,
+                        message=f"{reason.upper()}..stopping reflection loop after {self.last_rounds} rounds",
+                        reason=reason,
+                        rounds=self.last_rounds,
+                    )
+                    break
+
+        return candidates[0].generation
+
+    def _refine(self, candidate: "_Candidate", verbose: int = 0, diff_mode: bool = False) -> None:
+        """
+        Runs one generate-and-critique round of a candidate.
+        """
+        if diff_mode and candidate.generation:
+            self._refine_with_edits(candidate, verbose)
+            return
+
+        # GENERATE THE RESPONSE
+        candidate.previous = candidate.generation
+        candidate.generation = self.generate(candidate.generation_history, verbose=verbose)
+        update_chat_history(candidate.generation_history, candidate.generation, "assistant")
+        update_chat_history(candidate.reflection_history, candidate.generation, "user")
+
+        # REFLECT and CRITIQUE the generation
+        candidate.critique = self.reflect(candidate.reflection_history, verbose=verbose)
+        if candidate.accepted:
+            return
+
+        update_chat_history(candidate.generation_history, candidate.critique, "user")
+        update_chat_history(candidate.reflection_history, candidate.critique, "assistant")
+
+    def _refine_with_edits(self, candidate: "_Candidate", verbose: int = 0) -> None:
+        """
+        Runs one diff-mode round: the generator sees its document and the critique and answers
+        with edits, which are applied to the document, and the critic reviews the revised passages
+        only. When the reply holds no edit block, the generator is asked for a full rewrite instead:
+        free text is never taken for the document.
+        """
+        system_prompt = candidate.generation_history[0]["content"]
+        document = build_prompt_structure(candidate.generation, role="assistant")
+        output = self.generate(
+            [
+                build_prompt_structure(system_prompt + DIFF_GENERATION_SYSTEM_PROMPT, role="system"),
+                build_prompt_structure(candidate.user_msg, role="user"),
+                document,
+                build_prompt_structure(DIFF_CRITIQUE_PROMPT % candidate.critique, role="user"),
+            ],
+            verbose=verbose,
+        )
+        edits = parse_edits(output)
+        candidate.previous = candidate.generation
+        if edits:
+            candidate.generation, applied, _ = apply_edits(candidate.generation, edits)
+        else:
+            candidate.generation = self.generate(
+                [
+                    build_prompt_structure(system_prompt, role="system"),
+                    build_prompt_structure(candidate.user_msg, role="user"),
+                    document,
+                    build_prompt_structure(DIFF_REWRITE_PROMPT % candidate.critique, role="user"),
+                ],
+                verbose=verbose,
+            )
+            applied = []
+
+        if applied:
+            review = DIFF_REVISION_PROMPT % format_edits(applied)
+        else:
+            review = candidate.generation
+        candidate.critique = self.reflect(
+            [
+                candidate.reflection_history[0],
+                build_prompt_structure(review, role="user"),
+            ],
+            verbose=verbose,
+        )
+
+
+class _Candidate:
+    """
+    The generation and reflection histories of one candidate response.
+    """
+
+    def __init__(self, generation_system_prompt: str, reflection_system_prompt: str, user_msg: str):
+        self.user_msg = user_msg
+        self.generation_history = FixedFirstChatHistory(
             [
                 build_prompt_structure(generation_system_prompt,role="system"),
                 build_prompt_structure(user_msg, role="user"),
             ],total_length=3
         )
-
-        reflection_history = FixedFirstChatHistory(
+        self.reflection_history = FixedFirstChatHistory(
             [
                 build_prompt_structure(reflection_system_prompt, role="system"),
             ],total_length=3
         )
+        self.generation = ""
+        self.previous = ""
+        self.critique = ""
+        self.score = 0.0
+
+    @property
+    def accepted(self) -> bool:
+        return "<OK>" in self.critique
+
 
-        for step in range(n_steps):
-            if verbose > 0:
-                fancy_step_tracker(step, n_steps)
+def edit_distance(a: str, b: str) -> float:
+    """
+    The normalised word-level edit distance between two texts: 0.0 when they are identical,
+    1.0 when they share no words.
+    """
+    return 1.0 - difflib.SequenceMatcher(None, a.split(), b.split(), autojunk=False).ratio()
+
+
+def _severity_rank(critique: str) -> int:
+    """
+    Reads the severity the critic gave its critique. An unrated critique counts as major.
+    """
+    if "<OK>" in critique:
+        return SEVERITY_LEVELS["none"]
+    severity = extract_tag_content(critique, "severity")
+    if severity.found:
+        return SEVERITY_LEVELS.get(severity.content[0].lower(), SEVERITY_LEVELS["major"])
+    return SEVERITY_LEVELS["major"]
 
 
-            # GENERATE THE RESPONSE
-            generation = self.generate(generation_history,verbose=verbose)
-            update_chat_history(generation_history,generation,"assistant")
-            update_chat_history(reflection_history,generation, "user")
+def _tokens(calls: list) -> int:
+    return sum(call.prompt_tokens + call.completion_tokens for call in calls)
 
-            # REFLECT and CRITIQUE the generation
-            critique = self.reflect(reflection_history, verbose=verbose)
 
-            if "<OK>" in critique:
-                print(
-                    Fore.RED,
-                    "\n\n STOP SEQUENCE FOUND..stopping reflection loop \n\n",
-                ) 
-                break
-                
-            update_chat_history(generation_history,critique,"user")
-            update_chat_history(reflection_history,critique,"assistant")
-        
-        return generation
+def _map(fn: Callable[[T], R], items: list[T]) -> list[R]:
+    """
+    Applies `fn` to the items concurrently, in copies of the current context.
+    """
+    if len(items) == 1:
+        return [fn(items[0])]
+    with ThreadPoolExecutor(max_workers=len(items)) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, fn, item) for item in items]
+        return [future.result() for future in futures]
 
 
-        
\ No newline at end of file
+def _verbosity_level(verbose: int) -> int:
+    return events.INFO if verbose > 0 else events.DEBUG
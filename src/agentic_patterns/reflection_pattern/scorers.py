@@ -0,0 +1,79 @@
+import re
+from typing import Protocol
+
+from groq import Groq
+
+from ..utils.completions import build_prompt_structure
+from ..utils.completions import completions_create
+from ..utils.extraction import extract_tag_content
+
+JUDGE_SYSTEM_PROMPT = """
+You are an impartial judge. Rate how well the response fulfils the user's request, from 1 (useless)
+to 10 (perfect). Take the critique into account. Answer only with the score enclosed in <score></score> tags.
+"""
+
+JUDGE_USER_PROMPT = """
+<request>
+{request}
+</request>
+
+<response>
+{response}
+</response>
+
+<critique>
+{critique}
+</critique>
+"""
+
+_RECOMMENDATION_PATTERN = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+", re.MULTILINE)
+
+
+class Scorer(Protocol):
+    """
+    Ranks a candidate generation of a Reflection_Agent. Higher is better.
+    """
+
+    def __call__(self, request: str, generation: str, critique: str) -> float: ...
+
+
+class HeuristicScorer:
+    """
+    A cheap local scorer based on the critique: an accepted candidate (`<OK>`) gets 1.0,
+    otherwise the score decreases with the number of recommendations listed by the critic.
+    """
+
+    def __call__(self, request: str, generation: str, critique: str) -> float:
+        if "<OK>" in critique:
+            return 1.0
+        if not generation.strip():
+            return 0.0
+        recommendations = len(_RECOMMENDATION_PATTERN.findall(critique)) or 1
+        return 1.0 / (1 + recommendations)
+
+
+class LLMJudgeScorer:
+    """
+    Asks a model to grade each candidate from 1 to 10, normalised to [0, 1].
+
+    Args:
+        model (str, optional): The judge model. Defaults to "llama-3.1-8b-instant".
+        client (optional): The LLM client. Defaults to a Groq client.
+    """
+
+    def __init__(self, model: str = "llama-3.1-8b-instant", client=None):
+        self.client = client or Groq()
+        self.model = model
+
+    def __call__(self, request: str, generation: str, critique: str) -> float:
+        messages = [
+            build_prompt_structure(JUDGE_SYSTEM_PROMPT, role="system"),
+            build_prompt_structure(
+                JUDGE_USER_PROMPT.format(request=request, response=generation, critique=critique), role="user"
+            ),
+        ]
+        score = extract_tag_content(completions_create(self.client, messages, self.model), "score")
+        try:
+            return min(max(float(score.content[0]), 1.0), 10.0) / 10 if score.found else 0.0
+        except ValueError:
+            return 0.0
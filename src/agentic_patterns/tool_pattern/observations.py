@@ -0,0 +1,289 @@
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Any
+
+from agentic_patterns.tool_pattern.tool import get_fn_signature
+from agentic_patterns.tool_pattern.tool import Tool
+
+HEAD = "head"
+TAIL = "tail"
+HEAD_TAIL = "head_tail"
+
+READ_ARTIFACT = "read_artifact"
+
+# Characters per token, the same rough ratio the scheduler estimates with.
+_CHARS_PER_TOKEN = 4
+
+
+class ArtifactStore:
+    """
+    A local store for tool outputs too large to put in the conversation. Every payload is written
+    to a file named after its content hash, so identical outputs share one artifact, and is read
+    back page by page through the `read_artifact` tool.
+
+    Args:
+        directory (str | None, optional): Where artifacts are written. Defaults to a temporary
+            directory removed with the store.
+    """
+
+    def __init__(self, directory: str | None = None):
+        self._tmp = None
+        if directory is None:
+            self._tmp = tempfile.TemporaryDirectory(prefix="agentic-artifacts-")
+            directory = self._tmp.name
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+
+    def put(self, text: str) -> str:
+        """
+        Args:
+            text (str): The payload.
+
+        Returns:
+            str: The handle of the artifact.
+        """
+        handle = "art-" + hashlib.sha256(text.encode()).hexdigest()[:12]
+        path = self._path(handle)
+        if not os.path.exists(path):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return handle
+
+    def read(self, handle: str, offset: int = 0, length: int | None = None) -> str:
+        """
+        Args:
+            handle (str): The handle of the artifact.
+            offset (int, optional): The first character to read. Defaults to 0.
+            length (int | None, optional): The number of characters to read. Defaults to None (all).
+
+        Returns:
+            str: The requested slice of the artifact.
+
+        Raises:
+            KeyError: If there is no artifact with this handle.
+        """
+        text = self._load(handle)
+        return text[offset:] if length is None else text[offset : offset + length]
+
+    def size(self, handle: str) -> int:
+        """
+        Args:
+            handle (str): The handle of the artifact.
+
+        Returns:
+            int: The length of the artifact, in characters.
+
+        Raises:
+            KeyError: If there is no artifact with this handle.
+        """
+        return len(self._load(handle))
+
+    def _load(self, handle: str) -> str:
+        path = self._path(handle)
+        if not os.path.exists(path):
+            raise KeyError(handle)
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def _path(self, handle: str) -> str:
+        # Handles come from the model: keep them inside the store.
+        return os.path.join(self.directory, os.path.basename(handle) + ".txt")
+
+
+@dataclass
+class ObservationPolicy:
+    """
+    How a tool result is put in the conversation.
+
+    JSON results (Python dicts and lists, or strings holding JSON) are first reduced to the
+    selected `fields` and `max_items`. A result still longer than the limit is truncated, and the
+    full payload is kept in the artifact store behind a handle the model can page through with
+    the `read_artifact` tool.
+
+    Attributes:
+        max_chars (int | None): The maximum length of the observation. Defaults to 4000.
+        max_tokens (int | None): The maximum length in tokens, estimated from characters. Used
+            instead of `max_chars` when set. Defaults to None.
+        truncate (str): Which part of an oversized result is kept: HEAD, TAIL or HEAD_TAIL.
+            Defaults to HEAD_TAIL.
+        fields (list[str] | None): Dotted paths of the JSON fields to keep, e.g.
+            `["results.title", "results.url"]`; lists are traversed transparently. Defaults to None (all).
+        max_items (int | None): The maximum number of items kept in every JSON list. Defaults to None.
+        store (bool): Whether oversized results are kept in the artifact store. Defaults to True.
+    """
+
+    max_chars: int | None = 4000
+    max_tokens: int | None = None
+    truncate: str = HEAD_TAIL
+    fields: list[str] | None = None
+    max_items: int | None = None
+    store: bool = True
+
+    @property
+    def limit(self) -> int | None:
+        if self.max_tokens is not None:
+            return self.max_tokens * _CHARS_PER_TOKEN
+        return self.max_chars
+
+    def apply(self, result: Any, store: ArtifactStore | None = None) -> Any:
+        """
+        Args:
+            result (Any): The tool result.
+            store (ArtifactStore | None, optional): Where oversized results are kept. Defaults to None.
+
+        Returns:
+            Any: The observation: the result itself when it needs no change, otherwise a string.
+        """
+        value = _as_json(result)
+        reduced = value is not None and (self.fields or self.max_items is not None)
+        if reduced:
+            value = select_fields(value, self.fields, self.max_items)
+        text = json.dumps(value, default=str) if reduced else str(result)
+
+        limit = self.limit
+        if limit is None or len(text) <= limit:
+            return text if reduced else result
+
+        full = str(result) if not isinstance(result, (dict, list)) else json.dumps(result, default=str)
+        handle = store.put(full) if store is not None and self.store else None
+        return truncate(text, limit, self.truncate) + _artifact_note(len(text), limit, handle, len(full))
+
+
+def select_fields(value: Any, fields: list[str] | None = None, max_items: int | None = None) -> Any:
+    """
+    Reduces a JSON value to some fields and to the first items of its lists.
+
+    Args:
+        value (Any): The JSON value.
+        fields (list[str] | None, optional): Dotted paths of the fields to keep. Defaults to None (all).
+        max_items (int | None, optional): The maximum number of items of every list. Defaults to None.
+
+    Returns:
+        Any: The reduced value.
+    """
+    tree: dict = {}
+    for path in fields or []:
+        node = tree
+        for key in path.split("."):
+            node = node.setdefault(key, {})
+    return _select(value, tree, max_items)
+
+
+def _select(value: Any, tree: dict, max_items: int | None) -> Any:
+    if isinstance(value, list):
+        items = value if max_items is None else value[:max_items]
+        return [_select(item, tree, max_items) for item in items]
+    if isinstance(value, dict):
+        if not tree:
+            return {key: _select(item, tree, max_items) for key, item in value.items()}
+        return {key: _select(value[key], subtree, max_items) for key, subtree in tree.items() if key in value}
+    return value
+
+
+def truncate(text: str, limit: int, mode: str = HEAD_TAIL) -> str:
+    """
+    Args:
+        text (str): The text.
+        limit (int): The maximum number of characters kept.
+        mode (str, optional): HEAD, TAIL or HEAD_TAIL. Defaults to HEAD_TAIL.
+
+    Returns:
+        str: The kept part of the text, with a marker where text was cut.
+    """
+    if len(text) <= limit:
+        return text
+    if mode == HEAD:
+        return text[:limit] + " [...]"
+    if mode == TAIL:
+        return "[...] " + text[-limit:]
+    head = limit * 2 // 3
+    return text[:head] + " [...] " + text[len(text) - (limit - head) :]
+
+
+def read_artifact_tool(store: ArtifactStore, max_length: int = 4000) -> Tool:
+    """
+    Builds the `read_artifact` tool, through which the model pages through stored tool outputs.
+
+    Args:
+        store (ArtifactStore): The artifact store.
+        max_length (int, optional): The maximum number of characters returned per call. Defaults to 4000.
+
+    Returns:
+        Tool: The tool.
+    """
+
+    def read_artifact(handle: str, offset: int = 0, length: int = max_length) -> str:
+        """
+        Reads part of a tool output that was too large to show in full.
+
+        Args:
+            handle (str): The artifact handle given in the truncated observation.
+            offset (int): The first character to read.
+            length (int): The number of characters to read.
+        """
+        try:
+            size = store.size(handle)
+        except KeyError:
+            return f"Error: unknown artifact '{handle}'"
+        offset = max(0, offset)
+        length = max(1, min(length, max_length))
+        page = store.read(handle, offset, length)
+        end = offset + len(page)
+        more = f", continue with offset={end}" if end < size else ""
+        return f"{page}\n[characters {offset}-{end} of {size}{more}]"
+
+    return Tool(
+        name=READ_ARTIFACT,
+        fn=read_artifact,
+        fn_signature=json.dumps(get_fn_signature(read_artifact)),
+        # Pages are already bounded by `max_length`.
+        observation=ObservationPolicy(max_chars=None),
+    )
+
+
+def with_artifact_tool(tools: list[Tool], store: ArtifactStore) -> list[Tool]:
+    """
+    Returns:
+        list[Tool]: The tools, with the `read_artifact` tool of `store` added when missing.
+    """
+    if any(tool.name == READ_ARTIFACT for tool in tools):
+        return tools
+    return tools + [read_artifact_tool(store)]
+
+
+def observe(tool: Tool, result: Any, default: ObservationPolicy | None, store: ArtifactStore | None) -> Any:
+    """
+    Applies the observation policy of a tool, or the default policy, to one of its results.
+
+    Args:
+        tool (Tool): The tool.
+        result (Any): The result.
+        default (ObservationPolicy | None): The policy of tools without their own.
+        store (ArtifactStore | None): Where oversized results are kept.
+
+    Returns:
+        Any: The observation to put in the conversation.
+    """
+    policy = tool.observation or default
+    return result if policy is None else policy.apply(result, store)
+
+
+def _as_json(result: Any) -> Any:
+    if isinstance(result, (dict, list)):
+        return result
+    if isinstance(result, str) and result.lstrip()[:1] in ("{", "["):
+        try:
+            return json.loads(result)
+        except json.JSONDecodeError:
+            return None
+    return None
+
+
+def _artifact_note(length: int, limit: int, handle: str | None, full_length: int) -> str:
+    note = f"\n[truncated: showing {limit} of {length} characters"
+    if handle is None:
+        return note + "]"
+    return note + f"; the full output ({full_length} characters) is artifact '{handle}', read it with {READ_ARTIFACT}]"
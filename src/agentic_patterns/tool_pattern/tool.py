@@ -1,6 +1,19 @@
 import json
-from typing import Callable, get_origin, get_args, Union
+from typing import Callable, get_origin, get_args, Union, TYPE_CHECKING
 import inspect
+import time
+
+from agentic_patterns.utils.metrics import record_tool_call
+from agentic_patterns.utils.semantic_cache import get_semantic_cache
+from agentic_patterns.utils.tracing import span
+
+if TYPE_CHECKING:
+    from agentic_patterns.tool_pattern.observations import ObservationPolicy
+
+# How agents exchange tool calls with the model: `<tool_call>` tags in the text, or the
+# provider's native function-calling fields.
+XML = "xml"
+NATIVE = "native"
 
 
 # def get_fn_signature(fn: Callable) -> dict:
@@ -253,27 +266,77 @@ class Tool:
         name (str): The name of the tool (function).
         fn (Callable): The function that the tool represents.
         fn_signature (str): JSON string representation of the function's signature.
+        return_direct (bool): Whether the result of the tool is a final answer, which a ToolAgent
+            returns as is instead of having the model rephrase it.
+        observation (ObservationPolicy | None): How the results are put in the conversation, e.g.
+            truncated or reduced to some JSON fields. Defaults to the policy of the agent.
+        cacheable (bool): Whether the response cache may return an earlier result for the same
+            arguments instead of running the tool. Only set it for tools without side effects
+            whose results do not change over time. Defaults to False.
     """
 
-    def __init__(self, name: str, fn: Callable, fn_signature: str):
+    def __init__(
+        self,
+        name: str,
+        fn: Callable,
+        fn_signature: str,
+        return_direct: bool = False,
+        observation: "ObservationPolicy | None" = None,
+        cacheable: bool = False,
+    ):
         self.name = name
         self.fn = fn
         self.fn_signature = fn_signature
+        self.return_direct = return_direct
+        self.observation = observation
+        self.cacheable = cacheable
 
     def __str__(self):
         return self.fn_signature
 
+    def schema(self) -> dict:
+        """
+        Returns:
+            dict: The tool in the provider's native function-calling format.
+        """
+        return {"type": "function", "function": json.loads(self.fn_signature)}
+
     def run(self, **kwargs):
         """
         Executes the tool (function) with provided arguments.
 
+        For a cacheable tool, when a response cache is configured with tool caching, a call with
+        the same arguments as a previous call of the same tool returns the cached result.
+
         Args:
             **kwargs: Keyword arguments passed to the function.
 
         Returns:
             The result of the function call.
         """
-        return self.fn(**kwargs)
+        with span("tool.run", tool=self.name) as current:
+            start = time.perf_counter()
+            policy = get_semantic_cache()
+            if policy is not None and self.cacheable and policy.cache_tools and policy.enabled():
+                cached = policy.get_tool(self.name, kwargs)
+                if cached is not None:
+                    current.set_attribute("cache_hit", True)
+                    record_tool_call(self.name, time.perf_counter() - start, cache_hit=True)
+                    return cached
+            else:
+                policy = None
+
+            error = None
+            try:
+                result = self.fn(**kwargs)
+                if policy is not None and result is not None:
+                    policy.put_tool(self.name, kwargs, result)
+                return result
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                record_tool_call(self.name, time.perf_counter() - start, error)
 
 
 # def tool(fn: Callable):
@@ -295,21 +358,38 @@ class Tool:
 
 #     return wrapper()
 
-def tool(fn: Callable): # This part of the decorator is fine as it was in your last good version
+def tool(
+    fn: Callable | None = None,
+    *,
+    return_direct: bool = False,
+    observation: "ObservationPolicy | None" = None,
+    cacheable: bool = False,
+): # This part of the decorator is fine as it was in your last good version
     """
-    A decorator that wraps a function into a Tool object.
+    A decorator that wraps a function into a Tool object. Use it bare, `@tool`, or with
+    options, `@tool(return_direct=True)`.
 
     Args:
         fn (Callable): The function to be wrapped.
+        return_direct (bool, optional): Whether the result of the tool is a final answer. Defaults to False.
+        observation (ObservationPolicy | None, optional): How the results are put in the conversation.
+            Defaults to None (the policy of the agent).
+        cacheable (bool, optional): Whether the response cache may serve earlier results of the
+            tool. Defaults to False.
 
     Returns:
         Tool: A Tool object containing the function, its name, and its signature.
     """
+    if fn is None:
+        return lambda fn: tool(fn, return_direct=return_direct, observation=observation, cacheable=cacheable)
     # This was the version you had that created the Tool instance immediately
     # which is needed for the Agent class to receive a Tool object directly.
     fn_signature_dict = get_fn_signature(fn)
     return Tool(
         name=fn_signature_dict.get("name"),
         fn=fn,
-        fn_signature=json.dumps(fn_signature_dict)
+        fn_signature=json.dumps(fn_signature_dict),
+        return_direct=return_direct,
+        observation=observation,
+        cacheable=cacheable,
     )
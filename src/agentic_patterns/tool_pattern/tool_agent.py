@@ -1,12 +1,20 @@
 from dotenv import load_dotenv
 from groq import Groq
+import itertools
 import json
-from colorama import Fore
+import re
+from typing import Iterator
 
-from agentic_patterns.tool_pattern.tool import validate_arguements , Tool
+from agentic_patterns.tool_pattern.observations import ArtifactStore, ObservationPolicy, observe, with_artifact_tool
+from agentic_patterns.tool_pattern.tool import validate_arguments , Tool, NATIVE, XML
+from agentic_patterns.utils import events
 from agentic_patterns.utils.completions import build_prompt_structure
-from agentic_patterns.utils.completions import ChatHistory, update_chat_history , completions_create
+from agentic_patterns.utils.completions import ChatHistory, update_chat_history, function_calls_create
+from agentic_patterns.utils.json_repair import loads_lenient
 from agentic_patterns.utils.extraction import extract_tag_content
+from agentic_patterns.utils.metrics import metrics_context
+from agentic_patterns.utils.routing import answers_on_synthesis_route, route_completion, SYNTHESIS, TOOL_SELECTION, valid_tool_calls
+from agentic_patterns.utils.tracing import span
 
 
 
@@ -29,6 +37,17 @@ Here are the available tools:
 %s
 </tools>
 """
+
+CHAINED_TOOL_PROMPT = """
+You will be called again with the results of your function calls, and may then call further functions
+that need those results. Once you have everything you need, answer the user directly, without any
+function call.
+"""
+
+STOP_RETURN_DIRECT = "return_direct"
+
+_TOOL_CALL = re.compile(r"<tool_call>(.*?)</tool_call>", re.DOTALL)
+
 class ToolAgent:
     """
     The ToolAgent class represents an agent that can interact with a language model and use tools
@@ -40,16 +59,34 @@ class ToolAgent:
         model (str): The model to be used for generating tool calls and responses.
         client (Groq): The Groq client used to interact with the language model.
         tools_dict (dict): A dictionary mapping tool names to their corresponding Tool objects.
+        function_calling (str): "xml" to have the model write `<tool_call>` tags, "native" to use
+            the provider's function-calling fields.
+        observation_policy (ObservationPolicy | None): How the results of tools without their own
+            policy are put in the conversation.
+        artifact_store (ArtifactStore | None): Where oversized results are kept, read back through
+            the `read_artifact` tool the agent gets when a policy is in use.
     """
 
     def __init__(
             self,
             tools: Tool | list[Tool],
             model: str = "llama-3.3-70b-versatile",
+            client=None,
+            function_calling: str = XML,
+            observation_policy: ObservationPolicy | None = None,
+            artifact_store: ArtifactStore | None = None,
     ) -> None:
-        self.client = Groq()
+        if function_calling not in (XML, NATIVE):
+            raise ValueError(f"Unknown function calling mode '{function_calling}', expected 'xml' or 'native'")
+        self.client = client or Groq()
+        self.function_calling = function_calling
         self.model = model
         self.tools = tools if isinstance(tools,list) else [tools]
+        self.observation_policy = observation_policy
+        self.artifact_store = artifact_store
+        if observation_policy is not None or any(tool.observation for tool in self.tools):
+            self.artifact_store = artifact_store or ArtifactStore()
+            self.tools = with_artifact_tool(self.tools, self.artifact_store)
         self.tools_dict = {tool.name: tool for tool in self.tools}
 
     def add_tool_signature(self) -> str:
@@ -75,19 +112,19 @@ class ToolAgent:
         """
         observations = {}
         for tool_call_str in tool_calls_content:
-            tool_call = json.loads(tool_call_str)
+            tool_call = loads_lenient(tool_call_str)
             tool_name = tool_call["name"]
             tool = self.tools_dict[tool_name]
 
-            print(Fore.GREEN + f"\nUsing Tool: {tool_name}")
-
             #Validate and execute the tool call
-            validated_tool_call = validate_arguements(tool_call, json.loads(tool.fn_signature))
+            validated_tool_call = validate_arguments(tool_call, json.loads(tool.fn_signature))
 
-            print(Fore.GREEN + f"\nTool call dict: \n{validated_tool_call}")
+            events.emit(events.TOOL_CALL, tool=tool_name, call=validated_tool_call)
 
             result = tool.run(**validated_tool_call["arguments"])
-            print(Fore.GREEN + f"\nTool result: \n{result}")
+            events.emit(events.TOOL_RESULT, tool=tool_name, result=result)
+            if not tool.return_direct:
+                result = observe(tool, result, self.observation_policy, self.artifact_store)
 
             # Store the result using the tool call ID
             observations[validated_tool_call["id"]] = result
@@ -97,30 +134,151 @@ class ToolAgent:
     def run(
         self,
         user_msg:str,
+        max_rounds: int = 1,
     ):
+        """
+        Answers the user's message with the help of the tools.
+
+        The model selects tool calls, which are run, and a second completion turns the observations
+        into the answer. When every tool called in a round is `return_direct`, the results are the
+        answer and the second completion is skipped. With `max_rounds` above 1 the model sees the
+        observations and may chain further calls; a round without tool calls is then the answer.
+
+        Args:
+            user_msg (str): The user's message.
+            max_rounds (int, optional): The maximum number of tool-selection rounds. Defaults to 1.
+
+        Returns:
+            str: The answer.
+        """
         user_prompt = build_prompt_structure(user_msg, role="user")
 
+        if self.function_calling == NATIVE:
+            system_prompt = CHAINED_TOOL_PROMPT if max_rounds > 1 else None
+        else:
+            system_prompt = TOOL_SYSTEM_PROMPT % self.add_tool_signature()
+            if max_rounds > 1:
+                system_prompt += CHAINED_TOOL_PROMPT
         tool_chat_history = ChatHistory(
-            [
-                build_prompt_structure(TOOL_SYSTEM_PROMPT % self.add_tool_signature() ,role="system"),
-                user_prompt,
-            ]
+            ([build_prompt_structure(system_prompt, role="system")] if system_prompt else []) + [user_prompt]
         )
         agent_chat_history =  ChatHistory([user_prompt])
+        # Models restart their numbering every round: the agent numbers the calls of the whole run.
+        call_ids = itertools.count()
+
+        for round in range(max_rounds):
+            with span("tool_agent.round", round=round), metrics_context(round=round):
+                completion, tool_calls, assistant_message = self._select_tool_calls(tool_chat_history, call_ids)
+                if not tool_calls:
+                    # Answers of a tool-selection model final answers do not use are rewritten below.
+                    if max_rounds > 1 and answers_on_synthesis_route(TOOL_SELECTION, self.model):
+                        response = extract_tag_content(str(completion), "response")
+                        return response.content[0] if response.found else completion
+                    break
+
+                observations = self.process_tool_calls(tool_calls)
+                update_chat_history(
+                    agent_chat_history, f'"Observation: {observations}"',"user"
+                )
+                if all(self.tools_dict[loads_lenient(tool_call)["name"]].return_direct for tool_call in tool_calls):
+                    events.emit(
+                        events.STOPPED,
+                        events.DEBUG,
+                        message="RETURN_DIRECT..returning the tool results as the answer",
+                        reason=STOP_RETURN_DIRECT,
+                        rounds=round + 1,
+                    )
+                    return "\n".join(str(result) for result in observations.values())
+
+                tool_chat_history.append(assistant_message)
+                if self.function_calling == NATIVE:
+                    for id, result in observations.items():
+                        tool_chat_history.append({"role": "tool", "tool_call_id": id, "content": str(result)})
+                else:
+                    tool_chat_history.append(build_prompt_structure(f"{observations}", role="user", tag="observation"))
+
+        return route_completion(self.client, agent_chat_history, self.model, SYNTHESIS)
+
+    def _select_tool_calls(self, tool_chat_history: list, call_ids: Iterator[int]) -> tuple[str, list[str], dict]:
+        """
+        Requests a tool-selection completion.
 
-        tool_call_response = completions_create(
-            self.client, messages=tool_chat_history, model=self.model
+        Args:
+            tool_chat_history (list): The tool-selection conversation.
+            call_ids (Iterator[int]): The ids of the `<tool_call>` blocks, which replace those written
+                by the model so that observations of different rounds never share an id.
+
+        Returns:
+            tuple[str, list[str], dict]: The text of the completion, the tool calls as JSON strings
+            and the assistant message to append to the history.
+        """
+        if self.function_calling == NATIVE:
+            message = function_calls_create(
+                self.client, tool_chat_history, self.model, [tool.schema() for tool in self.tools]
+            )
+            tool_calls = message.tool_calls or []
+            return (
+                message.content or "",
+                [
+                    json.dumps({
+                        "name": tool_call.function.name,
+                        "arguments": loads_lenient(tool_call.function.arguments or "{}"),
+                        "id": tool_call.id,
+                    })
+                    for tool_call in tool_calls
+                ],
+                {
+                    "role": "assistant",
+                    "content": message.content or "",
+                    "tool_calls": [
+                        {
+                            "id": tool_call.id,
+                            "type": "function",
+                            "function": {"name": tool_call.function.name, "arguments": tool_call.function.arguments},
+                        }
+                        for tool_call in tool_calls
+                    ],
+                },
+            )
+
+        completion = route_completion(
+            self.client,
+            tool_chat_history,
+            self.model,
+            TOOL_SELECTION,
+            validate=lambda output: _is_tool_selection(output, self.tools_dict),
         )
+        completion, tool_calls = _renumber_tool_calls(str(completion), call_ids)
+        return completion, tool_calls, build_prompt_structure(completion, role="assistant")
 
-        tool_calls = extract_tag_content(str(tool_call_response), "tool_call")
 
-        if tool_calls.found:
-            observations = self.process_tool_calls(tool_calls.content)
-            update_chat_history(
-                agent_chat_history, f'"Observation: {observations}"',"user"
-            )
+def _renumber_tool_calls(completion: str, call_ids: Iterator[int]) -> tuple[str, list[str]]:
+    """
+    Gives every `<tool_call>` block of a completion the next id of `call_ids`.
+
+    Returns:
+        tuple[str, list[str]]: The completion with the new ids, as kept in the history, and its
+        tool calls as JSON strings.
+    """
+    tool_calls = []
+
+    def renumber(match: re.Match) -> str:
+        try:
+            tool_call = loads_lenient(match.group(1).strip())
+        except json.JSONDecodeError:
+            tool_calls.append(match.group(1).strip())
+            return match.group(0)
+        if isinstance(tool_call, dict):
+            tool_call["id"] = next(call_ids)
+        tool_calls.append(json.dumps(tool_call))
+        return f"<tool_call>{tool_calls[-1]}</tool_call>"
+
+    return _TOOL_CALL.sub(renumber, completion), tool_calls
+
 
-        return completions_create(self.client, agent_chat_history, self.model)
+def _is_tool_selection(output: str, tool_names) -> bool:
+    # Without tool calls the ToolAgent answers in the second completion, so plain text is valid.
+    return "<tool_call>" not in str(output) or valid_tool_calls(output, tool_names)
 
 
 
@@ -0,0 +1,154 @@
+import contextvars
+import json
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from dataclasses import field
+from dataclasses import replace
+
+from agentic_patterns.utils import events
+from agentic_patterns.utils.routing import route_completion
+from agentic_patterns.utils.routing import SUMMARY
+from agentic_patterns.utils.scheduler import estimate_tokens
+from agentic_patterns.utils.tracing import span
+
+SUMMARY_SYSTEM_PROMPT = """
+You compact the transcript of an agent working on a task. Summarize it in a few sentences, keeping every
+fact, tool result, number and decision needed to continue the task, and dropping reasoning that led nowhere.
+If the transcript starts with an earlier summary, merge it into yours. Output only the summary.
+"""
+
+SUMMARY_MESSAGE = """
+Summary of the earlier rounds of this conversation, written to save space. It is a record of what
+happened, not a new request from the user:
+<summary>%s</summary>
+"""
+
+# Compactions run off the agent's thread, one at a time per history.
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="compaction")
+
+
+@dataclass
+class RollingSummary:
+    """
+    A compaction strategy for ChatHistory: when the history passes `max_tokens`, the turns
+    between the pinned leading messages and the `keep_last` most recent ones are replaced by a
+    model-written summary. Every new summary folds in the previous one, so the history stays
+    bounded however many rounds the conversation runs.
+
+    With `background` the summary is computed on another thread while the agent goes on, and
+    spliced in at the first append after it is ready, so compaction never delays a round.
+
+    The summary replaces the turns as a system message that says what it is, so the model does
+    not take it for a user request. After a failed summary the next attempt waits for
+    `retry_after` more messages, twice as many after every consecutive failure.
+
+    One instance holds the state of one history; agents use `bind` to get a fresh instance per run.
+
+    Attributes:
+        max_tokens (int): The estimated size of the history that triggers a compaction. Defaults to 4000.
+        keep_first (int): The leading messages kept verbatim, e.g. the system prompt and the
+            original question. Defaults to 2.
+        keep_last (int): The most recent messages kept verbatim. Defaults to 4.
+        background (bool): Whether summaries are computed without blocking. Defaults to True.
+        client: The LLM client of the summaries. Defaults to the agent's.
+        model (str | None): The model of the summaries, unless routing sends SUMMARY steps
+            elsewhere. Defaults to the agent's.
+        retry_after (int): The messages appended after a failed summary before the next attempt.
+            Defaults to 4.
+    """
+
+    max_tokens: int = 4000
+    keep_first: int = 2
+    keep_last: int = 4
+    background: bool = True
+    client: object = None
+    model: str | None = None
+    retry_after: int = 4
+    _pending: Future | None = field(default=None, init=False, repr=False)
+    _replaced: list = field(default_factory=list, init=False, repr=False)
+    _failures: int = field(default=0, init=False, repr=False)
+    _retry_at: int = field(default=0, init=False, repr=False)
+
+    def bind(self, client, model: str) -> "RollingSummary":
+        """
+        Args:
+            client: The LLM client of the agent.
+            model (str): The model of the agent.
+
+        Returns:
+            RollingSummary: A fresh instance with the same settings, defaulting to this client and model.
+        """
+        return replace(self, client=self.client or client, model=self.model or model)
+
+    def update(self, history: list) -> None:
+        """
+        Called after every append: splices in a finished summary, and starts a new one when the
+        history is too large.
+
+        Args:
+            history (list): The messages.
+        """
+        if self._pending is not None and self._pending.done():
+            self._splice(history)
+        if self._pending is None and len(history) >= self._retry_at and estimate_tokens(history) > self.max_tokens:
+            self._start(history)
+            if not self.background and self._pending is not None:
+                self._pending.exception()
+                self._splice(history)
+
+    def _start(self, history: list) -> None:
+        end = len(history) - self.keep_last
+        # A native tool result must stay right after the assistant message that called the tool.
+        while end > self.keep_first and history[end].get("role") == "tool":
+            end -= 1
+        if end - self.keep_first < 2:
+            return
+        self._replaced = list(history[self.keep_first : end])
+        self._pending = _executor.submit(contextvars.copy_context().run, self._summarize, self._replaced)
+
+    def _summarize(self, messages: list) -> str:
+        with span("history.compact", messages=len(messages)):
+            return route_completion(
+                self.client,
+                [
+                    {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                    {"role": "user", "content": _transcript(messages)},
+                ],
+                self.model,
+                SUMMARY,
+            )
+
+    def _splice(self, history: list) -> None:
+        future, replaced = self._pending, self._replaced
+        self._pending, self._replaced = None, []
+        if future.exception() is not None:
+            self._failures += 1
+            retry_after = self.retry_after * 2 ** (self._failures - 1)
+            self._retry_at = len(history) + retry_after
+            events.emit(events.COMPACTED, events.WARNING, error=str(future.exception()), retry_after=retry_after)
+            return
+        self._failures, self._retry_at = 0, 0
+        start, end = self.keep_first, self.keep_first + len(replaced)
+        # The history may have been trimmed meanwhile: only splice over the exact messages summarized.
+        if len(history) < end or any(a is not b for a, b in zip(history[start:end], replaced)):
+            return
+        before = estimate_tokens(history)
+        history[start:end] = [{"role": "system", "content": SUMMARY_MESSAGE % future.result()}]
+        events.emit(
+            events.COMPACTED,
+            events.DEBUG,
+            messages=len(replaced),
+            tokens_before=before,
+            tokens_after=estimate_tokens(history),
+        )
+
+
+def _transcript(messages: list) -> str:
+    lines = []
+    for message in messages:
+        line = f"{message.get('role')}: {message.get('content') or ''}"
+        if message.get("tool_calls"):
+            line += f"\ntool calls: {json.dumps([call['function'] for call in message['tool_calls']])}"
+        lines.append(line)
+    return "\n\n".join(lines)
@@ -1,7 +1,141 @@
+import json
+import time
+
+from agentic_patterns.utils.metrics import record_completion
+from agentic_patterns.utils.metrics import record_failure
+from agentic_patterns.utils.resilience import get_resilience
+from agentic_patterns.utils.scheduler import estimate_tokens
+from agentic_patterns.utils.scheduler import get_scheduler
+from agentic_patterns.utils.semantic_cache import get_semantic_cache
+from agentic_patterns.utils.singleflight import get_single_flight
+from agentic_patterns.utils.singleflight import request_key
+from agentic_patterns.utils.tracing import span
+
+
 def completions_create(client, messages: list, model:str) -> str:
-    response = client.chat.completions.create(messages=messages, model=model)
+    """
+    Requests a chat completion and records its latency and token usage.
+
+    When a scheduler is configured with `configure_scheduler`, the call first waits for
+    a slot within the rate limits of the model. When a resilience layer is configured with
+    `configure_resilience`, transient errors are retried and slow calls may be hedged.
+    When `configure_single_flight` was called, a request identical to one already in flight
+    waits for that one's result instead of being sent; it is recorded as a cache hit.
+    With `configure_semantic_cache`, a request identical to a previous one is answered from
+    the cache, or a similar enough one for agents opted in to fuzzy matching.
+
+    Args:
+        client: The LLM client, e.g. a Groq instance.
+        messages (list): The messages to send.
+        model (str): The model name.
+
+    Returns:
+        str: The content of the first choice.
+    """
+    with span("llm.completion", model=model, messages=len(messages)) as current:
+        policy = get_semantic_cache()
+        if policy is not None and policy.enabled():
+            start = time.perf_counter()
+            content = policy.get_completion(model, messages)
+            if content is not None:
+                record_completion(model, None, time.perf_counter() - start, cache_hit=True)
+                current.set_attribute("cache_hit", True)
+                return content
+            content = _coalesced(client, messages, model, current)
+            policy.put_completion(model, messages, content)
+            return content
+        return _coalesced(client, messages, model, current)
+
+def _coalesced(client, messages: list, model: str, current) -> str:
+    """
+    Sends the request, unless an identical one is in flight and single-flight is enabled.
+    """
+    single_flight = get_single_flight()
+    if single_flight is None:
+        return _complete(client, messages, model, current)
+
+    start = time.perf_counter()
+    content, shared = single_flight.do(
+        request_key(model, messages), lambda: _complete(client, messages, model, current)
+    )
+    if shared:
+        record_completion(model, None, time.perf_counter() - start, cache_hit=True)
+        current.set_attribute("coalesced", True)
+    return content
+
+def _complete(client, messages: list, model: str, current) -> str:
+    """
+    Sends the request through the resilience layer, if any, and returns the content.
+    """
+    resilience = get_resilience()
+    if resilience is None:
+        response, call = _send(client, messages, model)
+    else:
+        client = _without_sdk_retries(client)
+        response, call = resilience.call(model, lambda: _send(client, messages, model))
+    current.set_attribute("prompt_tokens", call.prompt_tokens)
+    current.set_attribute("completion_tokens", call.completion_tokens)
+    current.set_attribute("scheduler_wait", call.scheduler_wait)
     return str(response.choices[0].message.content)
 
+def function_calls_create(client, messages: list, model: str, tools: list[dict]):
+    """
+    Requests a chat completion using the provider's native function calling.
+
+    The call goes through the scheduler and the resilience layer like `completions_create`,
+    but not through request coalescing or the semantic cache, which only store text.
+
+    Args:
+        client: The LLM client, e.g. a Groq instance.
+        messages (list): The messages to send.
+        model (str): The model name.
+        tools (list[dict]): The tool schemas, see `Tool.schema`.
+
+    Returns:
+        The message of the first choice, with its `content` and `tool_calls`.
+    """
+    with span("llm.completion", model=model, messages=len(messages), tools=len(tools)) as current:
+        resilience = get_resilience()
+        if resilience is None:
+            response, call = _send(client, messages, model, tools=tools)
+        else:
+            client = _without_sdk_retries(client)
+            response, call = resilience.call(model, lambda: _send(client, messages, model, tools=tools))
+        current.set_attribute("prompt_tokens", call.prompt_tokens)
+        current.set_attribute("completion_tokens", call.completion_tokens)
+        current.set_attribute("scheduler_wait", call.scheduler_wait)
+    return response.choices[0].message
+
+def _without_sdk_retries(client):
+    """
+    Returns the client with the SDK's own retries disabled, which would otherwise multiply the
+    attempts of the resilience layer and hide their latency from hedging.
+    """
+    with_options = getattr(client, "with_options", None)
+    return with_options(max_retries=0) if with_options is not None else client
+
+def _send(client, messages: list, model: str, **kwargs):
+    """
+    Sends one request to the provider, within the scheduler limits, and records it.
+    """
+    scheduler = get_scheduler()
+    ticket = None
+    if scheduler is not None:
+        tokens = estimate_tokens(messages) + (len(json.dumps(kwargs, default=str)) // 4 if kwargs else 0)
+        ticket = scheduler.acquire(model, tokens)
+    start = time.perf_counter()
+    try:
+        response = client.chat.completions.create(messages=messages, model=model, **kwargs)
+    except Exception as e:
+        record_failure(model, e, time.perf_counter() - start)
+        raise
+    call = record_completion(
+        model, response, time.perf_counter() - start, scheduler_wait=ticket.waited if ticket else 0.0
+    )
+    if ticket is not None:
+        scheduler.release(ticket, call.prompt_tokens + call.completion_tokens or None)
+    return response, call
+
 def build_prompt_structure(prompt: str, role: str, tag: str="") -> dict:
     if tag:
         prompt=f"<{tag}>{prompt}<{tag}>"
@@ -15,35 +149,40 @@ def update_chat_history(history:list, msg: str, role: str):
 
 class ChatHistory(list):
 
-    def __init__(self, messages: list | None , total_length: int = -1):
+    def __init__(self, messages: list | None , total_length: int = -1, compaction=None):
         """Initialise the queue with a fixed total length.
 
         Args:
             messages (list | None): A list of initial messages
             total_length (int): The maximum number of messages the chat history can hold.
+            compaction (RollingSummary | None): Compacts the history when it grows too large.
         """
         if messages is None:
             messages=[]
         
         super().__init__(messages)
         self.total_length = total_length
+        self.compaction = compaction
 
     def append(self, msg:str):
         # add message to the queue
         if len(self) == self.total_length:
             self.pop(0)
         super().append(msg)
+        if self.compaction is not None:
+            self.compaction.update(self)
         
 class FixedFirstChatHistory(ChatHistory):
 
-    def __init__(self, messages: list | None = None, total_length: int = -1):
+    def __init__(self, messages: list | None = None, total_length: int = -1, compaction=None):
         """Initialise the queue with a fixed total length.
 
         Args:
             messages (list | None): A list of initial messages
             total_length (int): The maximum number of messages the chat history can hold.
+            compaction (RollingSummary | None): Compacts the history when it grows too large.
         """
-        super().__init__(messages,total_length)
+        super().__init__(messages,total_length,compaction)
 
     def append(self, msg:str):
         """
@@ -0,0 +1,297 @@
+import atexit
+import json
+import queue
+import threading
+import time
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Callable
+
+from colorama import Fore
+from colorama import Style
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+
+RUN_STARTED = "run_started"
+RUN_FINISHED = "run_finished"
+AGENT_STARTED = "agent_started"
+AGENT_SKIPPED = "agent_skipped"
+AGENT_FINISHED = "agent_finished"
+ROUND = "round"
+THOUGHT = "thought"
+TOOL_CALL = "tool_call"
+TOOL_RESULT = "tool_result"
+OBSERVATIONS = "observations"
+STEP = "step"
+GENERATION = "generation"
+REFLECTION = "reflection"
+STOPPED = "stopped"
+METRICS_SUMMARY = "metrics_summary"
+PROFILE = "profile"
+RETRY = "retry"
+HEDGE = "hedge"
+CIRCUIT_OPEN = "circuit_open"
+ESCALATED = "escalated"
+PLAN = "plan"
+LOOP_DETECTED = "loop_detected"
+COMPACTED = "compacted"
+
+
+@dataclass
+class Event:
+    """
+    A structured event emitted by agents and crews.
+
+    Attributes:
+        type (str): The event type, e.g. "tool_call" or "agent_finished".
+        payload (dict): The event data.
+        level (int): The verbosity level of the event (DEBUG, INFO or WARNING).
+        timestamp (float): The wall-clock time the event was emitted at.
+        thread (str): The name of the emitting thread.
+    """
+
+    type: str
+    payload: dict = field(default_factory=dict)
+    level: int = INFO
+    timestamp: float = field(default_factory=time.time)
+    thread: str = field(default_factory=lambda: threading.current_thread().name)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class ConsoleSink:
+    """
+    Pretty-prints events to stdout with colors, in the style of the original console output.
+
+    Args:
+        level (int, optional): The minimum level printed by this sink. Defaults to INFO.
+    """
+
+    def __init__(self, level: int = INFO):
+        self.level = level
+
+    def __call__(self, event: Event) -> None:
+        if event.level < self.level:
+            return
+        formatter = _CONSOLE_FORMATTERS.get(event.type)
+        if formatter is None:
+            print(f"[{event.type}] {event.payload}")
+        else:
+            print(formatter(event.payload))
+
+
+class JSONLSink:
+    """
+    Appends every event as one JSON line to a file.
+
+    Args:
+        path (str): The path of the file.
+        level (int, optional): The minimum level written by this sink. Defaults to DEBUG.
+    """
+
+    def __init__(self, path: str, level: int = DEBUG):
+        self.path = path
+        self.level = level
+        self._file = open(path, mode="a", encoding="utf-8")
+
+    def __call__(self, event: Event) -> None:
+        if event.level < self.level:
+            return
+        self._file.write(json.dumps(event.to_dict(), default=str) + "\n")
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class QueueSink:
+    """
+    Collects events into an in-memory queue, e.g. to stream them to a UI or inspect them in tests.
+
+    Args:
+        maxsize (int, optional): The capacity of the queue. Events are dropped when it is full.
+            Defaults to 0 (unbounded).
+        level (int, optional): The minimum level kept by this sink. Defaults to DEBUG.
+    """
+
+    def __init__(self, maxsize: int = 0, level: int = DEBUG):
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.level = level
+
+    def __call__(self, event: Event) -> None:
+        if event.level < self.level:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            pass
+
+    def drain(self) -> list[Event]:
+        """
+        Returns:
+            list[Event]: All the events collected so far, removing them from the queue.
+        """
+        events = []
+        while True:
+            try:
+                events.append(self.queue.get_nowait())
+            except queue.Empty:
+                return events
+
+
+class EventBus:
+    """
+    Dispatches events to sinks from a background thread.
+
+    `emit` only enqueues the event, so the agent never blocks on slow sinks such as the
+    console or a file. Events below `level` are dropped before they are even built.
+
+    Args:
+        sinks (list[Callable[[Event], None]] | None, optional): The sinks. Defaults to a ConsoleSink.
+        level (int, optional): The minimum level of the emitted events. Defaults to INFO.
+    """
+
+    def __init__(self, sinks: list[Callable[[Event], None]] | None = None, level: int = INFO):
+        self.sinks = list(sinks) if sinks is not None else [ConsoleSink()]
+        self.level = level
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def enabled_for(self, level: int) -> bool:
+        return level >= self.level and bool(self.sinks)
+
+    def emit(self, type: str, level: int = INFO, **payload: Any) -> None:
+        """
+        Emits an event.
+
+        Args:
+            type (str): The event type.
+            level (int, optional): The verbosity level. Defaults to INFO.
+            **payload: The event data.
+        """
+        if not self.enabled_for(level):
+            return
+        self._ensure_thread()
+        self._queue.put(Event(type=type, payload=payload, level=level))
+
+    def flush(self) -> None:
+        """
+        Blocks until every emitted event has been handed to the sinks.
+        """
+        if self._thread is not None:
+            self._queue.join()
+        for sink in self.sinks:
+            if hasattr(sink, "flush"):
+                sink.flush()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch, name="event-bus", daemon=True)
+                self._thread.start()
+
+    def _dispatch(self) -> None:
+        while True:
+            event = self._queue.get()
+            try:
+                for sink in self.sinks:
+                    try:
+                        sink(event)
+                    except Exception:
+                        pass
+            finally:
+                self._queue.task_done()
+
+
+_event_bus = EventBus()
+atexit.register(lambda: _event_bus.flush())
+
+
+def get_event_bus() -> EventBus:
+    """
+    Returns:
+        EventBus: The process-wide event bus.
+    """
+    return _event_bus
+
+
+def configure_events(sinks: list[Callable[[Event], None]] | None = None, level: int = INFO) -> EventBus:
+    """
+    Replaces the sinks and the level of the process-wide event bus.
+
+    Args:
+        sinks (list[Callable[[Event], None]] | None, optional): The new sinks. Defaults to a ConsoleSink.
+            Pass an empty list to silence all events.
+        level (int, optional): The minimum level of the emitted events. Defaults to INFO.
+
+    Returns:
+        EventBus: The process-wide event bus.
+    """
+    _event_bus.flush()
+    _event_bus.sinks = list(sinks) if sinks is not None else [ConsoleSink()]
+    _event_bus.level = level
+    return _event_bus
+
+
+def emit(type: str, level: int = INFO, **payload: Any) -> None:
+    """
+    Emits an event on the process-wide event bus.
+
+    Args:
+        type (str): The event type.
+        level (int, optional): The verbosity level. Defaults to INFO.
+        **payload: The event data.
+    """
+    _event_bus.emit(type, level, **payload)
+
+
+def _banner(message: str) -> str:
+    return (
+        Style.BRIGHT + Fore.CYAN + f"\n{'=' * 50}\n"
+        + Fore.MAGENTA + f"{message}\n"
+        + Style.BRIGHT + Fore.CYAN + f"{'=' * 50}\n"
+    )
+
+
+_CONSOLE_FORMATTERS: dict[str, Callable[[dict], str]] = {
+    RUN_STARTED: lambda p: _banner(f"RUNNING CREW: {p.get('agents', 0)} agents"),
+    RUN_FINISHED: lambda p: _banner(f"CREW FINISHED in {p.get('elapsed', 0):.2f}s"),
+    AGENT_STARTED: lambda p: _banner(f"RUNNING AGENT: {p.get('agent')}"),
+    AGENT_SKIPPED: lambda p: _banner(f"SKIPPING AGENT: {p.get('agent')}"),
+    AGENT_FINISHED: lambda p: Fore.RED + f"{p.get('output')}",
+    ROUND: lambda p: Fore.CYAN + f"\nRound {p.get('round', 0) + 1}/{p.get('max_rounds')}",
+    THOUGHT: lambda p: Fore.MAGENTA + f"\n Thought: {p.get('thought')}",
+    TOOL_CALL: lambda p: Fore.GREEN + f"\nUsing Tool: {p.get('tool')}\n\nTool call dict: \n{p.get('call')}",
+    TOOL_RESULT: lambda p: Fore.GREEN + f"\nTool result: \n{p.get('result')}",
+    OBSERVATIONS: lambda p: Fore.BLUE + f"\n Observations \n{p.get('observations')}",
+    STEP: lambda p: _banner(f"STEP {p.get('step', 0) + 1}/{p.get('total_steps')}"),
+    GENERATION: lambda p: Fore.BLUE + f"\n\nGENERATION\n\n {p.get('output')}",
+    REFLECTION: lambda p: Fore.GREEN + f"\n\nREFLECTION\n\n {p.get('output')}",
+    STOPPED: lambda p: Fore.RED + f"\n\n {p.get('message')} \n\n",
+    METRICS_SUMMARY: lambda p: Fore.YELLOW + f"\nLLM usage:\n{p.get('report')}\n",
+    PROFILE: lambda p: Fore.YELLOW + f"\nProfile:\n{p.get('report')}\n",
+    RETRY: lambda p: Fore.YELLOW + f"\nRetrying {p.get('model')} in {p.get('delay', 0):.2f}s "
+    f"(attempt {p.get('attempt')}): {p.get('error')}",
+    HEDGE: lambda p: Fore.YELLOW + f"\nHedging {p.get('model')} after {p.get('delay', 0):.2f}s",
+    CIRCUIT_OPEN: lambda p: Fore.RED + f"\nCircuit open for {p.get('model')} "
+    f"after {p.get('failures')} failures",
+    PLAN: lambda p: Fore.MAGENTA + "\nPlan:\n" + "\n".join(
+        f"  {s['id']}: {s['name']}({s['arguments']})" for s in p.get("steps", [])
+    ),
+    ESCALATED: lambda p: Fore.YELLOW + f"\nEscalating {p.get('step')} from {p.get('model')} to {p.get('next_model')}",
+    COMPACTED: lambda p: Fore.YELLOW + (
+        f"\nCompaction failed: {p['error']}, retrying after {p.get('retry_after')} messages" if "error" in p
+        else f"\nCompacted {p.get('messages')} messages: {p.get('tokens_before')} -> {p.get('tokens_after')} tokens"
+    ),
+    LOOP_DETECTED: lambda p: Fore.YELLOW + f"\nNo progress in round {p.get('round', 0) + 1} ({p.get('reason')}), nudging the model",
+}
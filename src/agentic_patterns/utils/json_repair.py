@@ -0,0 +1,119 @@
+import ast
+import json
+import re
+from typing import Any
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_UNQUOTED_KEY = re.compile(r"([{,]\s*)([A-Za-z_][\w-]*)(\s*:)")
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def loads_lenient(text: str) -> Any:
+    """
+    Parses JSON written by a language model, repairing the usual mistakes: code fences or
+    prose around the object, single quotes, Python literals (True, None), unquoted keys,
+    trailing commas and missing closing brackets.
+
+    Args:
+        text (str): The text holding a JSON object or array.
+
+    Returns:
+        Any: The parsed value.
+
+    Raises:
+        json.JSONDecodeError: If the text cannot be repaired.
+    """
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        error = e
+
+    candidate = _extract(_FENCE.sub("", text.strip()))
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError:
+        pass
+
+    # Single quotes, Python literals and trailing commas are valid Python.
+    try:
+        value = ast.literal_eval(candidate)
+        if isinstance(value, (dict, list)):
+            return value
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        pass
+
+    repaired = _close_brackets(candidate)
+    repaired = _UNQUOTED_KEY.sub(r'\1"\2"\3', repaired)
+    repaired = _TRAILING_COMMA.sub(r"\1", repaired)
+    repaired = re.sub(r"\b(True|False|None)\b", lambda m: _PYTHON_LITERALS[m.group(1)], repaired)
+    for attempt in (repaired, _swap_quotes(repaired)):
+        try:
+            return json.loads(attempt)
+        except json.JSONDecodeError:
+            continue
+    raise error
+
+
+def _extract(text: str) -> str:
+    """
+    Returns the text from the first opening bracket to its matching closing bracket,
+    or to the end of the text when it is never closed.
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return text
+    start = min(starts)
+    depth = 0
+    quote = None
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start : i + 1]
+    return text[start:]
+
+
+def _close_brackets(text: str) -> str:
+    stack = []
+    quote = None
+    escaped = False
+    for char in text:
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+    return text + (quote or "") + "".join(reversed(stack))
+
+
+def _swap_quotes(text: str) -> str:
+    """
+    Turns single-quoted strings into double-quoted ones, escaping the double quotes they contain.
+    """
+    return re.sub(
+        r"'((?:[^'\\]|\\.)*)'",
+        lambda m: '"' + m.group(1).replace('"', '\\"').replace("\\'", "'") + '"',
+        text,
+    )
@@ -0,0 +1,588 @@
+import bisect
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# USD per million (prompt, completion) tokens, from the Groq price list. Calls to other models
+# are recorded without a cost until their price is set with `configure_prices`.
+DEFAULT_PRICES: dict[str, tuple[float, float]] = {
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "llama-3.1-8b-instant": (0.05, 0.08),
+}
+_prices: dict[str, tuple[float, float]] = dict(DEFAULT_PRICES)
+
+_call_context: ContextVar[dict] = ContextVar("llm_call_context", default={})
+_collectors: ContextVar[tuple] = ContextVar("llm_call_collectors", default=())
+
+
+@contextmanager
+def metrics_context(**attributes: Any):
+    """
+    Attributes the LLM calls made inside the block, e.g. to an agent or a ReAct round.
+
+    Args:
+        **attributes: The attributes to set, typically `agent` and `round`.
+    """
+    token = _call_context.set({**_call_context.get(), **attributes})
+    try:
+        yield
+    finally:
+        _call_context.reset(token)
+
+
+def current_call_context() -> dict:
+    """
+    Returns:
+        dict: The attributes set by the enclosing `metrics_context` blocks.
+    """
+    return _call_context.get()
+
+
+@contextmanager
+def collect_calls():
+    """
+    Collects the metrics of every LLM call made inside the block, in this context.
+
+    Yields:
+        list[CallMetrics]: The list the calls are appended to.
+    """
+    calls: list[CallMetrics] = []
+    token = _collectors.set(_collectors.get() + (calls,))
+    try:
+        yield calls
+    finally:
+        _collectors.reset(token)
+
+
+@dataclass
+class CallMetrics:
+    """
+    The metrics of a single LLM call.
+
+    Attributes:
+        model (str): The model that served the call.
+        agent (str | None): The agent that made the call, if known.
+        round (int | None): The ReAct or reflection round of the call, if known.
+        prompt_tokens (int): The number of prompt tokens.
+        completion_tokens (int): The number of completion tokens.
+        latency (float): The wall time of the call in seconds.
+        time_to_first_token (float | None): Queue plus prompt processing time reported by the provider.
+        cache_hit (bool): Whether the call was served from a cache, or shared from an identical
+            call in flight, instead of the provider.
+        cached_prompt_tokens (int): The prompt tokens served from the provider's prompt cache.
+        scheduler_wait (float): Seconds the call waited for the rate limits of the model.
+        cost (float | None): The price of the call in USD, if the price of the model is known.
+        error (str | None): The error type, if the call failed.
+        timestamp (float): The wall-clock time the call finished at.
+    """
+
+    model: str
+    agent: str | None = None
+    round: int | None = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency: float = 0.0
+    time_to_first_token: float | None = None
+    cache_hit: bool = False
+    cached_prompt_tokens: int = 0
+    scheduler_wait: float = 0.0
+    cost: float | None = None
+    error: str | None = None
+    timestamp: float = field(default_factory=time.time)
+
+
+@dataclass
+class ToolMetrics:
+    """
+    The metrics of a single tool call.
+
+    Attributes:
+        tool (str): The name of the tool.
+        agent (str | None): The agent that called the tool, if known.
+        round (int | None): The ReAct round of the call, if known.
+        latency (float): The wall time of the call in seconds.
+        cache_hit (bool): Whether the result came from a cache instead of the tool.
+        error (str | None): The error type, if the tool raised.
+        timestamp (float): The wall-clock time the call finished at.
+    """
+
+    tool: str
+    agent: str | None = None
+    round: int | None = None
+    latency: float = 0.0
+    cache_hit: bool = False
+    error: str | None = None
+    timestamp: float = field(default_factory=time.time)
+
+
+class Histogram:
+    """
+    A cumulative histogram with fixed bucket boundaries.
+
+    Args:
+        buckets (tuple[float, ...], optional): The upper bounds of the buckets.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile as the upper bound of the bucket containing it.
+
+        Args:
+            q (float): The quantile, between 0 and 1.
+
+        Returns:
+            float: The estimate, or 0.0 for an empty histogram.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """
+        Returns:
+            list[tuple[str, int]]: The (upper bound, cumulative count) pairs, ending with "+Inf".
+        """
+        pairs = []
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            pairs.append((repr(bound), seen))
+        pairs.append(("+Inf", self.count))
+        return pairs
+
+
+class MetricsRegistry:
+    """
+    Aggregates LLM call metrics into counters and histograms, labelled by model and agent.
+    Tool calls are aggregated the same way, labelled by tool and agent.
+
+    Args:
+        max_records (int, optional): The number of recent raw call records kept. Defaults to 10000.
+        buckets (tuple[float, ...], optional): The latency histogram buckets.
+    """
+
+    COUNTERS = (
+        "requests",
+        "prompt_tokens",
+        "completion_tokens",
+        "cache_hits",
+        "errors",
+        "cost_usd",
+        "tool_calls",
+        "tool_errors",
+        "tool_cache_hits",
+    )
+    LABEL_NAMES = {
+        "tool_calls": ("tool", "agent"),
+        "tool_errors": ("tool", "agent"),
+        "tool_cache_hits": ("tool", "agent"),
+        "tool_latency_seconds": ("tool", "agent"),
+    }
+
+    def __init__(self, max_records: int = 10000, buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.records: deque[CallMetrics | ToolMetrics] = deque(maxlen=max_records)
+        self.counters: dict[tuple[str, str, str], float] = {}
+        self.histograms: dict[tuple[str, str, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def _inc(self, name: str, labels: tuple[str, str], value: float = 1) -> None:
+        key = (name, *labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def _observe(self, name: str, labels: tuple[str, str], value: float) -> None:
+        key = (name, *labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def record(self, call: CallMetrics) -> None:
+        """
+        Records one call, and appends it to the collectors active in the current context.
+
+        Args:
+            call (CallMetrics): The call to record.
+        """
+        labels = (call.model, call.agent or "")
+        with self._lock:
+            self.records.append(call)
+            self._inc("requests", labels)
+            self._inc("prompt_tokens", labels, call.prompt_tokens)
+            self._inc("completion_tokens", labels, call.completion_tokens)
+            if call.cache_hit:
+                self._inc("cache_hits", labels)
+            if call.error:
+                self._inc("errors", labels)
+            if call.cost is not None:
+                self._inc("cost_usd", labels, call.cost)
+            # Hedging reads provider latencies: answers from a cache or another in-flight request
+            # take no time, and would make every real call look slow.
+            if call.cache_hit:
+                self._observe("cache_latency_seconds", labels, call.latency)
+            else:
+                self._observe("latency_seconds", labels, call.latency)
+            if call.time_to_first_token is not None:
+                self._observe("time_to_first_token_seconds", labels, call.time_to_first_token)
+        for calls in _collectors.get():
+            calls.append(call)
+
+    def record_tool(self, call: ToolMetrics) -> None:
+        """
+        Records one tool call, and appends it to the collectors active in the current context.
+
+        Args:
+            call (ToolMetrics): The tool call to record.
+        """
+        labels = (call.tool, call.agent or "")
+        with self._lock:
+            self.records.append(call)
+            self._inc("tool_calls", labels)
+            if call.cache_hit:
+                self._inc("tool_cache_hits", labels)
+            if call.error:
+                self._inc("tool_errors", labels)
+            self._observe("tool_latency_seconds", labels, call.latency)
+        for calls in _collectors.get():
+            calls.append(call)
+
+    def latency_quantile(self, model: str, q: float) -> tuple[float, int]:
+        """
+        Estimates a latency quantile of a model, over all agents. Only calls sent to the provider
+        count: cache hits and coalesced calls are kept in `cache_latency_seconds`.
+
+        Args:
+            model (str): The model.
+            q (float): The quantile, between 0 and 1.
+
+        Returns:
+            tuple[float, int]: The estimate and the number of observations it is based on.
+        """
+        merged = Histogram(self.buckets)
+        with self._lock:
+            for (name, label, _), histogram in self.histograms.items():
+                if name == "latency_seconds" and label == model:
+                    merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+                    merged.count += histogram.count
+        return merged.quantile(q), merged.count
+
+    def reset(self) -> None:
+        with self._lock:
+            self.records.clear()
+            self.counters.clear()
+            self.histograms.clear()
+
+    def total_cost(self, model: str | None = None, agent: str | None = None) -> float:
+        """
+        Sums the cost of the calls recorded since the last reset.
+
+        Args:
+            model (str | None, optional): Only count the calls to this model. Defaults to None (all).
+            agent (str | None, optional): Only count the calls of this agent. Defaults to None (all).
+
+        Returns:
+            float: The cost in USD of the calls to priced models.
+        """
+        with self._lock:
+            return sum(
+                value
+                for (name, call_model, call_agent), value in self.counters.items()
+                if name == "cost_usd"
+                and (model is None or call_model == model)
+                and (agent is None or call_agent == agent)
+            )
+
+    def to_prometheus(self, prefix: str = "llm") -> str:
+        """
+        Exports the counters and histograms in the Prometheus text exposition format.
+
+        Args:
+            prefix (str, optional): The metric name prefix. Defaults to "llm".
+
+        Returns:
+            str: The exposition text.
+        """
+        lines = []
+        with self._lock:
+            for name in self.COUNTERS:
+                metric = f"{prefix}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                names = self.LABEL_NAMES.get(name, ("model", "agent"))
+                for (counter, *values), value in sorted(self.counters.items()):
+                    if counter == name:
+                        lines.append(f"{metric}{_labels(names, values)} {value:g}")
+            for name in sorted({key[0] for key in self.histograms}):
+                metric = f"{prefix}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                names = self.LABEL_NAMES.get(name, ("model", "agent"))
+                for (histogram_name, *values), histogram in sorted(self.histograms.items()):
+                    if histogram_name != name:
+                        continue
+                    for bound, count in histogram.cumulative():
+                        lines.append(f"{metric}_bucket{_labels(names, values, le=bound)} {count}")
+                    lines.append(f"{metric}_sum{_labels(names, values)} {histogram.sum:g}")
+                    lines.append(f"{metric}_count{_labels(names, values)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self, include_records: bool = False) -> str:
+        """
+        Exports the counters and histograms as JSON.
+
+        Args:
+            include_records (bool, optional): Also export the raw call records. Defaults to False.
+
+        Returns:
+            str: The JSON document.
+        """
+        with self._lock:
+            data: dict[str, Any] = {
+                "counters": [
+                    {"name": name, **dict(zip(self.LABEL_NAMES.get(name, ("model", "agent")), values)), "value": value}
+                    for (name, *values), value in sorted(self.counters.items())
+                ],
+                "histograms": [
+                    {
+                        "name": name,
+                        **dict(zip(self.LABEL_NAMES.get(name, ("model", "agent")), values)),
+                        "buckets": dict(histogram.cumulative()),
+                        "sum": histogram.sum,
+                        "count": histogram.count,
+                    }
+                    for (name, *values), histogram in sorted(self.histograms.items())
+                ],
+            }
+            if include_records:
+                data["records"] = [asdict(record) for record in self.records]
+        return json.dumps(data, indent=2)
+
+
+@dataclass
+class AgentUsage:
+    """
+    The aggregated LLM usage of one agent over a set of calls.
+    """
+
+    agent: str
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    llm_time: float = 0.0
+    max_latency: float = 0.0
+    cache_hits: int = 0
+    errors: int = 0
+    cost: float = 0.0
+
+
+def summarize_calls(calls: list[CallMetrics | ToolMetrics]) -> list[AgentUsage]:
+    """
+    Aggregates LLM call metrics per agent. Tool calls are ignored.
+
+    Args:
+        calls (list[CallMetrics | ToolMetrics]): The calls to aggregate.
+
+    Returns:
+        list[AgentUsage]: One entry per agent, sorted by decreasing LLM time.
+    """
+    usage: dict[str, AgentUsage] = {}
+    for call in calls:
+        if not isinstance(call, CallMetrics):
+            continue
+        name = call.agent or "<unattributed>"
+        entry = usage.setdefault(name, AgentUsage(agent=name))
+        entry.calls += 1
+        entry.prompt_tokens += call.prompt_tokens
+        entry.completion_tokens += call.completion_tokens
+        entry.llm_time += call.latency
+        entry.max_latency = max(entry.max_latency, call.latency)
+        entry.cache_hits += int(call.cache_hit)
+        entry.errors += int(bool(call.error))
+        entry.cost += call.cost or 0.0
+    return sorted(usage.values(), key=lambda entry: entry.llm_time, reverse=True)
+
+
+def format_summary(usage: list[AgentUsage]) -> str:
+    """
+    Formats a per-agent usage summary as a text table.
+
+    Args:
+        usage (list[AgentUsage]): The summary, as returned by `summarize_calls`.
+
+    Returns:
+        str: The table.
+    """
+    header = (
+        f"{'agent':<32} {'calls':>5} {'tok in':>8} {'tok out':>8} {'llm s':>8} {'max s':>7} {'cache':>5} {'cost $':>9}"
+    )
+    lines = [header, "-" * len(header)]
+    for entry in usage:
+        lines.append(
+            f"{entry.agent[:32]:<32} {entry.calls:>5} {entry.prompt_tokens:>8} {entry.completion_tokens:>8} "
+            f"{entry.llm_time:>8.2f} {entry.max_latency:>7.2f} {entry.cache_hits:>5} {entry.cost:>9.5f}"
+        )
+    return "\n".join(lines)
+
+
+def record_completion(
+    model: str, response: Any, latency: float, cache_hit: bool = False, scheduler_wait: float = 0.0
+) -> CallMetrics:
+    """
+    Builds the metrics of a completion from the provider response and records them.
+
+    Args:
+        model (str): The requested model.
+        response (Any): The provider response. Missing usage fields are recorded as zero.
+        latency (float): The wall time of the call in seconds.
+        cache_hit (bool, optional): Whether the response came from a cache. Defaults to False.
+        scheduler_wait (float, optional): Seconds spent waiting for the rate limits. Defaults to 0.0.
+
+    Returns:
+        CallMetrics: The recorded metrics.
+    """
+    usage = getattr(response, "usage", None)
+    queue_time = getattr(usage, "queue_time", None)
+    prompt_time = getattr(usage, "prompt_time", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    context = _call_context.get()
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    call = CallMetrics(
+        model=model,
+        agent=context.get("agent"),
+        round=context.get("round"),
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        latency=latency,
+        time_to_first_token=(
+            (queue_time or 0.0) + prompt_time if prompt_time is not None else None
+        ),
+        cache_hit=cache_hit,
+        cached_prompt_tokens=getattr(details, "cached_tokens", 0) or 0,
+        scheduler_wait=scheduler_wait,
+        cost=call_cost(model, prompt_tokens, completion_tokens),
+    )
+    _registry.record(call)
+    return call
+
+
+def call_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float | None:
+    """
+    Args:
+        model (str): The model.
+        prompt_tokens (int): The number of prompt tokens.
+        completion_tokens (int): The number of completion tokens.
+
+    Returns:
+        float | None: The price of the call in USD, or None if the price of the model is unknown.
+    """
+    price = _prices.get(model)
+    if price is None:
+        return None
+    return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+
+def configure_prices(prices: dict[str, tuple[float, float]]) -> None:
+    """
+    Sets the price of models, e.g. for other providers or when the price list changes.
+
+    Args:
+        prices (dict[str, tuple[float, float]]): USD per million (prompt, completion) tokens, by model.
+    """
+    _prices.update(prices)
+
+
+def record_failure(model: str, error: BaseException, latency: float) -> CallMetrics:
+    """
+    Records a failed completion.
+
+    Args:
+        model (str): The requested model.
+        error (BaseException): The raised exception.
+        latency (float): The wall time until the failure, in seconds.
+
+    Returns:
+        CallMetrics: The recorded metrics.
+    """
+    context = _call_context.get()
+    call = CallMetrics(
+        model=model,
+        agent=context.get("agent"),
+        round=context.get("round"),
+        latency=latency,
+        error=type(error).__name__,
+    )
+    _registry.record(call)
+    return call
+
+
+def record_tool_call(
+    tool: str, latency: float, error: BaseException | None = None, cache_hit: bool = False
+) -> ToolMetrics:
+    """
+    Records a tool call, attributed to the agent and round of the current context.
+
+    Args:
+        tool (str): The name of the tool.
+        latency (float): The wall time of the call in seconds.
+        error (BaseException | None, optional): The exception raised by the tool, if any.
+        cache_hit (bool, optional): Whether the result came from a cache. Defaults to False.
+
+    Returns:
+        ToolMetrics: The recorded metrics.
+    """
+    context = _call_context.get()
+    call = ToolMetrics(
+        tool=tool,
+        agent=context.get("agent"),
+        round=context.get("round"),
+        latency=latency,
+        cache_hit=cache_hit,
+        error=type(error).__name__ if error is not None else None,
+    )
+    _registry.record_tool(call)
+    return call
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """
+    Returns:
+        MetricsRegistry: The process-wide metrics registry.
+    """
+    return _registry
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: list[str], **extra: str) -> str:
+    labels = {**dict(zip(names, values)), **extra}
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
@@ -0,0 +1,104 @@
+import itertools
+import json
+import random
+import time
+from types import SimpleNamespace
+from typing import Callable
+
+from agentic_patterns.utils.scheduler import estimate_tokens
+
+
+class MockChatClient:
+    """
+    A local stand-in for the Groq client that plays a scripted tool-using session, so agents
+    can be exercised and compared without network access or API keys.
+
+    The script is a list of rounds, each a list of `(tool_name, arguments)` calls issued together.
+    Every assistant message already in the conversation counts as one round played. Once the
+    script is exhausted, or when the request offers no tools (neither native `tools` nor a
+    `<tools>` system prompt), the client answers with `answer`, within `<response>` tags when
+    the request uses the XML tool protocol. When native `tools` are passed the
+    calls are returned in `tool_calls`; otherwise they are written as `<tool_call>` tags, and a
+    fraction `malformed_rate` of them is written as sloppy JSON (single quotes, trailing commas).
+
+    Token usage is estimated from the length of the request, tool schemas included.
+
+    Attributes:
+        requests (list[dict]): Every request received, in order.
+        malformed_calls (int): The number of `<tool_call>` blocks written as sloppy JSON.
+
+    Args:
+        script (list[list[tuple[str, dict]]]): The tool calls of each round.
+        answer (str | Callable[[list], str]): The final answer, or a function of the messages returning it.
+        malformed_rate (float, optional): The fraction of sloppy `<tool_call>` JSON. Defaults to 0.0.
+        latency (float, optional): Seconds every call takes. Defaults to 0.0.
+        seed (int, optional): The seed of the sloppiness. Defaults to 0.
+    """
+
+    def __init__(
+        self,
+        script: list[list[tuple[str, dict]]],
+        answer: str | Callable[[list], str],
+        malformed_rate: float = 0.0,
+        latency: float = 0.0,
+        seed: int = 0,
+    ):
+        self.script = script
+        self.answer = answer
+        self.malformed_rate = malformed_rate
+        self.latency = latency
+        self.requests: list[dict] = []
+        self.malformed_calls = 0
+        self._random = random.Random(seed)
+        self._ids = itertools.count()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages: list, model: str, tools: list | None = None, **kwargs):
+        self.requests.append({"messages": list(messages), "model": model, "tools": tools})
+        if self.latency:
+            time.sleep(self.latency)
+
+        played = sum(1 for message in messages if message.get("role") == "assistant")
+        offers_tools = tools or any(
+            "<tools>" in str(message.get("content")) for message in messages if message.get("role") == "system"
+        )
+        calls = self.script[played] if offers_tools and played < len(self.script) else []
+        tool_calls = None
+        if not calls:
+            answer = self.answer(messages) if callable(self.answer) else self.answer
+            # Only the XML tool protocol wraps the final answer in <response> tags.
+            content = f"<response>{answer}</response>" if offers_tools and not tools else answer
+        elif tools:
+            content = ""
+            tool_calls = [
+                SimpleNamespace(
+                    id=f"call_{next(self._ids)}",
+                    type="function",
+                    function=SimpleNamespace(name=name, arguments=json.dumps(arguments)),
+                )
+                for name, arguments in calls
+            ]
+        else:
+            content = f"<thought>I need to call {', '.join(name for name, _ in calls)}</thought>\n" + "\n".join(
+                f"<tool_call>{self._write_call(name, arguments)}</tool_call>" for name, arguments in calls
+            )
+
+        prompt = estimate_tokens(messages) + (len(json.dumps(tools)) // 4 if tools else 0)
+        completion = len(content) // 4 + sum(len(call.function.arguments) // 4 + 8 for call in tool_calls or [])
+        return SimpleNamespace(
+            choices=[
+                SimpleNamespace(
+                    message=SimpleNamespace(role="assistant", content=content, tool_calls=tool_calls),
+                    finish_reason="tool_calls" if tool_calls else "stop",
+                )
+            ],
+            usage=SimpleNamespace(prompt_tokens=prompt, completion_tokens=completion),
+            model=model,
+        )
+
+    def _write_call(self, name: str, arguments: dict) -> str:
+        call = {"name": name, "arguments": arguments, "id": next(self._ids)}
+        if self._random.random() >= self.malformed_rate:
+            return json.dumps(call)
+        self.malformed_calls += 1
+        return repr(call)[:-1] + ",}"
@@ -0,0 +1,376 @@
+import contextvars
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Callable
+from typing import TypeVar
+
+from agentic_patterns.utils import events
+from agentic_patterns.utils.metrics import get_metrics_registry
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504})
+RETRYABLE_ERROR_NAMES = frozenset({"APIConnectionError", "APITimeoutError", "InternalServerError", "RateLimitError"})
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of calling a model whose circuit breaker is open.
+
+    Attributes:
+        model (str): The model.
+        retry_in (float): Seconds until the breaker lets a probe request through.
+    """
+
+    def __init__(self, model: str, retry_in: float):
+        super().__init__(f"Circuit open for model '{model}', retry in {retry_in:.1f}s")
+        self.model = model
+        self.retry_in = retry_in
+
+
+def status_code(error: BaseException) -> int | None:
+    """
+    Returns:
+        int | None: The HTTP status code carried by a provider error, if any.
+    """
+    code = getattr(error, "status_code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def retry_after(error: BaseException) -> float | None:
+    """
+    Reads the `Retry-After` (or `retry-after-ms`) header of a provider error.
+
+    Args:
+        error (BaseException): The error.
+
+    Returns:
+        float | None: The requested delay in seconds, if the provider sent one.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    milliseconds = headers.get("retry-after-ms")
+    if milliseconds is not None:
+        try:
+            return float(milliseconds) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Tells whether an error is transient: rate limiting, timeouts, connection and server errors.
+
+    Args:
+        error (BaseException): The error.
+
+    Returns:
+        bool: Whether retrying may succeed.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    code = status_code(error)
+    if code is not None:
+        return code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (TimeoutError, ConnectionError)) or type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Retries transient errors with exponential backoff and full jitter.
+
+    Attributes:
+        max_attempts (int): The total number of attempts, including the first one. At least 1.
+        base_delay (float): The backoff cap of the first retry, in seconds. It doubles at every retry.
+        max_delay (float): The maximum backoff, in seconds.
+    """
+
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+
+    def __post_init__(self):
+        if self.max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+
+    def delay(self, attempt: int, error: BaseException) -> float:
+        """
+        Computes the wait before the next attempt.
+
+        The backoff is drawn uniformly below the exponential cap, so clients that failed
+        together do not retry in lockstep. A `Retry-After` sent by the provider is a lower bound.
+
+        Args:
+            attempt (int): The number of the failed attempt, starting at 0.
+            error (BaseException): The error of the failed attempt.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        requested = retry_after(error)
+        return backoff if requested is None else max(requested, backoff)
+
+
+@dataclass
+class HedgePolicy:
+    """
+    Sends a duplicate request when the first one is slower than usual; the first answer wins.
+
+    Attributes:
+        percentile (float): The latency percentile of the model after which a hedge is sent.
+        min_delay (float): The minimum delay before hedging, in seconds.
+        default_delay (float): The delay used until `min_samples` latencies have been observed.
+        min_samples (int): The number of observed calls needed to trust the percentile.
+        max_hedges (int): The maximum number of duplicates per attempt.
+    """
+
+    percentile: float = 0.95
+    min_delay: float = 0.5
+    default_delay: float = 5.0
+    min_samples: int = 20
+    max_hedges: int = 1
+
+    def delay(self, model: str) -> float:
+        """
+        Args:
+            model (str): The model.
+
+        Returns:
+            float: Seconds to wait for the first request before sending a hedge.
+        """
+        estimate, samples = get_metrics_registry().latency_quantile(model, self.percentile)
+        if samples < self.min_samples or estimate == float("inf"):
+            return self.default_delay
+        return max(self.min_delay, estimate)
+
+
+class CircuitBreaker:
+    """
+    Stops calling a model after repeated transient failures.
+
+    After `failure_threshold` consecutive failures the breaker opens and calls fail fast with
+    CircuitOpenError. Once `reset_timeout` has elapsed a single probe is let through: its
+    success closes the breaker, its failure opens it again.
+
+    Args:
+        failure_threshold (int, optional): Consecutive failures that open the breaker. Defaults to 5.
+        reset_timeout (float, optional): Seconds before a probe is allowed. Defaults to 30.0.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """
+        Returns:
+            bool: Whether a call may be made now.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.retry_in() == 0.0:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> bool:
+        """
+        Returns:
+            bool: Whether this failure opened the breaker.
+        """
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self.failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+
+class Resilience:
+    """
+    Wraps LLM calls with retries, hedged requests and per-model circuit breakers.
+
+    While a resilience layer is configured, `completions_create` disables the retries of the
+    provider SDK (the Groq client retries twice by default), so that every attempt and its
+    latency go through the policies here.
+
+    Args:
+        retry (RetryPolicy | None, optional): The retry policy. Defaults to RetryPolicy().
+            None disables retries.
+        hedge (HedgePolicy | None, optional): The hedging policy. Defaults to None (no hedging).
+        failure_threshold (int, optional): Consecutive failures that open a breaker. Defaults to 5.
+        reset_timeout (float, optional): Seconds an open breaker waits before a probe. Defaults to 30.0.
+    """
+
+    def __init__(
+        self,
+        retry: RetryPolicy | None = RetryPolicy(),
+        hedge: HedgePolicy | None = None,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        self.retry = retry
+        self.hedge = hedge
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self.breakers.get(model)
+            if breaker is None:
+                breaker = self.breakers[model] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def call(self, model: str, request: Callable[[], T]) -> T:
+        """
+        Runs `request` under the policies of `model`.
+
+        Args:
+            model (str): The model the request is sent to.
+            request (Callable[[], T]): Sends one request and returns the response.
+
+        Returns:
+            T: The first successful response.
+
+        Raises:
+            CircuitOpenError: If the breaker of the model is open.
+            Exception: The error of the last attempt, or the first non-retryable error.
+        """
+        breaker = self.breaker(model)
+        attempts = self.retry.max_attempts if self.retry is not None else 1
+        for attempt in range(attempts):
+            if not breaker.allow():
+                raise CircuitOpenError(model, breaker.retry_in())
+            try:
+                response = self._hedged(model, request) if self.hedge is not None else request()
+            except Exception as e:
+                if not is_retryable(e):
+                    # The provider answered, so it is up: the breaker is not concerned.
+                    breaker.record_success()
+                    raise
+                if breaker.record_failure():
+                    events.emit(events.CIRCUIT_OPEN, level=events.WARNING, model=model, failures=breaker.failures)
+                if attempt == attempts - 1:
+                    raise
+                delay = self.retry.delay(attempt, e)
+                events.emit(
+                    events.RETRY, level=events.WARNING, model=model, attempt=attempt + 1, delay=delay, error=repr(e)
+                )
+                time.sleep(delay)
+            else:
+                breaker.record_success()
+                return response
+        raise AssertionError("unreachable")
+
+    def _hedged(self, model: str, request: Callable[[], T]) -> T:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+        delay = self.hedge.delay(model)
+        pending: set[Future] = set()
+        hedges = 0
+        error: BaseException | None = None
+        pending.add(self._executor.submit(contextvars.copy_context().run, request))
+        while pending:
+            timeout = delay if hedges < self.hedge.max_hedges else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # The slower duplicates are left to finish in the background.
+                    return future.result()
+                error = future.exception()
+            if not done and hedges < self.hedge.max_hedges:
+                hedges += 1
+                events.emit(events.HEDGE, level=events.DEBUG, model=model, delay=delay, hedge=hedges)
+                pending.add(self._executor.submit(contextvars.copy_context().run, request))
+        raise error
+
+
+_resilience: Resilience | None = None
+
+
+def configure_resilience(
+    retry: RetryPolicy | None = RetryPolicy(),
+    hedge: HedgePolicy | None = None,
+    failure_threshold: int = 5,
+    reset_timeout: float = 30.0,
+) -> Resilience:
+    """
+    Installs process-wide retries, hedging and circuit breakers around `completions_create`.
+
+    Args:
+        retry (RetryPolicy | None, optional): The retry policy. Defaults to RetryPolicy().
+        hedge (HedgePolicy | None, optional): The hedging policy. Defaults to None (no hedging).
+        failure_threshold (int, optional): Consecutive failures that open a breaker. Defaults to 5.
+        reset_timeout (float, optional): Seconds an open breaker waits before a probe. Defaults to 30.0.
+
+    Returns:
+        Resilience: The installed layer.
+    """
+    global _resilience
+    _resilience = Resilience(retry, hedge, failure_threshold, reset_timeout)
+    return _resilience
+
+
+def disable_resilience() -> None:
+    """
+    Removes the process-wide resilience layer.
+    """
+    global _resilience
+    _resilience = None
+
+
+def get_resilience() -> Resilience | None:
+    """
+    Returns:
+        Resilience | None: The process-wide resilience layer, if one is configured.
+    """
+    return _resilience
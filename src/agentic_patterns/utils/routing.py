@@ -0,0 +1,186 @@
+import json
+from typing import Callable
+
+from agentic_patterns.utils import events
+from agentic_patterns.utils.completions import completions_create
+from agentic_patterns.utils.extraction import extract_tag_content
+from agentic_patterns.utils.json_repair import loads_lenient
+from agentic_patterns.utils.tracing import span
+
+TOOL_SELECTION = "tool_selection"
+PLANNING = "planning"
+GENERATION = "generation"
+CRITIQUE = "critique"
+SYNTHESIS = "synthesis"
+SUMMARY = "summary"
+
+
+def valid_tool_calls(output: str, tool_names=None) -> bool:
+    """
+    Tells whether a tool-selection output is usable: every `<tool_call>` block must hold a JSON
+    object naming a known tool, possibly after repair, and an output without tool calls must
+    hold a `<response>`.
+
+    Args:
+        output (str): The model output.
+        tool_names (Iterable[str] | None, optional): The known tools. Defaults to None (any name).
+
+    Returns:
+        bool: Whether the output is valid.
+    """
+    tool_calls = extract_tag_content(str(output), "tool_call")
+    if not tool_calls.found:
+        return extract_tag_content(str(output), "response").found
+    for content in tool_calls.content:
+        try:
+            tool_call = loads_lenient(content)
+        except json.JSONDecodeError:
+            return False
+        if not isinstance(tool_call, dict) or "name" not in tool_call:
+            return False
+        if tool_names is not None and tool_call["name"] not in tool_names:
+            return False
+    return True
+
+
+class ModelRouter:
+    """
+    Picks the model of each LLM call by step type, and escalates along a cascade of models
+    when an output fails validation.
+
+    A route maps a step type (TOOL_SELECTION, PLANNING, GENERATION, CRITIQUE, SYNTHESIS,
+    SUMMARY) to a model or to a cascade ordered from the cheapest to the strongest model.
+    Steps without a route use the model of the agent.
+
+    Args:
+        routes (dict[str, str | list[str]] | None, optional): The models per step type.
+    """
+
+    def __init__(self, routes: dict[str, str | list[str]] | None = None):
+        self.routes = {
+            step: [models] if isinstance(models, str) else list(models) for step, models in (routes or {}).items()
+        }
+
+    def models_for(self, step: str, default_model: str) -> list[str]:
+        """
+        Args:
+            step (str): The step type.
+            default_model (str): The model of the agent.
+
+        Returns:
+            list[str]: The cascade of models for the step.
+        """
+        return self.routes.get(step) or [default_model]
+
+    def complete(
+        self,
+        client,
+        messages: list,
+        step: str,
+        default_model: str,
+        validate: Callable[[str], bool] | None = None,
+    ) -> str:
+        """
+        Requests a completion from the first model of the cascade of `step`, moving to the next
+        model while the output fails `validate`. The last model's output is always returned.
+
+        Args:
+            client: The LLM client.
+            messages (list): The messages to send.
+            step (str): The step type.
+            default_model (str): The model of the agent, used when the step has no route.
+            validate (Callable[[str], bool] | None, optional): Checks an output. Defaults to None.
+
+        Returns:
+            str: The content of the accepted completion.
+        """
+        models = self.models_for(step, default_model)
+        with span("llm.route", step=step) as current:
+            for i, model in enumerate(models):
+                output = completions_create(client, messages, model)
+                if validate is None or i == len(models) - 1 or validate(output):
+                    current.set_attribute("model", model)
+                    current.set_attribute("escalations", i)
+                    return output
+                events.emit(events.ESCALATED, level=events.DEBUG, step=step, model=model, next_model=models[i + 1])
+        raise AssertionError("unreachable")
+
+
+_router: ModelRouter | None = None
+
+
+def route_completion(
+    client,
+    messages: list,
+    model: str,
+    step: str,
+    validate: Callable[[str], bool] | None = None,
+) -> str:
+    """
+    Requests a completion for a step, through the process-wide router when one is configured.
+
+    Args:
+        client: The LLM client.
+        messages (list): The messages to send.
+        model (str): The model of the agent.
+        step (str): The step type.
+        validate (Callable[[str], bool] | None, optional): Checks an output before accepting it
+            from a cheaper model of the cascade. Defaults to None.
+
+    Returns:
+        str: The content of the completion.
+    """
+    if _router is None:
+        return completions_create(client, messages, model)
+    return _router.complete(client, messages, step, model, validate)
+
+
+def answers_on_synthesis_route(step: str, model: str) -> bool:
+    """
+    Tells whether an answer written on the route of `step` can be returned as the final answer:
+    the last model of its cascade, the one that answers once the cheaper models fail validation,
+    must be a SYNTHESIS model. Otherwise, e.g. when tool selection runs on a small model, the
+    answer should be written again on the SYNTHESIS route.
+
+    Args:
+        step (str): The step type that produced the answer.
+        model (str): The model of the agent.
+
+    Returns:
+        bool: Whether the answer can be kept.
+    """
+    if _router is None:
+        return True
+    return _router.models_for(step, model)[-1] in _router.models_for(SYNTHESIS, model)
+
+
+def configure_routing(routes: dict[str, str | list[str]]) -> ModelRouter:
+    """
+    Installs a process-wide router, e.g.
+    `configure_routing({TOOL_SELECTION: ["llama-3.1-8b-instant", "llama-3.3-70b-versatile"]})`.
+
+    Args:
+        routes (dict[str, str | list[str]]): The models per step type.
+
+    Returns:
+        ModelRouter: The installed router.
+    """
+    global _router
+    _router = ModelRouter(routes)
+    return _router
+
+
+def disable_routing() -> None:
+    """
+    Removes the process-wide router: every call uses the model of its agent again.
+    """
+    global _router
+    _router = None
+
+
+def get_router() -> ModelRouter | None:
+    """
+    Returns:
+        ModelRouter | None: The process-wide router, if one is configured.
+    """
+    return _router
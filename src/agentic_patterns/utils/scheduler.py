@@ -0,0 +1,291 @@
+import threading
+import time
+from collections import OrderedDict
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+HIGH = 0
+NORMAL = 1
+LOW = 2
+
+_scheduling: ContextVar[dict] = ContextVar("llm_scheduling", default={})
+
+
+@contextmanager
+def scheduling_context(tenant: str | None = None, priority: int | None = None):
+    """
+    Sets the tenant and the priority class of the LLM calls made inside the block.
+
+    Capacity is shared round-robin between tenants (e.g. crews or user requests) within
+    a priority class, and higher classes are always served first.
+
+    Args:
+        tenant (str | None, optional): The tenant to bill the calls to. Defaults to the enclosing one.
+        priority (int | None, optional): HIGH, NORMAL or LOW. Defaults to the enclosing one.
+    """
+    current = dict(_scheduling.get())
+    if tenant is not None:
+        current["tenant"] = tenant
+    if priority is not None:
+        current["priority"] = priority
+    token = _scheduling.set(current)
+    try:
+        yield
+    finally:
+        _scheduling.reset(token)
+
+
+def current_tenant() -> str | None:
+    """
+    Returns:
+        str | None: The tenant set by the enclosing `scheduling_context`, if any.
+    """
+    return _scheduling.get().get("tenant")
+
+
+def estimate_tokens(messages: list) -> int:
+    """
+    Roughly estimates the prompt tokens of a list of messages (about four characters per token).
+
+    Args:
+        messages (list): The chat messages.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return sum(len(str(message.get("content", ""))) // 4 + 4 for message in messages)
+
+
+@dataclass
+class RateLimit:
+    """
+    The limits of one model.
+
+    Attributes:
+        rpm (float | None): Requests per minute, or None for no limit.
+        tpm (float | None): Tokens per minute, or None for no limit.
+    """
+
+    rpm: float | None = None
+    tpm: float | None = None
+
+
+class TokenBucket:
+    """
+    A token bucket refilled continuously up to its capacity.
+
+    The level may go negative when a reservation is reconciled with a larger actual usage;
+    the debt is then paid back by the refill.
+
+    Args:
+        per_minute (float): The capacity, refilled over one minute.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """
+        Args:
+            amount (float): The amount to take. It is capped at the capacity.
+            now (float): The current monotonic time.
+
+        Returns:
+            float: Seconds until `amount` is available, 0.0 if it already is.
+        """
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass
+class Ticket:
+    """
+    A granted request slot.
+
+    Attributes:
+        model (str): The model the slot was granted for.
+        tokens (int): The number of tokens reserved.
+        waited (float): Seconds spent waiting for the slot.
+    """
+
+    model: str
+    tokens: int
+    waited: float = 0.0
+
+
+class _Waiter:
+    __slots__ = ("model", "tokens", "priority", "tenant")
+
+    def __init__(self, model: str, tokens: int, priority: int, tenant: str):
+        self.model = model
+        self.tokens = tokens
+        self.priority = priority
+        self.tenant = tenant
+
+
+class RequestScheduler:
+    """
+    A process-wide gate in front of the LLM provider, enforcing per-model RPM and TPM limits.
+
+    Requests wait in per-model queues. The next request for a model is taken from the highest
+    non-empty priority class, rotating between tenants so that one busy crew cannot starve the
+    others, and is released as soon as both token buckets of the model have enough capacity.
+
+    Args:
+        limits (dict[str, RateLimit] | None, optional): The limits per model.
+        default_limit (RateLimit | None, optional): The limits of models missing from `limits`.
+            Defaults to None (no limit).
+    """
+
+    def __init__(self, limits: dict[str, RateLimit] | None = None, default_limit: RateLimit | None = None):
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit
+        self._buckets: dict[str, tuple[TokenBucket | None, TokenBucket | None]] = {}
+        self._queues: dict[str, dict[int, OrderedDict[str, deque]]] = {}
+        self._condition = threading.Condition()
+
+    def _buckets_for(self, model: str) -> tuple[TokenBucket | None, TokenBucket | None]:
+        buckets = self._buckets.get(model)
+        if buckets is None:
+            limit = self.limits.get(model, self.default_limit) or RateLimit()
+            buckets = (
+                TokenBucket(limit.rpm) if limit.rpm else None,
+                TokenBucket(limit.tpm) if limit.tpm else None,
+            )
+            self._buckets[model] = buckets
+        return buckets
+
+    def _head(self, model: str) -> _Waiter | None:
+        classes = self._queues.get(model, {})
+        for priority in sorted(classes):
+            tenants = classes[priority]
+            if tenants:
+                return tenants[next(iter(tenants))][0]
+        return None
+
+    def _remove(self, waiter: _Waiter) -> None:
+        tenants = self._queues[waiter.model][waiter.priority]
+        waiters = tenants[waiter.tenant]
+        waiters.remove(waiter)
+        del tenants[waiter.tenant]
+        if waiters:
+            # Round-robin: the tenant goes to the back of its priority class.
+            tenants[waiter.tenant] = waiters
+
+    def acquire(self, model: str, tokens: int, priority: int | None = None, tenant: str | None = None) -> Ticket:
+        """
+        Blocks until a request of `tokens` estimated tokens may be sent to `model`.
+
+        Args:
+            model (str): The model.
+            tokens (int): The estimated tokens of the request.
+            priority (int | None, optional): The priority class. Defaults to the scheduling context, or NORMAL.
+            tenant (str | None, optional): The tenant. Defaults to the scheduling context, or "default".
+
+        Returns:
+            Ticket: The granted slot, to be passed to `release`.
+        """
+        context = _scheduling.get()
+        priority = context.get("priority", NORMAL) if priority is None else priority
+        tenant = context.get("tenant", "default") if tenant is None else tenant
+        rpm, tpm = self._buckets_for(model)
+        if rpm is None and tpm is None:
+            return Ticket(model=model, tokens=tokens)
+
+        waiter = _Waiter(model, tokens, priority, tenant)
+        start = time.monotonic()
+        with self._condition:
+            tenants = self._queues.setdefault(model, {}).setdefault(priority, OrderedDict())
+            tenants.setdefault(tenant, deque()).append(waiter)
+            while True:
+                timeout = None
+                if self._head(model) is waiter:
+                    now = time.monotonic()
+                    timeout = max(
+                        rpm.wait_time(1, now) if rpm else 0.0,
+                        tpm.wait_time(tokens, now) if tpm else 0.0,
+                    )
+                    if timeout == 0.0:
+                        if rpm:
+                            rpm.take(1)
+                        if tpm:
+                            tpm.take(tokens)
+                        self._remove(waiter)
+                        self._condition.notify_all()
+                        return Ticket(model=model, tokens=tokens, waited=time.monotonic() - start)
+                self._condition.wait(timeout)
+
+    def release(self, ticket: Ticket, actual_tokens: int | None = None) -> None:
+        """
+        Reconciles the reserved tokens with the actual usage reported by the provider.
+
+        Args:
+            ticket (Ticket): The slot returned by `acquire`.
+            actual_tokens (int | None, optional): The actual prompt plus completion tokens.
+                Defaults to None (keep the reservation).
+        """
+        if actual_tokens is None:
+            return
+        with self._condition:
+            _, tpm = self._buckets_for(ticket.model)
+            if tpm is None:
+                return
+            difference = ticket.tokens - actual_tokens
+            if difference > 0:
+                tpm.give_back(difference)
+                self._condition.notify_all()
+            else:
+                tpm.level += difference
+
+
+_scheduler: RequestScheduler | None = None
+
+
+def configure_scheduler(
+    limits: dict[str, RateLimit] | None = None, default_limit: RateLimit | None = None
+) -> RequestScheduler:
+    """
+    Installs a process-wide scheduler in front of `completions_create`.
+
+    Args:
+        limits (dict[str, RateLimit] | None, optional): The limits per model.
+        default_limit (RateLimit | None, optional): The limits of the other models.
+
+    Returns:
+        RequestScheduler: The installed scheduler.
+    """
+    global _scheduler
+    _scheduler = RequestScheduler(limits, default_limit)
+    return _scheduler
+
+
+def disable_scheduler() -> None:
+    """
+    Removes the process-wide scheduler.
+    """
+    global _scheduler
+    _scheduler = None
+
+
+def get_scheduler() -> RequestScheduler | None:
+    """
+    Returns:
+        RequestScheduler | None: The process-wide scheduler, if one is configured.
+    """
+    return _scheduler
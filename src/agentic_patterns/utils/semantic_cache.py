@@ -0,0 +1,444 @@
+import hashlib
+import json
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+from typing import Hashable
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed once a cache is created
+    np = None
+
+from agentic_patterns.utils.metrics import current_call_context
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class HashingVectorizer:
+    """
+    Embeds texts locally with the hashing trick: word unigrams and bigrams are hashed into a
+    fixed number of signed features, and every vector is L2-normalised, so the dot product of
+    two vectors is their cosine similarity.
+
+    Args:
+        n_features (int, optional): The dimension of the vectors. Defaults to 512.
+    """
+
+    def __init__(self, n_features: int = 512):
+        self.n_features = n_features
+
+    def transform(self, texts: list[str]) -> "np.ndarray":
+        """
+        Args:
+            texts (list[str]): The texts to embed.
+
+        Returns:
+            np.ndarray: A (len(texts), n_features) float32 matrix of unit vectors.
+        """
+        matrix = np.zeros((len(texts), self.n_features), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = _TOKEN_PATTERN.findall(text.lower())
+            for feature in tokens + [a + " " + b for a, b in zip(tokens, tokens[1:])]:
+                digest = zlib.crc32(feature.encode("utf-8"))
+                matrix[row, digest % self.n_features] += 1.0 if digest & 0x80000000 else -1.0
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+class SemanticCache:
+    """
+    A bounded cache keyed by text similarity instead of exact equality.
+
+    Entries live in one NumPy matrix that grows by doubling up to `capacity` rows, so a lookup is a single matrix-vector product (a matrix-matrix product for a batch).
+    Every entry belongs to a namespace, e.g. a model and a system prompt, and only matches
+    lookups in the same namespace. When the cache is full the least recently used entry is
+    replaced, and a namespace is forgotten with its last entry.
+
+    Args:
+        capacity (int, optional): The maximum number of entries. Defaults to 100000.
+        threshold (float, optional): The default minimum cosine similarity of a hit. Defaults to 0.99.
+        n_features (int, optional): The dimension of the embeddings. Defaults to 512.
+    """
+
+    def __init__(self, capacity: int = 100_000, threshold: float = 0.99, n_features: int = 512):
+        if np is None:
+            raise ImportError("The semantic cache requires numpy: pip install numpy")
+        self.capacity = capacity
+        self.threshold = threshold
+        self.vectorizer = HashingVectorizer(n_features)
+        self.hits = 0
+        self.misses = 0
+        self._vectors = np.zeros((min(capacity, 1024), n_features), dtype=np.float32)
+        self._namespaces = np.full(len(self._vectors), -1, dtype=np.int64)
+        self._last_used = np.zeros(len(self._vectors), dtype=np.int64)
+        self._values: list[Any] = [None] * len(self._vectors)
+        self._namespace_ids: dict[Hashable, int] = {}
+        # The namespace and the number of entries of every namespace id in use.
+        self._namespace_entries: dict[int, list] = {}
+        self._next_namespace_id = 0
+        self._size = 0
+        self._clock = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _add_entry(self, namespace: Hashable) -> int:
+        namespace_id = self._namespace_ids.get(namespace)
+        if namespace_id is None:
+            namespace_id = self._namespace_ids[namespace] = self._next_namespace_id
+            self._namespace_entries[namespace_id] = [namespace, 0]
+            self._next_namespace_id += 1
+        self._namespace_entries[namespace_id][1] += 1
+        return namespace_id
+
+    def _remove_entry(self, namespace_id: int) -> None:
+        entry = self._namespace_entries[namespace_id]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self._namespace_entries[namespace_id]
+            del self._namespace_ids[entry[0]]
+
+    def get_many(self, namespace: Hashable, texts: list[str], threshold: float | None = None) -> list[Any | None]:
+        """
+        Looks up several texts at once.
+
+        Args:
+            namespace (Hashable): The namespace to search.
+            texts (list[str]): The texts to look up.
+            threshold (float | None, optional): The minimum similarity. Defaults to the cache threshold.
+
+        Returns:
+            list[Any | None]: The cached value of the most similar entry for each text, or None.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        queries = self.vectorizer.transform(texts)
+        with self._lock:
+            namespace_id = self._namespace_ids.get(namespace)
+            if namespace_id is None or self._size == 0:
+                self.misses += len(texts)
+                return [None] * len(texts)
+            similarities = self._vectors[: self._size] @ queries.T
+            similarities[self._namespaces[: self._size] != namespace_id] = -1.0
+            best = similarities.argmax(axis=0)
+            results = []
+            for column, row in enumerate(best):
+                if similarities[row, column] >= threshold:
+                    self._clock += 1
+                    self._last_used[row] = self._clock
+                    self.hits += 1
+                    results.append(self._values[row])
+                else:
+                    self.misses += 1
+                    results.append(None)
+            return results
+
+    def get(self, namespace: Hashable, text: str, threshold: float | None = None) -> Any | None:
+        """
+        Args:
+            namespace (Hashable): The namespace to search.
+            text (str): The text to look up.
+            threshold (float | None, optional): The minimum similarity. Defaults to the cache threshold.
+
+        Returns:
+            Any | None: The cached value of the most similar entry, or None.
+        """
+        return self.get_many(namespace, [text], threshold)[0]
+
+    def put(self, namespace: Hashable, text: str, value: Any) -> None:
+        """
+        Adds an entry, evicting the least recently used one if the cache is full.
+
+        Args:
+            namespace (Hashable): The namespace of the entry.
+            text (str): The text the entry is found by.
+            value (Any): The cached value.
+        """
+        vector = self.vectorizer.transform([text])[0]
+        with self._lock:
+            if self._size < len(self._vectors):
+                row = self._size
+                self._size += 1
+            elif self._size < self.capacity:
+                self._grow()
+                row = self._size
+                self._size += 1
+            else:
+                row = int(self._last_used[: self._size].argmin())
+                self._remove_entry(int(self._namespaces[row]))
+            self._clock += 1
+            self._vectors[row] = vector
+            self._namespaces[row] = self._add_entry(namespace)
+            self._last_used[row] = self._clock
+            self._values[row] = value
+
+    def _grow(self) -> None:
+        rows = min(self.capacity, 2 * len(self._vectors))
+        extra = rows - len(self._vectors)
+        self._vectors = np.vstack([self._vectors, np.zeros((extra, self._vectors.shape[1]), dtype=np.float32)])
+        self._namespaces = np.concatenate([self._namespaces, np.full(extra, -1, dtype=np.int64)])
+        self._last_used = np.concatenate([self._last_used, np.zeros(extra, dtype=np.int64)])
+        self._values.extend([None] * extra)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._namespaces[:] = -1
+            self._values = [None] * len(self._vectors)
+            self._namespace_ids.clear()
+            self._namespace_entries.clear()
+            self._size = 0
+
+
+class ExactCache:
+    """
+    A bounded least-recently-used cache keyed by exact text.
+
+    Args:
+        capacity (int, optional): The maximum number of entries. Defaults to 100000.
+    """
+
+    def __init__(self, capacity: int = 100_000):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, namespace: Hashable, text: str) -> Any | None:
+        key = (namespace, hashlib.sha256(text.encode("utf-8")).hexdigest())
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, namespace: Hashable, text: str, value: Any) -> None:
+        key = (namespace, hashlib.sha256(text.encode("utf-8")).hexdigest())
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_subject: ContextVar[str | None] = ContextVar("semantic_cache_subject", default=None)
+
+
+@contextmanager
+def cache_subject(subject: str):
+    """
+    Marks the varying part of the requests made inside the block, e.g. the item a map agent
+    fills into its task template. Fuzzy matching then compares the subjects only, among
+    requests sharing the rest of their text verbatim.
+
+    Args:
+        subject (str): The varying content.
+    """
+    token = _subject.set(subject)
+    try:
+        yield
+    finally:
+        _subject.reset(token)
+
+
+class SemanticCachePolicy:
+    """
+    Decides how `completions_create` and `Tool.run` use the response caches.
+
+    By default a request is only answered from the cache when it is identical to a cached one:
+    same model and same messages. An agent may opt in to fuzzy matching in `agent_thresholds`;
+    its requests then match cached ones whose varying content is similar enough. The varying
+    content is the subject set with `cache_subject`, or else the last user message, and only
+    requests whose other text (system prompt, template, history) is identical are compared.
+    An agent mapped to None opts out: its LLM and tool calls neither read nor fill the cache.
+
+    Only the results of tools marked `@tool(cacheable=True)` are cached, since other tools may
+    have side effects or return data that changes over time. They are matched on exact
+    arguments unless `tool_threshold` is set.
+
+    Args:
+        cache (SemanticCache): The similarity cache of fuzzy matching.
+        agent_thresholds (dict[str, float | bool | None] | None, optional): Per agent name: a
+            threshold or True (the cache threshold) to opt in to fuzzy matching, None or False to opt out.
+        tool_threshold (float | None, optional): The similarity threshold of tool arguments.
+            Defaults to None (exact arguments).
+        cache_tools (bool, optional): Whether the results of cacheable tools are cached. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        cache: SemanticCache,
+        agent_thresholds: dict[str, float | bool | None] | None = None,
+        tool_threshold: float | None = None,
+        cache_tools: bool = True,
+    ):
+        self.cache = cache
+        self.exact = ExactCache(cache.capacity)
+        self.agent_thresholds = dict(agent_thresholds or {})
+        self.tool_threshold = tool_threshold
+        self.cache_tools = cache_tools
+
+    def enabled(self) -> bool:
+        """
+        Returns:
+            bool: Whether the current agent uses the cache.
+        """
+        agent = current_call_context().get("agent")
+        return agent not in self.agent_thresholds or self.agent_thresholds[agent] not in (None, False)
+
+    def threshold(self) -> float | None:
+        """
+        Returns:
+            float | None: The fuzzy matching threshold of the current agent, or None for exact matching.
+        """
+        setting = self.agent_thresholds.get(current_call_context().get("agent"))
+        if setting is True:
+            return self.cache.threshold
+        if setting in (None, False):
+            return None
+        return float(setting)
+
+    def get_completion(self, model: str, messages: list) -> str | None:
+        """
+        Returns:
+            str | None: The cached content for the request, or None.
+        """
+        threshold = self.threshold()
+        if threshold is None:
+            return self.exact.get(("completion", model), _serialize(messages))
+        namespace, text = self.completion_key(model, messages)
+        return self.cache.get(namespace, text, threshold)
+
+    def put_completion(self, model: str, messages: list, content: str) -> None:
+        if self.threshold() is None:
+            self.exact.put(("completion", model), _serialize(messages), content)
+        else:
+            namespace, text = self.completion_key(model, messages)
+            self.cache.put(namespace, text, content)
+
+    def get_tool(self, tool: str, arguments: dict) -> Any | None:
+        """
+        Returns:
+            Any | None: The cached result of the tool call, or None.
+        """
+        namespace, text = self.tool_key(tool, arguments)
+        if self.tool_threshold is None:
+            return self.exact.get(namespace, text)
+        return self.cache.get(namespace, text, self.tool_threshold)
+
+    def put_tool(self, tool: str, arguments: dict, result: Any) -> None:
+        namespace, text = self.tool_key(tool, arguments)
+        if self.tool_threshold is None:
+            self.exact.put(namespace, text, result)
+        else:
+            self.cache.put(namespace, text, result)
+
+    @staticmethod
+    def completion_key(model: str, messages: list) -> tuple[tuple, str]:
+        """
+        Splits a request into the text fuzzy matching compares, the subject set with
+        `cache_subject` or else the last user message, and a namespace: the model and a
+        hash of the rest of the request.
+
+        Returns:
+            tuple[tuple, str]: The namespace and the text.
+        """
+        serialized = _serialize(messages)
+        subject = _subject.get()
+        if subject and subject in serialized:
+            text, rest = subject, serialized.replace(subject, "\x00")
+        else:
+            last = max((i for i, m in enumerate(messages) if m.get("role") == "user"), default=None)
+            text = "" if last is None else str(messages[last].get("content", ""))
+            rest = _serialize(messages[:last] + messages[last + 1 :] if last is not None else messages)
+        return ("completion", model, hashlib.sha256(rest.encode("utf-8")).hexdigest()), text
+
+    @staticmethod
+    def tool_key(tool: str, arguments: dict) -> tuple[tuple, str]:
+        """
+        Returns:
+            tuple[tuple, str]: The namespace (the tool) and the text (its arguments) to match.
+        """
+        if not arguments:
+            return ("tool", tool), ""
+        text = " ".join(
+            f"{name}={json.dumps(value, sort_keys=True, default=str)}" for name, value in sorted(arguments.items())
+        )
+        return ("tool", tool), text
+
+    def clear(self) -> None:
+        self.cache.clear()
+        self.exact.clear()
+
+
+def _serialize(messages: list) -> str:
+    return json.dumps(list(messages), sort_keys=True, default=str, ensure_ascii=False)
+
+
+_policy: SemanticCachePolicy | None = None
+
+
+def configure_semantic_cache(
+    capacity: int = 100_000,
+    threshold: float = 0.99,
+    agent_thresholds: dict[str, float | bool | None] | None = None,
+    tool_threshold: float | None = None,
+    cache_tools: bool = True,
+    n_features: int = 512,
+) -> SemanticCachePolicy:
+    """
+    Enables a process-wide response cache for `completions_create` and tool results.
+
+    Requests are matched exactly unless their agent opts in to fuzzy matching.
+
+    Args:
+        capacity (int, optional): The maximum number of entries. Defaults to 100000.
+        threshold (float, optional): The minimum cosine similarity of a fuzzy hit, for agents
+            opted in with True. Defaults to 0.99.
+        agent_thresholds (dict[str, float | bool | None] | None, optional): Per agent name: a
+            threshold or True to opt in to fuzzy matching, None or False to opt out. Defaults to None.
+        tool_threshold (float | None, optional): The similarity threshold of tool arguments.
+            Defaults to None (exact arguments).
+        cache_tools (bool, optional): Whether the results of tools marked `@tool(cacheable=True)`
+            are cached. Defaults to True.
+        n_features (int, optional): The dimension of the embeddings. Defaults to 512.
+
+    Returns:
+        SemanticCachePolicy: The installed policy.
+    """
+    global _policy
+    _policy = SemanticCachePolicy(
+        SemanticCache(capacity, threshold, n_features), agent_thresholds, tool_threshold, cache_tools
+    )
+    return _policy
+
+
+def disable_semantic_cache() -> None:
+    """
+    Disables the semantic cache.
+    """
+    global _policy
+    _policy = None
+
+
+def get_semantic_cache() -> SemanticCachePolicy | None:
+    """
+    Returns:
+        SemanticCachePolicy | None: The process-wide semantic cache policy, if one is configured.
+    """
+    return _policy
@@ -0,0 +1,223 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+
+def request_key(model: str, messages: list) -> str:
+    """
+    Hashes a request, so that byte-identical requests share a key.
+
+    Args:
+        model (str): The model name.
+        messages (list): The messages to send.
+
+    Returns:
+        str: The hex digest of the request.
+    """
+    payload = json.dumps({"model": model, "messages": messages}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight requests: the first one is sent, the others wait for its result.
+
+    Within the process, followers wait on the future of the leader. When `lock_dir` is set,
+    processes on the same host also coordinate through one lock file per request: the process
+    holding the lock sends the request and leaves the result next to it, and the processes
+    that were blocked on the lock meanwhile read that result instead of sending their own request.
+
+    Results only serve the requests that were waiting while they were computed, so they are
+    removed once older than `result_ttl`, together with the lock files no process holds: the
+    directory does not grow and completions do not linger on disk. The sweep runs at most once
+    per `result_ttl` as requests come in, or on demand with `sweep`.
+
+    Args:
+        lock_dir (str | None, optional): A directory shared by the worker processes. Defaults to None
+            (coalescing within the process only).
+        result_ttl (float, optional): Seconds after which results and idle lock files are removed.
+            Defaults to 60.
+    """
+
+    def __init__(self, lock_dir: str | None = None, result_ttl: float = 60.0):
+        if lock_dir is not None:
+            if fcntl is None:
+                raise ValueError("Cross-process coalescing needs fcntl, which is not available on this platform")
+            os.makedirs(lock_dir, exist_ok=True)
+        self.lock_dir = lock_dir
+        self.result_ttl = result_ttl
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+
+    def do(self, key: str, fn: Callable[[], str]) -> tuple[str, bool]:
+        """
+        Runs `fn` unless an identical request is already in flight.
+
+        Args:
+            key (str): The request key, see `request_key`.
+            fn (Callable[[], str]): Sends the request and returns the completion.
+
+        Returns:
+            tuple[str, bool]: The completion, and whether it was shared from another request.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            if self.lock_dir is None:
+                result, shared = fn(), False
+            else:
+                result, shared = self._do_across_processes(key, fn)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, shared
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _do_across_processes(self, key: str, fn: Callable[[], str]) -> tuple[str, bool]:
+        lock_path = os.path.join(self.lock_dir, key + ".lock")
+        result_path = os.path.join(self.lock_dir, key + ".json")
+        arrived = time.time()
+        if arrived - self._last_sweep >= self.result_ttl:
+            self._last_sweep = arrived
+            self.sweep()
+        with self._locked(lock_path) as lock_file:
+            try:
+                result = self._read_result(result_path, since=arrived)
+                if result is not None:
+                    return result, True
+                result = fn()
+                temporary = f"{result_path}.{os.getpid()}.tmp"
+                with open(temporary, mode="w", encoding="utf-8") as file:
+                    json.dump({"content": result}, file)
+                os.replace(temporary, result_path)
+                return result, False
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def sweep(self) -> int:
+        """
+        Removes the results, and the lock files no process holds, older than `result_ttl`.
+
+        Returns:
+            int: The number of files removed.
+        """
+        if self.lock_dir is None:
+            return 0
+        removed = 0
+        expired = time.time() - self.result_ttl
+        for name in os.listdir(self.lock_dir):
+            path = os.path.join(self.lock_dir, name)
+            try:
+                if os.path.getmtime(path) > expired:
+                    continue
+                if name.endswith(".lock"):
+                    removed += self._remove_idle_lock(path)
+                elif name.endswith((".json", ".tmp")):
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    @staticmethod
+    def _remove_idle_lock(path: str) -> int:
+        with open(path, "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+            try:
+                if not _is_current(lock_file, path):
+                    return 0
+                os.remove(path)
+                return 1
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _locked(path: str):
+        """
+        Opens and locks the lock file at `path`. A sweep may remove the file between the open and
+        the lock, so the lock is only kept once it is held on the file currently at `path`.
+        """
+        while True:
+            lock_file = open(path, "a")
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if _is_current(lock_file, path):
+                return lock_file
+            lock_file.close()
+
+    def _read_result(self, path: str, since: float) -> str | None:
+        # Only a result written while this process was waiting on the lock was in flight.
+        try:
+            if os.path.getmtime(path) < since:
+                return None
+            with open(path, encoding="utf-8") as file:
+                return json.load(file)["content"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def _is_current(lock_file, path: str) -> bool:
+    try:
+        return os.fstat(lock_file.fileno()).st_ino == os.stat(path).st_ino
+    except FileNotFoundError:
+        return False
+
+
+_single_flight: SingleFlight | None = None
+
+
+def configure_single_flight(lock_dir: str | None = None, result_ttl: float = 60.0) -> SingleFlight:
+    """
+    Enables the coalescing of identical in-flight requests in `completions_create`.
+
+    Args:
+        lock_dir (str | None, optional): A directory shared by the worker processes of the host.
+            Defaults to None (coalescing within the process only).
+        result_ttl (float, optional): Seconds after which shared results and idle lock files are
+            removed from `lock_dir`. Defaults to 60.
+
+    Returns:
+        SingleFlight: The installed layer.
+    """
+    global _single_flight
+    _single_flight = SingleFlight(lock_dir, result_ttl)
+    return _single_flight
+
+
+def disable_single_flight() -> None:
+    """
+    Disables request coalescing.
+    """
+    global _single_flight
+    _single_flight = None
+
+
+def get_single_flight() -> SingleFlight | None:
+    """
+    Returns:
+        SingleFlight | None: The process-wide coalescing layer, if one is configured.
+    """
+    return _single_flight
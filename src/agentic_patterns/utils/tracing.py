@@ -0,0 +1,216 @@
+import atexit
+import itertools
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any
+
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """
+    A timed operation, nested under the span that was active when it started.
+
+    Attributes:
+        name (str): The name of the operation, e.g. "agent.run".
+        attributes (dict): Extra data attached to the span.
+        span_id (int): The identifier of the span.
+        parent_id (int | None): The identifier of the parent span.
+        start_ns (int): The start time, in nanoseconds of the tracer clock.
+        end_ns (int | None): The end time, once the span is closed.
+        thread_id (int): The identifier of the thread that opened the span.
+    """
+
+    __slots__ = ("name", "attributes", "span_id", "parent_id", "start_ns", "end_ns", "thread_id", "_tracer", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: dict):
+        self.name = name
+        self.attributes = attributes
+        self.span_id = next(_span_ids)
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.thread_id = threading.get_ident()
+        self.start_ns = 0
+        self.end_ns: int | None = None
+        self._tracer = tracer
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        _current_span.reset(self._token)
+        self._tracer._finish(self)
+
+
+class _NoopSpan:
+    """
+    The span returned while tracing is disabled. It does nothing.
+    """
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """
+    Collects finished spans and exports them in the Chrome trace event format.
+
+    The exported file can be opened in chrome://tracing or Perfetto. Every event carries its
+    span and parent identifiers, so the hierarchy can also be rebuilt OpenTelemetry-style.
+
+    Attributes:
+        enabled (bool): Whether spans are recorded.
+        path (str | None): The file spans are exported to at exit, if any.
+        spans (list[Span]): The finished spans.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path: str | None = None
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+        self._epoch_ns = time.perf_counter_ns()
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def to_chrome_trace(self) -> dict:
+        """
+        Returns:
+            dict: The finished spans as a Chrome trace document.
+        """
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        trace_events = [
+            {
+                "name": span.name,
+                "cat": span.name.split(".")[0],
+                "ph": "X",
+                "ts": (span.start_ns - self._epoch_ns) / 1000,
+                "dur": ((span.end_ns or span.start_ns) - span.start_ns) / 1000,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": {
+                    **{key: _jsonable(value) for key, value in span.attributes.items()},
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                },
+            }
+            for span in sorted(spans, key=lambda span: span.start_ns)
+        ]
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def export(self, path: str | None = None) -> str | None:
+        """
+        Writes the finished spans to a file.
+
+        Args:
+            path (str | None, optional): The output file. Defaults to the path given to `enable_tracing`.
+
+        Returns:
+            str | None: The path written to, or None when there is no path.
+        """
+        path = path or self.path
+        if path is None:
+            return None
+        with open(path, mode="w", encoding="utf-8") as file:
+            json.dump(self.to_chrome_trace(), file)
+        return path
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+
+_tracer = Tracer()
+
+
+def span(name: str, **attributes: Any):
+    """
+    Opens a span around a block of code.
+
+    When tracing is disabled a shared no-op object is returned, so instrumented code
+    costs one attribute lookup.
+
+    Args:
+        name (str): The name of the operation.
+        **attributes: Extra data attached to the span.
+
+    Returns:
+        Span: A context manager.
+    """
+    if not _tracer.enabled:
+        return _NOOP_SPAN
+    return Span(_tracer, name, attributes)
+
+
+def enable_tracing(path: str | None = None) -> Tracer:
+    """
+    Starts recording spans.
+
+    Args:
+        path (str | None, optional): A file the spans are exported to when the process exits.
+
+    Returns:
+        Tracer: The process-wide tracer.
+    """
+    _tracer.path = path or _tracer.path
+    _tracer.enabled = True
+    return _tracer
+
+
+def disable_tracing() -> Tracer:
+    """
+    Stops recording spans. Already finished spans are kept.
+
+    Returns:
+        Tracer: The process-wide tracer.
+    """
+    _tracer.enabled = False
+    return _tracer
+
+
+def get_tracer() -> Tracer:
+    """
+    Returns:
+        Tracer: The process-wide tracer.
+    """
+    return _tracer
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+atexit.register(lambda: _tracer.export() if _tracer.spans else None)
+
+if os.getenv("AGENTVERSE_TRACE"):
+    enable_tracing(os.environ["AGENTVERSE_TRACE"])
@@ -0,0 +1,63 @@
+from agentic_patterns.planning_pattern.react_agent import ReactAgent
+from agentic_patterns.tool_pattern.tool import tool
+from agentic_patterns.utils.events import configure_events
+from agentic_patterns.utils.metrics import CallMetrics
+from agentic_patterns.utils.metrics import collect_calls
+from agentic_patterns.utils.mock_backend import MockChatClient
+
+# Shows the mechanics of the XML tool protocol and of native function calling on the local mock
+# backend. Both modes play the same scripted session, so both take the same number of rounds by
+# construction: the table shows how prompt and completion tokens differ, and how many sloppy
+# <tool_call> blocks the XML mode repaired. It says nothing about how a real model behaves.
+
+
+@tool
+def sum_two_elements(a: int, b: int) -> int:
+    """
+    Computes the sum of two integers.
+
+    Args:
+        a (int): The first integer to be summed.
+        b (int): The second integer to be summed.
+
+    Returns:
+        int: The sum of `a` and `b`.
+    """
+    return a + b
+
+
+@tool
+def multiply_two_elements(a: int, b: int) -> int:
+    """
+    Multiplies two integers.
+
+    Args:
+        a (int): The first integer to multiply.
+        b (int): The second integer to multiply.
+
+    Returns:
+        int: The product of `a` and `b`.
+    """
+    return a * b
+
+
+script = [
+    [("sum_two_elements", {"a": 1234, "b": 5678})],
+    [("multiply_two_elements", {"a": 6912, "b": 5})],
+]
+configure_events(sinks=[])
+
+question = "I want to calculate the sum of 1234 and 5678 and multiply the result by 5."
+
+print("Scripted demo on the mock backend: the rounds are fixed by the script, not chosen by a model.\n")
+print(f"{'mode':<8} {'rounds':>6} {'prompt tokens':>14} {'completion tokens':>18} {'repaired calls':>15}")
+for mode in ("xml", "native"):
+    client = MockChatClient(script, answer="The result is 34560", malformed_rate=0.8)
+    agent = ReactAgent(tools=[sum_two_elements, multiply_two_elements], client=client, function_calling=mode)
+    with collect_calls() as records:
+        agent.run(user_msg=question)
+    calls = [record for record in records if isinstance(record, CallMetrics)]
+    print(
+        f"{mode:<8} {len(calls):>6} {sum(c.prompt_tokens for c in calls):>14}"
+        f" {sum(c.completion_tokens for c in calls):>18} {client.malformed_calls:>15}"
+    )
@@ -211,27 +211,25 @@ transcript_context += f"**Roastmaster Randy 'The Gavel' Gupta:**\n{roastmaster_i
 
 # Round 1: Modi roasts Trump
 print("\n🇮🇳 NARENDRA MODI'S TURN (Roasting Trump):")
-# Modify Modi's task for this specific round if necessary (or assume context is enough)
-# For this example, we assume the initial task_description is general enough,
-# and the Roastmaster's output provides the specific target in the context.
-# If Agent.run() re-uses the initial task_description, we'd need to update it.
-# Let's assume Agent.create_prompt() uses the current context well.
-modi_agent.context = roastmaster_intro # Give Modi the cue
-modi_roast_trump = modi_agent.run()
+# The initial task_description is general enough; the Roastmaster's output provides the target.
+# Passing context to run() builds the prompt from it without mutating the agent.
+modi_roast_trump = modi_agent.run(context=roastmaster_intro) # Give Modi the cue
 print(modi_roast_trump)
 transcript_context += f"**Narendra 'Zen Master' Modi (roasting Donald Trump):**\n{modi_roast_trump}\n\n"
 
 # Round 2: Trump roasts Sharif
 print("\n🇺🇸 DONALD TRUMP'S TURN (Roasting Sharif):")
-trump_agent.context = f"Roastmaster says: Next up, Donald, you're roasting Shehbaz Sharif! Your previous roast received: {modi_roast_trump}" # Give Trump context
-trump_roast_sharif = trump_agent.run()
+trump_roast_sharif = trump_agent.run(
+    context=f"Roastmaster says: Next up, Donald, you're roasting Shehbaz Sharif! Your previous roast received: {modi_roast_trump}" # Give Trump context
+)
 print(trump_roast_sharif)
 transcript_context += f"**Donald 'The Great' Trump (roasting Shehbaz Sharif):**\n{trump_roast_sharif}\n\n"
 
 # Round 3: Sharif roasts Modi
 print("\n🇵🇰 SHEHBAZ SHARIF'S TURN (Roasting Modi):")
-sharif_agent.context = f"Roastmaster says: Shehbaz, your turn to roast Narendra Modi! The previous roast was: {trump_roast_sharif}" # Give Sharif context
-sharif_roast_modi = sharif_agent.run()
+sharif_roast_modi = sharif_agent.run(
+    context=f"Roastmaster says: Shehbaz, your turn to roast Narendra Modi! The previous roast was: {trump_roast_sharif}" # Give Sharif context
+)
 print(sharif_roast_modi)
 transcript_context += f"**Shehbaz 'The Diplomat' Sharif (roasting Narendra Modi):**\n{sharif_roast_modi}\n\n"
 
@@ -244,25 +242,28 @@ transcript_context += f"**Roastmaster Randy (Rebuttals):**\n{rebuttal_intro}\n\n
 
 # Modi's Rebuttal
 print("\n🇮🇳 MODI'S REBUTTAL:")
-modi_agent.task_description = f"You've been roasted by Shehbaz Sharif. Deliver a calm, philosophical, and witty 2-3 sentence final rebuttal. Original bio and recent events context still applies: \n{RECENT_EVENTS_CONTEXT}" # Update task for rebuttal
-modi_agent.context = f"The roasts you received: \nShehbaz said: '{sharif_roast_modi}'"
-modi_rebuttal = modi_agent.run()
+modi_rebuttal = modi_agent.run(
+    task=f"You've been roasted by Shehbaz Sharif. Deliver a calm, philosophical, and witty 2-3 sentence final rebuttal. Original bio and recent events context still applies: \n{RECENT_EVENTS_CONTEXT}", # Task for rebuttal
+    context=f"The roasts you received: \nShehbaz said: '{sharif_roast_modi}'",
+)
 print(modi_rebuttal)
 transcript_context += f"**Narendra Modi (Final Rebuttal):**\n{modi_rebuttal}\n\n"
 
 # Trump's Rebuttal
 print("\n🇺🇸 TRUMP'S REBUTTAL:")
-trump_agent.task_description = f"You've been roasted by Narendra Modi. This is your chance for the GREATEST rebuttal ever. 2-3 sentences. Make it tremendous! Original bio and recent events context still applies: \n{RECENT_EVENTS_CONTEXT}"
-trump_agent.context = f"The roasts you received: \nModi said: '{modi_roast_trump}'"
-trump_rebuttal = trump_agent.run()
+trump_rebuttal = trump_agent.run(
+    task=f"You've been roasted by Narendra Modi. This is your chance for the GREATEST rebuttal ever. 2-3 sentences. Make it tremendous! Original bio and recent events context still applies: \n{RECENT_EVENTS_CONTEXT}",
+    context=f"The roasts you received: \nModi said: '{modi_roast_trump}'",
+)
 print(trump_rebuttal)
 transcript_context += f"**Donald Trump (Final Rebuttal):**\n{trump_rebuttal}\n\n"
 
 # Sharif's Rebuttal
 print("\n🇵🇰 SHARIF'S REBUTTAL:")
-sharif_agent.task_description = f"You've been roasted by Donald Trump. Offer a polite, diplomatic, yet subtly cutting 2-3 sentence final rebuttal. Original bio and recent events context still applies: \n{RECENT_EVENTS_CONTEXT}"
-sharif_agent.context = f"The roasts you received: \nTrump said: '{trump_roast_sharif}'"
-sharif_rebuttal = sharif_agent.run()
+sharif_rebuttal = sharif_agent.run(
+    task=f"You've been roasted by Donald Trump. Offer a polite, diplomatic, yet subtly cutting 2-3 sentence final rebuttal. Original bio and recent events context still applies: \n{RECENT_EVENTS_CONTEXT}",
+    context=f"The roasts you received: \nTrump said: '{trump_roast_sharif}'",
+)
 print(sharif_rebuttal)
 transcript_context += f"**Shehbaz Sharif (Final Rebuttal):**\n{sharif_rebuttal}\n\n"
 
@@ -270,8 +271,7 @@ transcript_context += f"**Shehbaz Sharif (Final Rebuttal):**\n{sharif_rebuttal}\
 print("\n--- WRITING TRANSCRIPT ---")
 # The transcript_taker agent's task_description is general enough.
 # We need to ensure its context contains all the roast segments.
-transcript_taker.context = transcript_context
-transcript_output = transcript_taker.run()
+transcript_output = transcript_taker.run(context=transcript_context)
 print(transcript_output) # This will likely be the confirmation from write_str_to_markdown
 
 print("\n--- U.N. Comedy Clash Complete! ---")
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+# Agents build a Groq client on construction; the tests replace it with a mock.
+os.environ.setdefault("GROQ_API_KEY", "test")
+
+from agentic_patterns.utils import events  # noqa: E402
+from agentic_patterns.utils.metrics import get_metrics_registry  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def quiet_events():
+    events.configure_events(sinks=[])
+    yield
+    events.configure_events(sinks=[])
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    get_metrics_registry().reset()
+    yield
@@ -0,0 +1,96 @@
+import itertools
+
+from agentic_patterns.planning_pattern.react_agent import ReactAgent
+from agentic_patterns.tool_pattern.tool import tool
+from agentic_patterns.utils.compaction import RollingSummary
+from agentic_patterns.utils.compaction import SUMMARY_SYSTEM_PROMPT
+from agentic_patterns.utils.mock_backend import MockChatClient
+from agentic_patterns.utils.scheduler import estimate_tokens
+
+
+@tool
+def fetch(i: int) -> str:
+    """
+    Fetches a record.
+
+    Args:
+        i (int): The record number.
+    """
+    return f"record {i}: " + "data " * 200
+
+
+def is_summary_request(messages):
+    return messages[0]["content"] == SUMMARY_SYSTEM_PROMPT
+
+
+def answer(messages):
+    return "the summary" if is_summary_request(messages) else "ok"
+
+
+class FailingSummaries(MockChatClient):
+    def create(self, messages, model, tools=None, **kwargs):
+        if is_summary_request(messages):
+            self.requests.append({"messages": list(messages), "model": model, "tools": tools})
+            raise RuntimeError("summary failed")
+        return super().create(messages, model, tools, **kwargs)
+
+
+class CountingClient(MockChatClient):
+    """Plays one call per request, counting requests rather than the assistant messages compaction removes."""
+
+    def __init__(self, rounds):
+        super().__init__([], answer=answer)
+        self.rounds = itertools.count()
+        self.total = rounds
+
+    def create(self, messages, model, tools=None, **kwargs):
+        if not is_summary_request(messages):
+            i = next(self.rounds)
+            self.script = [[("fetch", {"i": i})]] * (len(messages) + 1) if i < self.total else []
+        return super().create(messages, model, tools, **kwargs)
+
+
+def history(n):
+    messages = [{"role": "system", "content": "system"}, {"role": "user", "content": "question"}]
+    return messages + [{"role": "user", "content": f"turn {i} " + "words " * 100} for i in range(n)]
+
+
+def summary_requests(client):
+    return [request for request in client.requests if is_summary_request(request["messages"])]
+
+
+def test_old_turns_are_replaced_by_a_labelled_system_summary():
+    client = MockChatClient([], answer=answer)
+    compaction = RollingSummary(max_tokens=500, keep_last=2, background=False).bind(client, "m")
+    messages = history(6)
+    compaction.update(messages)
+    assert [m["content"] for m in messages[:2]] == ["system", "question"]
+    assert messages[2]["role"] == "system"
+    assert "<summary>the summary</summary>" in messages[2]["content"]
+    assert "not a new request from the user" in messages[2]["content"]
+    assert messages[3:] == history(6)[-2:]
+
+
+def test_failed_summaries_back_off():
+    client = FailingSummaries([], answer="ok")
+    compaction = RollingSummary(max_tokens=500, keep_last=2, background=False, retry_after=2).bind(client, "m")
+    messages = history(6)
+    compaction.update(messages)
+    assert len(summary_requests(client)) == 1
+
+    # Retried after 2 more messages, then after 4 more.
+    for expected in (1, 2, 2, 2, 2, 3):
+        messages.append({"role": "user", "content": "more " * 100})
+        compaction.update(messages)
+        assert len(summary_requests(client)) == expected
+
+
+def test_react_runs_stay_bounded():
+    client = CountingClient(12)
+    agent = ReactAgent([fetch], client=client, compaction=RollingSummary(max_tokens=1500, background=False))
+    assert agent.run("Fetch everything.", max_rounds=15) == "ok"
+    sizes = [estimate_tokens(r["messages"]) for r in client.requests if not is_summary_request(r["messages"])]
+    assert max(sizes) < 2500
+    assert summary_requests(client)
+    # Later summaries fold in the earlier one.
+    assert "<summary>the summary</summary>" in summary_requests(client)[-1]["messages"][1]["content"]
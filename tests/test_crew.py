@@ -0,0 +1,148 @@
+import re
+
+import pytest
+
+pytest.importorskip("graphviz")
+
+from agentic_patterns.multiagent_pattern.agent import Agent
+from agentic_patterns.multiagent_pattern.crew import Crew
+from agentic_patterns.multiagent_pattern.router import Router
+from agentic_patterns.utils.mock_backend import MockChatClient
+
+
+def make_agent(name, answer=None, **kwargs):
+    agent = Agent(name=name, backstory=f"You are {name}.", task_description=f"Task of {name}.", **kwargs)
+    agent.react_agent.client = MockChatClient([], answer=answer or f"output of {name}")
+    return agent
+
+
+def test_plan_orders_agents_and_groups_levels():
+    with Crew() as crew:
+        a, b, c, d = (make_agent(name) for name in "abcd")
+        a >> [b, c]
+        [b, c] >> d
+    plan = crew.compile()
+    assert plan.sorted_agents() == [a, b, c, d]
+    assert plan.agent_levels() == [[a], [b, c], [d]]
+    assert len(plan.critical_agents()) == 3
+
+
+def test_plan_is_cached_until_the_crew_graph_changes():
+    with Crew() as crew:
+        a, b = make_agent("a"), make_agent("b")
+    plan = crew.compile()
+    assert crew.compile() is plan
+    a >> b
+    rebuilt = crew.compile()
+    assert rebuilt is not plan
+    assert rebuilt.sorted_agents() == [a, b]
+
+
+def test_edges_of_other_crews_keep_the_plan():
+    with Crew() as crew:
+        make_agent("a")
+    plan = crew.compile()
+    with Crew():
+        make_agent("x") >> make_agent("y")
+    assert crew.compile() is plan
+
+
+def test_cycles_are_reported_with_their_path():
+    with Crew() as crew:
+        a, b, c = (make_agent(name) for name in "abc")
+        a >> b >> c >> a
+    with pytest.raises(ValueError, match="a -> b -> c -> a|b -> c -> a -> b|c -> a -> b -> c"):
+        crew.compile()
+
+
+def test_dependencies_outside_the_crew_are_rejected():
+    outsider = make_agent("outsider")
+    with Crew() as crew:
+        outsider >> make_agent("a")
+    with pytest.raises(ValueError, match="not part of this crew"):
+        crew.compile()
+
+
+def test_run_passes_outputs_as_context():
+    with Crew() as crew:
+        a, b = make_agent("a"), make_agent("b")
+        a >> b
+    outputs = crew.run()
+    assert outputs == {"a": "output of a", "b": "output of b"}
+    prompt = b.react_agent.client.requests[0]["messages"][-1]["content"]
+    assert "output of a" in prompt
+
+
+def test_conditions_are_evaluated_once_and_prune_branches():
+    calls = []
+
+    def condition(output):
+        calls.append(output)
+        return False
+
+    with Crew() as crew:
+        a, b, c = make_agent("a"), make_agent("b"), make_agent("c")
+        a.add_dependent(b, condition=condition)
+        b >> c
+    outputs = crew.run()
+    assert list(outputs) == ["a"]
+    assert crew.skipped == [b, c]
+    assert calls == ["output of a"]
+
+
+def test_router_runs_the_chosen_branch_only():
+    with Crew() as crew:
+        refund, bug = make_agent("refund"), make_agent("bug")
+        router = Router(
+            name="router",
+            backstory="You triage tickets.",
+            task_description="Route the ticket.",
+            routes={"refund": refund, "bug": bug},
+        )
+        router.react_agent.client = MockChatClient([], answer="<route>bug</route>")
+        router.recieve_context("The app crashes on start.")
+    outputs = crew.run()
+    assert outputs["router"] == "bug"
+    assert "bug" in outputs and "refund" not in outputs
+    # The branch receives the router's context, not its decision.
+    assert "The app crashes on start." in bug.react_agent.client.requests[0]["messages"][-1]["content"]
+
+
+def test_router_falls_back_to_the_default_route():
+    with Crew() as crew:
+        refund, bug = make_agent("refund"), make_agent("bug")
+        router = Router(
+            name="router",
+            backstory="You triage tickets.",
+            task_description="Route the ticket.",
+            routes={"refund": refund, "bug": bug},
+            default_route="refund",
+        )
+        router.react_agent.client = MockChatClient([], answer="no idea")
+    assert list(crew.run()) == ["router", "refund"]
+
+
+def test_map_keeps_item_order():
+    with Crew() as crew:
+        template = make_agent("echo", answer=lambda messages: re.search(r"item-\d", messages[-1]["content"])[0])
+        mapped = crew.map(template, ["item-1", "item-2", "item-3"], max_concurrency=3)
+        reducer = make_agent("reducer")
+        mapped >> reducer
+    outputs = crew.run()
+    assert template not in crew.agents
+    assert mapped.outputs == ["item-1", "item-2", "item-3"]
+    assert "reducer" in outputs
+
+
+def test_map_calls_are_profiled_on_the_map_step():
+    with Crew() as crew:
+        template = make_agent("echo", answer="ok")
+        mapped = crew.map(template, ["a", "b", "c"], max_concurrency=3)
+        reducer = make_agent("reducer")
+        mapped >> reducer
+    crew.run()
+    profiles = {profile.name: profile for profile in crew.last_profile.agents}
+    assert profiles[mapped.name].llm_calls == 3
+    assert profiles[mapped.name].prompt_tokens > 0
+    assert profiles["reducer"].llm_calls == 1
+    assert "echo" not in profiles
@@ -0,0 +1,186 @@
+import multiprocessing
+import re
+import sqlite3
+import threading
+
+import pytest
+
+from agentic_patterns.multiagent_pattern.agent import Agent
+from agentic_patterns.multiagent_pattern.crew import Crew
+from agentic_patterns.multiagent_pattern.distributed import AgentResult
+from agentic_patterns.multiagent_pattern.distributed import AgentSpec
+from agentic_patterns.multiagent_pattern.distributed import AgentTask
+from agentic_patterns.multiagent_pattern.distributed import DistributedCrew
+from agentic_patterns.multiagent_pattern.distributed import QueueBroker
+from agentic_patterns.multiagent_pattern.distributed import run_worker
+from agentic_patterns.multiagent_pattern.distributed import SQLiteBroker
+from agentic_patterns.planning_pattern import react_agent
+from agentic_patterns.tool_pattern.observations import ObservationPolicy
+from agentic_patterns.tool_pattern.observations import READ_ARTIFACT
+from agentic_patterns.tool_pattern.tool import NATIVE
+from agentic_patterns.tool_pattern.tool import tool
+from agentic_patterns.utils.compaction import RollingSummary
+from agentic_patterns.utils.mock_backend import MockChatClient
+
+
+@tool
+def shout(text: str) -> str:
+    """
+    Shouts the text.
+
+    Args:
+        text (str): The text.
+    """
+    return text.upper()
+
+
+@tool(observation=ObservationPolicy(max_chars=100))
+def whisper(text: str) -> str:
+    """
+    Whispers the text.
+
+    Args:
+        text (str): The text.
+    """
+    return text.lower()
+
+
+def make_agent(tools):
+    return Agent(name="agent", backstory="You help.", task_description="Help.", tools=tools)
+
+
+def test_module_level_tools_are_sent_by_path():
+    spec = AgentSpec.from_agent(make_agent([shout]))
+    assert spec.tools == (f"{__name__}:shout",)
+    assert spec.build().react_agent.tools == [shout]
+
+
+def test_react_settings_are_sent_and_the_artifact_tool_rebuilt():
+    agent = make_agent([whisper])
+    agent.react_agent = react_agent.ReactAgent(
+        [whisper],
+        client=MockChatClient([], answer="ok"),
+        function_calling=NATIVE,
+        observation_policy=ObservationPolicy(max_chars=200),
+        compaction=RollingSummary(max_tokens=1000, client=MockChatClient([], answer="summary")),
+    )
+    spec = AgentSpec.from_agent(agent)
+    assert spec.tools == (f"{__name__}:whisper",)
+    assert spec.compaction.client is None
+
+    built = spec.build().react_agent
+    assert [tool.name for tool in built.tools] == ["whisper", READ_ARTIFACT]
+    assert built.artifact_store is not None
+    assert built.function_calling == NATIVE
+    assert built.observation_policy == ObservationPolicy(max_chars=200)
+    assert built.compaction.max_tokens == 1000
+
+
+def test_tools_built_at_run_time_are_rejected():
+    def make_tool(suffix):
+        @tool
+        def shout(text: str) -> str:
+            """
+            Shouts the text.
+
+            Args:
+                text (str): The text.
+            """
+            return text.upper() + suffix
+
+        return shout
+
+    with pytest.raises(ValueError, match="cannot be sent to a worker"):
+        AgentSpec.from_agent(make_agent([make_tool("!")]))
+
+
+def test_results_go_to_the_run_that_sent_the_task(tmp_path):
+    for broker in (QueueBroker(), SQLiteBroker(str(tmp_path / "broker.db"), poll_interval=0.01)):
+        broker.put_result(AgentResult(task_id="1", output="a", run_id="a"))
+        broker.put_result(AgentResult(task_id="2", output="b", run_id="b"))
+        assert broker.get_result("b", timeout=1).output == "b"
+        assert broker.get_result("a", timeout=1).output == "a"
+        assert broker.get_result("a", timeout=0.05) is None
+
+
+@pytest.mark.parametrize("kind", ["queue", "sqlite"])
+def test_coordinators_share_a_broker(kind, tmp_path, monkeypatch):
+    def answer(messages):
+        return "done " + re.search(r"Task of (\w+)", messages[-1]["content"]).group(1)
+
+    # Workers build their agents, and their clients, from the specs.
+    monkeypatch.setattr(react_agent, "Groq", lambda: MockChatClient([], answer=answer, latency=0.01))
+    broker = QueueBroker() if kind == "queue" else SQLiteBroker(str(tmp_path / "broker.db"), poll_interval=0.01)
+
+    crews = []
+    for prefix in "xy":
+        with Crew() as crew:
+            first, second, third = (
+                Agent(name=f"{prefix}{i}", backstory="You help.", task_description=f"Task of {prefix}{i}.")
+                for i in range(3)
+            )
+            first >> second >> third
+        crews.append(crew)
+
+    stop = threading.Event()
+    workers = [threading.Thread(target=run_worker, args=(broker, 0.05), kwargs={"stop": stop}) for _ in range(2)]
+    runs = {}
+    coordinators = [
+        threading.Thread(target=lambda c=crew: runs.setdefault(c, c.run_distributed(broker, processes=0, timeout=10)))
+        for crew in crews
+    ]
+    for thread in workers + coordinators:
+        thread.start()
+    for thread in coordinators:
+        thread.join(timeout=20)
+    stop.set()
+    for thread in workers:
+        thread.join(timeout=2)
+
+    for prefix, crew in zip("xy", crews):
+        assert runs[crew].outputs == {f"{prefix}{i}": f"done {prefix}{i}" for i in range(3)}
+
+
+def test_sqlite_broker_deletes_claimed_rows(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / "broker.db"), poll_interval=0.01)
+    broker.put_task(AgentTask(task_id="1"))
+    broker.put_result(AgentResult(task_id="1", output="ok"))
+    assert broker.get_task(timeout=0).task_id == "1"
+    assert broker.get_result("", timeout=0).output == "ok"
+    assert broker.get_task(timeout=0) is None
+    with sqlite3.connect(broker.path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM tasks").fetchone() == (0,)
+        assert conn.execute("SELECT COUNT(*) FROM results").fetchone() == (0,)
+
+
+def test_workers_stop_on_their_own_event(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / "broker.db"), poll_interval=0.01)
+    mine, other = threading.Event(), threading.Event()
+    done = {}
+    threads = [
+        threading.Thread(target=lambda e=event, k=key: done.setdefault(k, run_worker(broker, 0.05, stop=e)))
+        for key, event in (("mine", mine), ("other", other))
+    ]
+    for thread in threads:
+        thread.start()
+    mine.set()
+    threads[0].join(timeout=2)
+    assert "mine" in done
+    assert threads[1].is_alive()
+    other.set()
+    threads[1].join(timeout=2)
+
+
+def test_a_dead_worker_fails_the_run(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / "broker.db"), poll_interval=0.01)
+    worker = multiprocessing.get_context("fork").Process(target=lambda: None)
+    worker.start()
+    worker.join()
+    with pytest.raises(RuntimeError, match="exited with code 0"):
+        DistributedCrew(crew=None, broker=broker)._next_result("run", timeout=5, workers=[worker])
+
+
+def test_results_time_out(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / "broker.db"), poll_interval=0.01)
+    with pytest.raises(TimeoutError):
+        DistributedCrew(crew=None, broker=broker)._next_result("run", timeout=0.05, workers=[])
@@ -0,0 +1,79 @@
+import json
+import threading
+import time
+
+from agentic_patterns.utils import events
+from agentic_patterns.utils.events import configure_events
+from agentic_patterns.utils.events import JSONLSink
+from agentic_patterns.utils.events import QueueSink
+
+
+def test_events_reach_the_jsonl_sink_after_flush(tmp_path):
+    sink = JSONLSink(str(tmp_path / "events.jsonl"))
+    bus = configure_events([sink], level=events.DEBUG)
+    events.emit(events.TOOL_CALL, events.DEBUG, tool="lookup", call={"city": "Paris"})
+    events.emit(events.STOPPED, reason="answered", rounds=2)
+    bus.flush()
+    configure_events([])
+    sink.close()
+
+    lines = [json.loads(line) for line in (tmp_path / "events.jsonl").read_text().splitlines()]
+    assert [(line["type"], line["level"]) for line in lines] == [("tool_call", events.DEBUG), ("stopped", events.INFO)]
+    assert lines[0]["payload"] == {"tool": "lookup", "call": {"city": "Paris"}}
+    assert lines[1]["thread"] == threading.current_thread().name
+
+
+def test_levels_filter_events_on_the_bus_and_the_sinks():
+    everything, warnings = QueueSink(), QueueSink(level=events.WARNING)
+    bus = configure_events([everything, warnings], level=events.INFO)
+    events.emit(events.ROUND, events.DEBUG, round=0)
+    events.emit(events.STOPPED, reason="answered")
+    events.emit(events.RETRY, events.WARNING, attempt=1)
+    bus.flush()
+    assert [event.type for event in everything.drain()] == ["stopped", "retry"]
+    assert [event.type for event in warnings.drain()] == ["retry"]
+    assert everything.drain() == []
+
+
+def test_events_of_every_thread_reach_the_queue_sink():
+    sink = QueueSink()
+    bus = configure_events([sink], level=events.DEBUG)
+    threads = [
+        threading.Thread(target=lambda i=i: [events.emit(events.ROUND, events.DEBUG, thread=i, round=r) for r in range(50)])
+        for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    bus.flush()
+    received = sink.drain()
+    assert len(received) == 200
+    for i in range(4):
+        assert [event.payload["round"] for event in received if event.payload["thread"] == i] == list(range(50))
+
+
+def test_full_queue_sinks_drop_events():
+    sink = QueueSink(maxsize=2)
+    bus = configure_events([sink])
+    for i in range(5):
+        events.emit(events.STOPPED, rounds=i)
+    bus.flush()
+    assert [event.payload["rounds"] for event in sink.drain()] == [0, 1]
+
+
+def test_slow_and_failing_sinks_do_not_block_the_emitter():
+    received = QueueSink()
+
+    def slow(event):
+        time.sleep(0.2)
+
+    def failing(event):
+        raise RuntimeError("sink down")
+
+    bus = configure_events([slow, failing, received])
+    start = time.perf_counter()
+    events.emit(events.STOPPED, reason="answered")
+    assert time.perf_counter() - start < 0.1
+    bus.flush()
+    assert [event.type for event in received.drain()] == ["stopped"]
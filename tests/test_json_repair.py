@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from agentic_patterns.utils.json_repair import loads_lenient
+
+CALL = {"name": "lookup", "arguments": {"city": "Paris", "days": 3}}
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '{"name": "lookup", "arguments": {"city": "Paris", "days": 3}}',
+        '{"name": "lookup", "arguments": {"city": "Paris", "days": 3,},}',
+        "{'name': 'lookup', 'arguments': {'city': 'Paris', 'days': 3}}",
+        "{'name': 'lookup', 'arguments': {'city': 'Paris', 'days': 3,},}",
+        '{name: "lookup", arguments: {city: "Paris", days: 3}}',
+        '{"name": "lookup", "arguments": {"city": "Paris", "days": 3',
+        '{"name": "lookup", "arguments": {"city": "Paris", "days": 3}, ',
+        '```json\n{"name": "lookup", "arguments": {"city": "Paris", "days": 3}}\n```',
+        'Here is the call: {"name": "lookup", "arguments": {"city": "Paris", "days": 3}} Done.',
+    ],
+    ids=[
+        "valid",
+        "trailing commas",
+        "single quotes",
+        "single quotes and trailing commas",
+        "unquoted keys",
+        "truncated object",
+        "truncated after a comma",
+        "code fence",
+        "surrounding prose",
+    ],
+)
+def test_repairs_common_mistakes(text):
+    assert loads_lenient(text) == CALL
+
+
+def test_truncated_string_is_closed():
+    assert loads_lenient('{"name": "lookup", "arguments": {"city": "Par') == {
+        "name": "lookup",
+        "arguments": {"city": "Par"},
+    }
+
+
+def test_python_literals():
+    assert loads_lenient("{flag: True, other: None,}") == {"flag": True, "other": None}
+
+
+def test_quotes_inside_strings_survive():
+    assert loads_lenient("{'text': 'He said \"hi\"'}") == {"text": 'He said "hi"'}
+
+
+def test_unrepairable_text_raises():
+    with pytest.raises(json.JSONDecodeError):
+        loads_lenient("no json here")
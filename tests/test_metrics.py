@@ -0,0 +1,62 @@
+import pytest
+
+from agentic_patterns.utils import metrics
+from agentic_patterns.utils.completions import completions_create
+from agentic_patterns.utils.metrics import collect_calls
+from agentic_patterns.utils.metrics import configure_prices
+from agentic_patterns.utils.metrics import format_summary
+from agentic_patterns.utils.metrics import get_metrics_registry
+from agentic_patterns.utils.metrics import metrics_context
+from agentic_patterns.utils.metrics import record_completion
+from agentic_patterns.utils.metrics import summarize_calls
+from agentic_patterns.utils.mock_backend import MockChatClient
+
+
+class Usage:
+    def __init__(self, prompt_tokens, completion_tokens):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+
+class Response:
+    def __init__(self, prompt_tokens, completion_tokens):
+        self.usage = Usage(prompt_tokens, completion_tokens)
+
+
+@pytest.fixture(autouse=True)
+def default_prices(monkeypatch):
+    monkeypatch.setattr(metrics, "_prices", dict(metrics.DEFAULT_PRICES))
+
+
+def test_calls_are_priced_per_model():
+    configure_prices({"m": (1.0, 2.0)})
+    call = record_completion("m", Response(1_000_000, 500_000), 0.1)
+    assert call.cost == pytest.approx(2.0)
+    assert get_metrics_registry().total_cost() == pytest.approx(2.0)
+
+
+def test_unknown_models_have_no_cost():
+    call = record_completion("unpriced", Response(100, 100), 0.1)
+    assert call.cost is None
+    assert get_metrics_registry().total_cost() == 0.0
+    assert "llm_cost_usd_total{" not in get_metrics_registry().to_prometheus()
+
+
+def test_cache_hits_are_free():
+    configure_prices({"m": (1.0, 2.0)})
+    assert record_completion("m", None, 0.0, cache_hit=True).cost == 0.0
+
+
+def test_cost_is_reported_per_agent():
+    configure_prices({"m": (1.0, 1.0)})
+    client = MockChatClient([], answer="x" * 400)
+    with collect_calls() as calls:
+        for agent in ("writer", "critic"):
+            with metrics_context(agent=agent):
+                completions_create(client, [{"role": "user", "content": "y" * 400}], "m")
+    usage = {entry.agent: entry for entry in summarize_calls(calls)}
+    writer = [call for call in calls if call.agent == "writer"][0]
+    assert usage["writer"].cost == pytest.approx((writer.prompt_tokens + writer.completion_tokens) / 1_000_000)
+    assert get_metrics_registry().total_cost(agent="critic") == pytest.approx(usage["critic"].cost)
+    assert "cost $" in format_summary(list(usage.values()))
+    assert 'llm_cost_usd_total{model="m",agent="writer"}' in get_metrics_registry().to_prometheus()
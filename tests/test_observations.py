@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+
+import pytest
+
+from agentic_patterns.planning_pattern.react_agent import ReactAgent
+from agentic_patterns.tool_pattern.observations import ArtifactStore
+from agentic_patterns.tool_pattern.observations import HEAD
+from agentic_patterns.tool_pattern.observations import ObservationPolicy
+from agentic_patterns.tool_pattern.observations import read_artifact_tool
+from agentic_patterns.tool_pattern.observations import select_fields
+from agentic_patterns.tool_pattern.observations import TAIL
+from agentic_patterns.tool_pattern.observations import truncate
+from agentic_patterns.tool_pattern.tool import tool
+from agentic_patterns.utils.mock_backend import MockChatClient
+
+REPORT = "".join(f"line {i:04d}\n" for i in range(1000))
+
+
+@tool
+def report() -> str:
+    """
+    Returns the full report.
+    """
+    return REPORT
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path))
+
+
+def test_truncation_modes():
+    text = "a" * 50 + "b" * 50
+    assert truncate(text, 10, HEAD) == "a" * 10 + " [...]"
+    assert truncate(text, 10, TAIL) == "[...] " + "b" * 10
+    assert truncate(text, 9) == "a" * 6 + " [...] " + "b" * 3
+    assert truncate(text, 100) == text
+
+
+def test_field_selection_traverses_lists():
+    value = {"results": [{"title": f"t{i}", "url": f"u{i}", "body": "..."} for i in range(5)], "total": 5}
+    assert select_fields(value, ["results.title", "total"], max_items=2) == {
+        "results": [{"title": "t0"}, {"title": "t1"}],
+        "total": 5,
+    }
+    assert select_fields([1, 2, 3], max_items=1) == [1]
+
+
+def test_json_strings_are_reduced_before_truncation():
+    policy = ObservationPolicy(fields=["id"])
+    observation = policy.apply(json.dumps([{"id": i, "body": "x" * 100} for i in range(3)]))
+    assert json.loads(observation) == [{"id": 0}, {"id": 1}, {"id": 2}]
+
+
+def test_small_results_are_unchanged(store):
+    assert ObservationPolicy(max_chars=100).apply({"a": 1}, store) == {"a": 1}
+    assert not os.listdir(store.directory)
+
+
+def test_oversized_results_are_stored_behind_a_handle(store):
+    observation = ObservationPolicy(max_tokens=50).apply(REPORT, store)
+    handle = "art-" + hashlib.sha256(REPORT.encode()).hexdigest()[:12]
+    assert f"artifact '{handle}', read it with read_artifact" in observation
+    assert observation.startswith(REPORT[:100])
+    assert store.read(handle) == REPORT
+    assert store.put(REPORT) == handle
+
+
+def test_truncation_without_store():
+    observation = ObservationPolicy(max_chars=100, store=False).apply(REPORT, ArtifactStore())
+    assert observation.endswith(f"[truncated: showing 100 of {len(REPORT)} characters]")
+
+
+def test_read_artifact_pages(store):
+    handle = store.put(REPORT)
+    read = read_artifact_tool(store, max_length=100)
+    page = read.run(handle=handle, offset=0, length=1000)
+    assert page == f"{REPORT[:100]}\n[characters 0-100 of {len(REPORT)}, continue with offset=100]"
+    last = read.run(handle=handle, offset=len(REPORT) - 10)
+    assert last.endswith(f"[characters {len(REPORT) - 10}-{len(REPORT)} of {len(REPORT)}]")
+    assert read.run(handle="../elsewhere") == "Error: unknown artifact '../elsewhere'"
+
+
+def test_react_reads_back_a_truncated_output(store):
+    handle = "art-" + hashlib.sha256(REPORT.encode()).hexdigest()[:12]
+    script = [[("report", {})], [("read_artifact", {"handle": handle, "offset": 5000, "length": 20})]]
+    client = MockChatClient(script, answer="Read it.")
+    agent = ReactAgent([report], client=client, observation_policy=ObservationPolicy(max_chars=500), artifact_store=store)
+    assert agent.run("What is in the report?") == "Read it."
+
+    messages = client.requests[-1]["messages"]
+    observations = [m["content"] for prev, m in zip(messages, messages[1:]) if prev["role"] == "assistant"]
+    assert len(observations) == 2
+    assert len(observations[0]) < 1000
+    assert f"artifact '{handle}'" in observations[0]
+    assert repr(REPORT[5000:5020]).strip("'") in observations[1]
+    assert f"[characters 5000-5020 of {len(REPORT)}" in observations[1]
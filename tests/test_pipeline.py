@@ -0,0 +1,74 @@
+import re
+
+import pytest
+
+pytest.importorskip("graphviz")
+
+from agentic_patterns.multiagent_pattern.agent import Agent
+from agentic_patterns.multiagent_pattern.crew import Crew
+from agentic_patterns.utils.metrics import collect_calls
+from agentic_patterns.utils.mock_backend import MockChatClient
+
+
+def make_agent(name, answer, latency=0.0):
+    agent = Agent(name=name, backstory=f"You are {name}.", task_description=f"{name} the item {{item}}.")
+    agent.react_agent.client = MockChatClient([], answer=answer, latency=latency)
+    return agent
+
+
+def item_of(messages):
+    return re.search(r"the item (\w+)", messages[-1]["content"])[1]
+
+
+def make_crew(latency=0.0):
+    with Crew() as crew:
+        first = make_agent("first", lambda messages: f"first {item_of(messages)}", latency)
+        second = make_agent("second", lambda messages: f"second {item_of(messages)}", latency)
+        first >> second
+    return crew
+
+
+def test_every_input_flows_through_every_stage():
+    crew = make_crew(latency=0.01)
+    items = [f"n{i}" for i in range(6)]
+    results = sorted(crew.pipeline(items, workers=2), key=lambda result: result.index)
+    assert [result.item for result in results] == items
+    for result in results:
+        assert result.error is None
+        assert result.outputs == {"first": f"first {result.item}", "second": f"second {result.item}"}
+
+
+def test_agent_errors_are_reported_per_input():
+    def answer(messages):
+        if item_of(messages) == "bad":
+            raise RuntimeError("boom")
+        return "ok"
+
+    with Crew() as crew:
+        first = make_agent("first", answer)
+        second = make_agent("second", "done")
+        first >> second
+    results = {result.item: result for result in crew.pipeline(["good", "bad"])}
+    assert results["good"].outputs == {"first": "ok", "second": "done"}
+    assert isinstance(results["bad"].error, RuntimeError)
+    assert results["bad"].skipped == ["second"]
+
+
+def test_input_stream_errors_reach_the_consumer():
+    def inputs():
+        yield "a"
+        yield "b"
+        raise ValueError("broken input")
+
+    results = []
+    with pytest.raises(ValueError, match="broken input"):
+        for result in make_crew().pipeline(inputs()):
+            results.append(result.item)
+    # The inputs read before the error are completed first.
+    assert sorted(results) == ["a", "b"]
+
+
+def test_stages_run_in_the_callers_context():
+    with collect_calls() as calls:
+        list(make_crew().pipeline(["a", "b"]))
+    assert sorted(call.agent for call in calls) == ["first", "first", "second", "second"]
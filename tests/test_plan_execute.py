@@ -0,0 +1,105 @@
+import json
+
+from agentic_patterns.planning_pattern.plan_execute_agent import parse_plan
+from agentic_patterns.planning_pattern.plan_execute_agent import PlanExecuteAgent
+from agentic_patterns.planning_pattern.plan_execute_agent import resolve_arguments
+from agentic_patterns.tool_pattern.tool import tool
+from agentic_patterns.utils.mock_backend import MockChatClient
+
+
+@tool
+def add(a: int, b: int) -> int:
+    """
+    Adds two numbers.
+
+    Args:
+        a (int): The first number.
+        b (int): The second number.
+    """
+    return a + b
+
+
+@tool
+def note(text: str) -> str:
+    """
+    Writes a note.
+
+    Args:
+        text (str): The note.
+    """
+    return text
+
+
+TOOLS = {"add": add, "note": note}
+
+
+def plan(*steps):
+    return f"<plan>{json.dumps(list(steps))}</plan>"
+
+
+def test_references_create_dependencies():
+    steps = parse_plan(
+        plan(
+            {"id": "s1", "name": "add", "arguments": {"a": 1, "b": 2}},
+            {"id": "s2", "name": "add", "arguments": {"a": "${s1}", "b": 3}},
+        ),
+        TOOLS,
+    )
+    assert [step.dependencies for step in steps] == [set(), {"s1"}]
+    assert resolve_arguments(steps[1].arguments, {"s1": 3}) == {"a": 3, "b": 3}
+
+
+def test_dollar_signs_that_are_not_references_are_kept():
+    steps = parse_plan(
+        plan({"id": "s1", "name": "note", "arguments": {"text": "Convert $USD to EUR in $HOME, see ${draft}"}}),
+        TOOLS,
+    )
+    assert steps[0].dependencies == set()
+    assert resolve_arguments(steps[0].arguments, {}) == {"text": "Convert $USD to EUR in $HOME, see ${draft}"}
+
+
+def test_references_inside_text_are_formatted():
+    assert resolve_arguments({"text": "Total: ${s1} $USD"}, {"s1": 5}) == {"text": "Total: 5 $USD"}
+
+
+def test_agent_runs_the_plan_with_the_given_client():
+    def answer(messages):
+        if any("<observation>" in str(message["content"]) for message in messages):
+            return "The total is 6."
+        return plan(
+            {"id": "s1", "name": "add", "arguments": {"a": 1, "b": 2}},
+            {"id": "s2", "name": "add", "arguments": {"a": "${s1}", "b": 3}},
+        )
+
+    client = MockChatClient([], answer=answer)
+    agent = PlanExecuteAgent([add, note], client=client)
+    assert agent.run("What is 1 + 2 + 3?") == "The total is 6."
+    synthesis = client.requests[-1]["messages"][-1]["content"]
+    assert "'s2': 6" in synthesis
+
+
+def test_failures_skip_every_step_downstream_whatever_the_plan_order():
+    @tool
+    def fail(text: str) -> str:
+        """
+        Fails.
+
+        Args:
+            text (str): Ignored.
+        """
+        raise RuntimeError("boom")
+
+    steps = parse_plan(
+        plan(
+            {"id": "s1", "name": "fail", "arguments": {"text": "x"}},
+            {"id": "s3", "name": "note", "arguments": {"text": "${s2}"}},
+            {"id": "s2", "name": "note", "arguments": {"text": "${s1}"}},
+        ),
+        {**TOOLS, "fail": fail},
+    )
+    agent = PlanExecuteAgent([add, note, fail], client=MockChatClient([], answer="ok"))
+    results = {}
+    errors = agent.execute_plan(steps, results)
+    assert results == {}
+    assert errors["s1"] == "RuntimeError: boom"
+    assert errors["s2"] == errors["s3"] == "Skipped: a step it depends on failed"
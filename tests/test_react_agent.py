@@ -0,0 +1,87 @@
+import pytest
+
+from agentic_patterns.planning_pattern.react_agent import ReactAgent
+from agentic_patterns.planning_pattern.react_agent import STOP_ANSWERED
+from agentic_patterns.planning_pattern.react_agent import STOP_MAX_ROUNDS
+from agentic_patterns.planning_pattern.react_agent import STOP_NO_ACTION
+from agentic_patterns.planning_pattern.react_agent import STOP_REPETITION
+from agentic_patterns.tool_pattern.tool import tool
+from agentic_patterns.utils.mock_backend import MockChatClient
+
+calls = []
+
+
+@tool
+def lookup(city: str) -> str:
+    """
+    Looks up the weather of a city.
+
+    Args:
+        city (str): The city.
+    """
+    calls.append(city)
+    return f"sunny in {city}"
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+
+
+class Rambling(MockChatClient):
+    """Replies with neither a tool call nor a <response> tag."""
+
+    def create(self, messages, model, tools=None, **kwargs):
+        response = super().create(messages, model, tools, **kwargs)
+        response.choices[0].message.content = "Let me think about it."
+        return response
+
+
+@pytest.mark.parametrize("mode", ["xml", "native"])
+def test_answers_after_the_tool_calls(mode):
+    client = MockChatClient([[("lookup", {"city": "Paris"})]], answer="It is sunny.")
+    agent = ReactAgent([lookup], client=client, function_calling=mode)
+    assert agent.run("Weather in Paris?") == "It is sunny."
+    assert agent.last_stop_reason == STOP_ANSWERED
+    assert calls == ["Paris"]
+
+
+@pytest.mark.parametrize("mode", ["xml", "native"])
+def test_repeated_calls_are_served_from_the_run_and_stop_the_loop(mode):
+    script = [[("lookup", {"city": "Paris"})]] * 3
+    client = MockChatClient(script, answer="It is sunny.")
+    agent = ReactAgent([lookup], client=client, function_calling=mode)
+    assert agent.run("Weather in Paris?", max_stalls=2) == "It is sunny."
+    assert agent.last_stop_reason == STOP_REPETITION
+    assert calls == ["Paris"]
+    # One real round, two stalled ones, then the final answer.
+    assert len(client.requests) == 4
+
+
+def test_a_stall_gets_a_nudge_before_the_stop():
+    script = [[("lookup", {"city": "Paris"})], [("lookup", {"city": "Paris"})], [("lookup", {"city": "Rome"})]]
+    client = MockChatClient(script, answer="Sunny in both.")
+    agent = ReactAgent([lookup], client=client)
+    assert agent.run("Weather in Paris and Rome?", max_stalls=2) == "Sunny in both."
+    assert agent.last_stop_reason == STOP_ANSWERED
+    assert calls == ["Paris", "Rome"]
+    assert any("Do not repeat them" in str(m["content"]) for m in client.requests[-1]["messages"])
+
+
+def test_rounds_without_action_stop_the_loop():
+    client = Rambling([], answer="It is sunny.")
+    agent = ReactAgent([lookup], client=client)
+    agent.run("Weather in Paris?", max_stalls=2)
+    assert agent.last_stop_reason == STOP_NO_ACTION
+    # Two rounds, the second after a nudge, then the closing completion.
+    assert len(client.requests) == 3
+    assert "neither a tool call nor a response" in client.requests[1]["messages"][-1]["content"]
+
+
+def test_max_rounds():
+    script = [[("lookup", {"city": f"city {i}"})] for i in range(5)]
+    client = MockChatClient(script, answer="Done.")
+    agent = ReactAgent([lookup], client=client)
+    agent.run("Weather everywhere?", max_rounds=3)
+    assert agent.last_stop_reason == STOP_MAX_ROUNDS
+    assert len(calls) == 3
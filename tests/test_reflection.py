@@ -0,0 +1,104 @@
+import re
+
+import pytest
+
+from agentic_patterns.reflection_pattern import LLMJudgeScorer
+from agentic_patterns.reflection_pattern import ReflectionAgent
+from agentic_patterns.reflection_pattern.reflection_agent import STOP_ACCEPTED
+from agentic_patterns.reflection_pattern.reflection_agent import STOP_CONVERGED
+from agentic_patterns.reflection_pattern.reflection_agent import STOP_MAX_STEPS
+from agentic_patterns.reflection_pattern.reflection_agent import STOP_SEVERITY
+from agentic_patterns.reflection_pattern.reflection_agent import STOP_TOKEN_BUDGET
+from agentic_patterns.utils.mock_backend import MockChatClient
+
+REQUEST = "Write a haiku about the sea."
+
+
+def is_generation(messages):
+    return "Generate the best content" in messages[0]["content"]
+
+
+def make_client(generations, critiques):
+    """Answers the generator with `generations(messages)` and the critic with the next of `critiques`."""
+    critiques = iter(critiques)
+
+    def answer(messages):
+        return generations(messages) if is_generation(messages) else next(critiques)
+
+    return MockChatClient([], answer=answer)
+
+
+def counter():
+    count = iter(range(100))
+    return lambda messages: f"draft number {next(count)} " + "word " * 5
+
+
+def generation_requests(client):
+    return [request["messages"] for request in client.requests if is_generation(request["messages"])]
+
+
+def test_accepted():
+    client = make_client(counter(), ["1. Shorter.", "<OK>"])
+    agent = ReflectionAgent(client=client)
+    assert agent.run(REQUEST, n_steps=4).startswith("draft number 1")
+    assert (agent.last_stop_reason, agent.last_rounds) == (STOP_ACCEPTED, 2)
+
+
+def test_max_steps():
+    client = make_client(counter(), ["1. Shorter."] * 3)
+    agent = ReflectionAgent(client=client)
+    agent.run(REQUEST, n_steps=3)
+    assert (agent.last_stop_reason, agent.last_rounds) == (STOP_MAX_STEPS, 3)
+
+
+def test_converged():
+    client = make_client(lambda messages: "the same haiku " * 5, ["1. Shorter."] * 4)
+    agent = ReflectionAgent(client=client)
+    agent.run(REQUEST, n_steps=4, min_change=0.1)
+    # The first round has nothing to compare with.
+    assert (agent.last_stop_reason, agent.last_rounds) == (STOP_CONVERGED, 2)
+
+
+def test_severity():
+    critiques = ["<severity>major</severity> 1. Wrong topic.", "<severity>minor</severity> 1. A comma."]
+    client = make_client(counter(), critiques)
+    agent = ReflectionAgent(client=client)
+    agent.run(REQUEST, n_steps=4, stop_severity="minor")
+    assert (agent.last_stop_reason, agent.last_rounds) == (STOP_SEVERITY, 2)
+    critic_prompt = [r["messages"][0]["content"] for r in client.requests if not is_generation(r["messages"])][0]
+    assert "<severity></severity>" in critic_prompt
+
+    with pytest.raises(ValueError, match="Unknown severity"):
+        agent.run(REQUEST, stop_severity="trivial")
+
+
+@pytest.mark.parametrize("budget, reason, rounds", [(1, STOP_TOKEN_BUDGET, 1), (10**9, STOP_MAX_STEPS, 3)])
+def test_token_budget(budget, reason, rounds):
+    client = make_client(counter(), ["1. Shorter."] * 3)
+    agent = ReflectionAgent(client=client)
+    agent.run(REQUEST, n_steps=3, token_budget=budget)
+    assert (agent.last_stop_reason, agent.last_rounds) == (reason, rounds)
+
+
+@pytest.mark.parametrize("top_k, refined", [(2, {"2", "3"}), (1, {"2"})])
+def test_best_candidates_are_refined(top_k, refined):
+    def generations(messages):
+        return "draft " + re.search(r"candidate (\d) of 3", messages[0]["content"]).group(1)
+
+    scores = {"draft 1": 0.2, "draft 2": 0.9, "draft 3": 0.5}
+    client = make_client(generations, ["1. Shorter."] * 20)
+    agent = ReflectionAgent(client=client)
+    best = agent.run(
+        REQUEST, n_steps=2, n_candidates=3, top_k=top_k, scorer=lambda request, generation, critique: scores[generation]
+    )
+    assert best == "draft 2"
+    second_round = generation_requests(client)[3:]
+    assert {re.search(r"candidate (\d)", m[0]["content"]).group(1) for m in second_round} == refined
+    assert len(second_round) == top_k
+
+
+def test_llm_judge_uses_the_given_client():
+    client = MockChatClient([], answer="<score>8</score>")
+    scorer = LLMJudgeScorer(model="judge", client=client)
+    assert scorer(REQUEST, "A haiku.", "1. Shorter.") == pytest.approx(0.8)
+    assert client.requests[0]["model"] == "judge"
@@ -0,0 +1,45 @@
+from agentic_patterns.reflection_pattern import ReflectionAgent
+from agentic_patterns.utils.mock_backend import MockChatClient
+
+DOCUMENT = "The cat sat on the mat. It was a dull day."
+
+
+def make_client(generator_replies):
+    replies = iter(generator_replies)
+
+    def answer(messages):
+        if "Generate the best content" in messages[0]["content"]:
+            return next(replies)
+        return "<quote>It was a dull day.</quote> Make it livelier."
+
+    return MockChatClient([], answer=answer)
+
+
+def run(client, n_steps=2):
+    agent = ReflectionAgent(client=client)
+    return agent.run("Write two sentences about a cat.", n_steps=n_steps, diff_mode=True)
+
+
+def test_edits_are_applied_to_the_document():
+    client = make_client([DOCUMENT, "<edit><find>It was a dull day.</find><replace>The sun blazed.</replace></edit>"])
+    assert run(client) == "The cat sat on the mat. The sun blazed."
+
+
+def test_the_generator_sees_the_document_it_edits():
+    client = make_client([DOCUMENT, "<edit><find>dull</find><replace>bright</replace></edit>"])
+    run(client)
+    edit_request = client.requests[2]["messages"]
+    assert any(m["role"] == "assistant" and m["content"] == DOCUMENT for m in edit_request)
+
+
+def test_free_text_reply_is_not_taken_for_the_document():
+    client = make_client(
+        [
+            DOCUMENT,
+            "Sure! I can't see the document, but here is a livelier sentence: The cat pounced.",
+            "The cat sat on the mat. The sun blazed.",
+        ]
+    )
+    assert run(client) == "The cat sat on the mat. The sun blazed."
+    rewrite_request = client.requests[3]["messages"]
+    assert rewrite_request[-2] == {"role": "assistant", "content": DOCUMENT}
@@ -0,0 +1,160 @@
+import threading
+import time
+
+import pytest
+
+from agentic_patterns.utils.completions import completions_create
+from agentic_patterns.utils.metrics import get_metrics_registry
+from agentic_patterns.utils.metrics import record_completion
+from agentic_patterns.utils.mock_backend import MockChatClient
+from agentic_patterns.utils.resilience import CircuitOpenError
+from agentic_patterns.utils.resilience import configure_resilience
+from agentic_patterns.utils.resilience import disable_resilience
+from agentic_patterns.utils.resilience import get_resilience
+from agentic_patterns.utils.resilience import HedgePolicy
+from agentic_patterns.utils.resilience import Resilience
+from agentic_patterns.utils.resilience import RetryPolicy
+from agentic_patterns.utils.singleflight import configure_single_flight
+from agentic_patterns.utils.singleflight import disable_single_flight
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+class FlakyClient(MockChatClient):
+    """Fails the first `failures` calls with `error`, then answers."""
+
+    def __init__(self, failures, error=RateLimited, **kwargs):
+        super().__init__([], answer="ok", **kwargs)
+        self.failures = failures
+        self.error = error
+
+    def create(self, messages, model, tools=None, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            self.requests.append({"messages": list(messages), "model": model, "tools": tools})
+            raise self.error("failed")
+        return super().create(messages, model, tools, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def no_layers():
+    yield
+    disable_resilience()
+    disable_single_flight()
+
+
+def test_transient_errors_are_retried():
+    configure_resilience(retry=RetryPolicy(base_delay=0))
+    client = FlakyClient(failures=2)
+    assert completions_create(client, MESSAGES, "m") == "ok"
+    assert len(client.requests) == 3
+
+
+def test_other_errors_are_raised_at_once():
+    configure_resilience(retry=RetryPolicy(base_delay=0))
+    client = FlakyClient(failures=2, error=BadRequest)
+    with pytest.raises(BadRequest):
+        completions_create(client, MESSAGES, "m")
+    assert len(client.requests) == 1
+
+
+def test_the_last_error_is_raised_after_max_attempts():
+    configure_resilience(retry=RetryPolicy(max_attempts=3, base_delay=0))
+    client = FlakyClient(failures=5)
+    with pytest.raises(RateLimited):
+        completions_create(client, MESSAGES, "m")
+    assert len(client.requests) == 3
+
+
+def test_the_breaker_opens_and_lets_a_probe_through():
+    configure_resilience(retry=None, failure_threshold=2, reset_timeout=0.1)
+    client = FlakyClient(failures=2)
+    for _ in range(2):
+        with pytest.raises(RateLimited):
+            completions_create(client, MESSAGES, "m")
+    with pytest.raises(CircuitOpenError):
+        completions_create(client, MESSAGES, "m")
+    assert len(client.requests) == 2
+
+    time.sleep(0.15)
+    assert completions_create(client, MESSAGES, "m") == "ok"
+    assert get_resilience().breaker("m").state == "closed"
+
+
+def test_slow_calls_are_hedged():
+    resilience = Resilience(retry=None, hedge=HedgePolicy(default_delay=0.05))
+    calls = []
+
+    def request():
+        calls.append(time.perf_counter())
+        # The first request hangs; the hedge answers at once.
+        if len(calls) == 1:
+            time.sleep(1)
+            return "slow"
+        return "fast"
+
+    start = time.perf_counter()
+    assert resilience.call("m", request) == "fast"
+    assert len(calls) == 2
+    assert time.perf_counter() - start < 0.5
+
+
+def test_hedge_delay_follows_provider_latency_only():
+    policy = HedgePolicy(percentile=0.5, min_delay=0.0, min_samples=4)
+    for _ in range(4):
+        record_completion("m", None, 2.0)
+    # Cache hits and coalesced calls answer instantly: they must not drag the estimate down.
+    for _ in range(20):
+        record_completion("m", None, 0.0, cache_hit=True)
+    assert policy.delay("m") == 2.5
+    assert get_metrics_registry().latency_quantile("m", 0.5) == (2.5, 4)
+
+
+def test_coalesced_calls_stay_out_of_the_latency_histogram():
+    configure_single_flight()
+    client = MockChatClient([], answer="ok", latency=0.2)
+    threads = [threading.Thread(target=completions_create, args=(client, MESSAGES, "m")) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(client.requests) == 1
+    _, samples = get_metrics_registry().latency_quantile("m", 0.5)
+    assert samples == 1
+
+
+def test_retry_policies_make_at_least_one_attempt():
+    with pytest.raises(ValueError, match="at least 1"):
+        RetryPolicy(max_attempts=0)
+
+
+def test_sdk_retries_are_disabled_under_the_resilience_layer():
+    class SDKClient(MockChatClient):
+        """Records the clients derived with `with_options`, like the Groq SDK's."""
+
+        def __init__(self, max_retries=2, requests=None):
+            super().__init__([], answer="ok")
+            self.max_retries = max_retries
+            self.requests = self.requests if requests is None else requests
+
+        def with_options(self, max_retries):
+            return SDKClient(max_retries, self.requests)
+
+        def create(self, messages, model, tools=None, **kwargs):
+            response = super().create(messages, model, tools, **kwargs)
+            self.requests[-1]["max_retries"] = self.max_retries
+            return response
+
+    client = SDKClient()
+    completions_create(client, MESSAGES, "m")
+    configure_resilience(retry=RetryPolicy(base_delay=0))
+    completions_create(client, MESSAGES, "m2")
+    assert [request["max_retries"] for request in client.requests] == [2, 0]
@@ -0,0 +1,81 @@
+import pytest
+
+from agentic_patterns.planning_pattern.react_agent import ReactAgent
+from agentic_patterns.tool_pattern.tool import tool
+from agentic_patterns.utils.mock_backend import MockChatClient
+from agentic_patterns.utils.routing import configure_routing
+from agentic_patterns.utils.routing import disable_routing
+from agentic_patterns.utils.routing import route_completion
+from agentic_patterns.utils.routing import SYNTHESIS
+from agentic_patterns.utils.routing import TOOL_SELECTION
+from agentic_patterns.utils.routing import valid_tool_calls
+
+
+@tool
+def lookup(city: str) -> str:
+    """
+    Looks up the weather of a city.
+
+    Args:
+        city (str): The city.
+    """
+    return f"sunny in {city}"
+
+
+@pytest.fixture(autouse=True)
+def no_routing():
+    disable_routing()
+    yield
+    disable_routing()
+
+
+def models(client):
+    return [request["model"] for request in client.requests]
+
+
+def test_valid_tool_calls():
+    assert valid_tool_calls('<tool_call>{"name": "lookup", "arguments": {}}</tool_call>', ["lookup"])
+    assert valid_tool_calls("<tool_call>{'name': 'lookup', 'arguments': {},}</tool_call>", ["lookup"])
+    assert not valid_tool_calls('<tool_call>{"name": "other"}</tool_call>', ["lookup"])
+    assert not valid_tool_calls("<tool_call>not json</tool_call>")
+    assert valid_tool_calls("<response>done</response>")
+    assert not valid_tool_calls("done")
+
+
+def test_steps_without_a_route_use_the_agent_model():
+    client = MockChatClient([], answer="ok")
+    route_completion(client, [{"role": "user", "content": "hi"}], "agent-model", SYNTHESIS)
+    configure_routing({TOOL_SELECTION: "small"})
+    route_completion(client, [{"role": "user", "content": "hi"}], "agent-model", SYNTHESIS)
+    route_completion(client, [{"role": "user", "content": "hi"}], "agent-model", TOOL_SELECTION)
+    assert models(client) == ["agent-model", "agent-model", "small"]
+
+
+def test_cascades_escalate_until_an_output_validates():
+    client = MockChatClient([], answer=lambda messages: "no")
+    configure_routing({TOOL_SELECTION: ["small", "medium", "large"]})
+    messages = [{"role": "user", "content": "hi"}]
+    assert route_completion(client, messages, "m", TOOL_SELECTION, validate=lambda output: False) == "no"
+    assert models(client) == ["small", "medium", "large"]
+
+    client.requests.clear()
+    route_completion(client, messages, "m", TOOL_SELECTION, validate=lambda output: True)
+    assert models(client) == ["small"]
+
+
+def test_react_answers_of_a_small_tool_selection_model_are_rewritten():
+    configure_routing({TOOL_SELECTION: "small"})
+    client = MockChatClient([[("lookup", {"city": "Paris"})]], answer="It is sunny.")
+    agent = ReactAgent([lookup], model="large", client=client)
+    assert agent.run("Weather in Paris?") == "It is sunny."
+    assert models(client) == ["small", "small", "large"]
+
+
+def test_react_answers_escalate_along_the_tool_selection_cascade():
+    configure_routing({TOOL_SELECTION: ["small", "large"]})
+    client = MockChatClient([[("lookup", {"city": "Paris"})]], answer="It is sunny.")
+    agent = ReactAgent([lookup], model="large", client=client)
+    assert agent.run("Weather in Paris?") == "It is sunny."
+    # The tool call is accepted from the small model; the answer is left to the large one.
+    assert models(client) == ["small", "small", "large"]
+    assert client.requests[2]["messages"] == client.requests[1]["messages"]
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from agentic_patterns.utils.scheduler import HIGH
+from agentic_patterns.utils.scheduler import LOW
+from agentic_patterns.utils.scheduler import NORMAL
+from agentic_patterns.utils.scheduler import RateLimit
+from agentic_patterns.utils.scheduler import RequestScheduler
+from agentic_patterns.utils.scheduler import scheduling_context
+
+
+def queued(scheduler, model):
+    with scheduler._condition:
+        return sum(len(waiters) for tenants in scheduler._queues.get(model, {}).values() for waiters in tenants.values())
+
+
+def acquire_in_order(scheduler, requests):
+    """Queues the requests one after the other and returns the labels in the order they were granted."""
+    granted = []
+    lock = threading.Lock()
+
+    def acquire(label, priority, tenant):
+        scheduler.acquire("m", 1, priority=priority, tenant=tenant)
+        with lock:
+            granted.append(label)
+
+    threads = []
+    for label, priority, tenant in requests:
+        thread = threading.Thread(target=acquire, args=(label, priority, tenant))
+        thread.start()
+        threads.append(thread)
+        while queued(scheduler, "m") < len(threads):
+            time.sleep(0.001)
+    for thread in threads:
+        thread.join(timeout=5)
+    return granted
+
+
+def test_models_without_limits_are_not_queued():
+    ticket = RequestScheduler().acquire("m", 10_000)
+    assert ticket.waited == 0.0
+
+
+def test_requests_wait_for_the_rpm_bucket():
+    scheduler = RequestScheduler({"m": RateLimit(rpm=1200)})
+    rpm, _ = scheduler._buckets_for("m")
+    rpm.level = 0.0
+    ticket = scheduler.acquire("m", 10)
+    # 20 requests a second: one is available after 50ms.
+    assert ticket.waited == pytest.approx(0.05, abs=0.04)
+
+
+def test_requests_wait_for_the_tpm_bucket():
+    scheduler = RequestScheduler(default_limit=RateLimit(tpm=60_000))
+    _, tpm = scheduler._buckets_for("m")
+    tpm.level = 0.0
+    ticket = scheduler.acquire("m", 100)
+    # 1000 tokens a second: 100 tokens are available after 100ms.
+    assert ticket.waited == pytest.approx(0.1, abs=0.05)
+    assert scheduler.acquire("other", 100_000).waited < 0.05
+
+
+def test_higher_priority_classes_are_served_first():
+    scheduler = RequestScheduler({"m": RateLimit(rpm=1200)})
+    scheduler._buckets_for("m")[0].level = -2.0
+    granted = acquire_in_order(scheduler, [("low", LOW, "t"), ("normal", NORMAL, "t"), ("high", HIGH, "t")])
+    assert granted == ["high", "normal", "low"]
+
+
+def test_tenants_take_turns_within_a_class():
+    scheduler = RequestScheduler({"m": RateLimit(rpm=1200)})
+    scheduler._buckets_for("m")[0].level = -2.0
+    requests = [("a1", NORMAL, "a"), ("a2", NORMAL, "a"), ("a3", NORMAL, "a"), ("b1", NORMAL, "b"), ("b2", NORMAL, "b")]
+    assert acquire_in_order(scheduler, requests) == ["a1", "b1", "a2", "b2", "a3"]
+
+
+def test_the_scheduling_context_sets_tenant_and_priority():
+    scheduler = RequestScheduler({"m": RateLimit(rpm=1200)})
+    scheduler._buckets_for("m")[0].level = -2.0
+    granted = []
+
+    def acquire(label, priority):
+        with scheduling_context(tenant="crew", priority=priority):
+            scheduler.acquire("m", 1)
+        granted.append(label)
+
+    threads = [threading.Thread(target=acquire, args=("low", LOW))]
+    threads[0].start()
+    while queued(scheduler, "m") < 1:
+        time.sleep(0.001)
+    threads.append(threading.Thread(target=acquire, args=("high", HIGH)))
+    threads[1].start()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert granted == ["high", "low"]
+
+
+def test_release_gives_back_unused_tokens_and_charges_overdrafts():
+    scheduler = RequestScheduler({"m": RateLimit(tpm=600)})
+    _, tpm = scheduler._buckets_for("m")
+    ticket = scheduler.acquire("m", 100)
+    assert tpm.level == pytest.approx(500, abs=1)
+
+    scheduler.release(ticket, 40)
+    assert tpm.level == pytest.approx(560, abs=1)
+
+    ticket = scheduler.acquire("m", 100)
+    scheduler.release(ticket, 800)
+    # The overdraft is a debt paid back by the refill: the next request waits for it.
+    assert tpm.level == pytest.approx(-240, abs=1)
+    assert tpm.wait_time(1, time.monotonic()) > 20
+
+
+def test_release_without_usage_keeps_the_reservation():
+    scheduler = RequestScheduler({"m": RateLimit(tpm=600)})
+    _, tpm = scheduler._buckets_for("m")
+    scheduler.release(scheduler.acquire("m", 100))
+    assert tpm.level == pytest.approx(500, abs=1)
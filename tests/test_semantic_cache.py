@@ -0,0 +1,134 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from agentic_patterns.multiagent_pattern.agent import Agent
+from agentic_patterns.multiagent_pattern.crew import Crew
+from agentic_patterns.tool_pattern.tool import tool
+from agentic_patterns.utils.completions import completions_create
+from agentic_patterns.utils.metrics import metrics_context
+from agentic_patterns.utils.mock_backend import MockChatClient
+from agentic_patterns.utils.semantic_cache import cache_subject
+from agentic_patterns.utils.semantic_cache import configure_semantic_cache
+from agentic_patterns.utils.semantic_cache import disable_semantic_cache
+
+ROAST = "Write a three line roast of {item}. Keep it witty, sharp and good natured."
+
+
+@pytest.fixture(autouse=True)
+def no_cache():
+    disable_semantic_cache()
+    yield
+    disable_semantic_cache()
+
+
+def last_user(messages):
+    return [m["content"] for m in messages if m["role"] == "user"][-1]
+
+
+def user(content):
+    return [{"role": "system", "content": "You are a comedian."}, {"role": "user", "content": content}]
+
+
+def test_identical_requests_hit_the_cache():
+    configure_semantic_cache()
+    client = MockChatClient([], answer=last_user)
+    first = completions_create(client, user(ROAST.format(item="Donald Trump")), "m")
+    second = completions_create(client, user(ROAST.format(item="Donald Trump")), "m")
+    assert first == second
+    assert len(client.requests) == 1
+
+
+def test_templated_prompts_do_not_collide_by_default():
+    configure_semantic_cache()
+    client = MockChatClient([], answer=last_user)
+    names = ["Donald Trump", "Barnaby Buttons", "Emmanuel Macron"]
+    outputs = [completions_create(client, user(ROAST.format(item=name)), "m") for name in names]
+    assert len(client.requests) == 3
+    assert all(name in output for name, output in zip(names, outputs))
+
+
+def test_crew_map_runs_every_item():
+    configure_semantic_cache()
+    client = MockChatClient([], answer=last_user)
+    names = ["Donald Trump", "Barnaby Buttons", "Emmanuel Macron"]
+    with Crew() as crew:
+        roaster = Agent(name="Roaster", backstory="You are a comedian.", task_description=ROAST)
+        roaster.react_agent.client = client
+        crew.map(roaster, names)
+        crew.run()
+    assert len(client.requests) == 3
+    prompts = [last_user(request["messages"]) for request in client.requests]
+    assert sorted(name for name in names for prompt in prompts if name in prompt) == sorted(names)
+
+
+def test_fuzzy_matching_compares_the_subject_only():
+    configure_semantic_cache(agent_thresholds={"Roaster": True})
+    client = MockChatClient([], answer=last_user)
+    with metrics_context(agent="Roaster"):
+        for name in ["Donald Trump", "Emmanuel Macron", "donald trump"]:
+            with cache_subject(name):
+                completions_create(client, user(ROAST.format(item=name)), "m")
+    # Case aside, "donald trump" is the same subject as "Donald Trump".
+    assert len(client.requests) == 2
+
+
+def test_agents_can_opt_out():
+    configure_semantic_cache(agent_thresholds={"Critic": None})
+    client = MockChatClient([], answer="ok")
+    with metrics_context(agent="Critic"):
+        completions_create(client, user("same"), "m")
+        completions_create(client, user("same"), "m")
+    assert len(client.requests) == 2
+
+
+def test_tool_results_match_exact_arguments():
+    calls = []
+
+    @tool(cacheable=True)
+    def lookup(city: str, units: str = "metric") -> str:
+        """
+        Looks up the weather.
+
+        Args:
+            city (str): The city.
+            units (str): The units.
+        """
+        calls.append((city, units))
+        return f"{city} in {units}"
+
+    configure_semantic_cache()
+    assert lookup.run(city="Paris", units="metric") == "Paris in metric"
+    assert lookup.run(city="Paris", units="imperial") == "Paris in imperial"
+    assert lookup.run(city="Paris", units="metric") == "Paris in metric"
+    assert calls == [("Paris", "metric"), ("Paris", "imperial")]
+
+
+def test_tools_are_not_cached_unless_marked_cacheable():
+    sent = []
+
+    @tool
+    def send(text: str) -> str:
+        """
+        Sends a message.
+
+        Args:
+            text (str): The message.
+        """
+        sent.append(text)
+        return "sent"
+
+    configure_semantic_cache()
+    send.run(text="hello")
+    send.run(text="hello")
+    assert sent == ["hello", "hello"]
+
+
+def test_evicted_namespaces_are_forgotten():
+    cache = configure_semantic_cache(capacity=2).cache
+    for i in range(10):
+        cache.put(("completion", f"model {i}"), "text", i)
+    assert len(cache) == 2
+    assert set(cache._namespace_ids) == {("completion", "model 8"), ("completion", "model 9")}
+    assert cache.get(("completion", "model 9"), "text") == 9
+    assert cache.get(("completion", "model 0"), "text") is None
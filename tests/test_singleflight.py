@@ -0,0 +1,118 @@
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from agentic_patterns.utils.singleflight import request_key
+from agentic_patterns.utils.singleflight import SingleFlight
+
+pytest.importorskip("fcntl")
+
+
+def slow(result, delay=0.2, calls=None):
+    def fn():
+        if calls is not None:
+            calls.append(threading.get_ident())
+        time.sleep(delay)
+        return result
+
+    return fn
+
+
+def test_identical_requests_share_one_call():
+    flight = SingleFlight()
+    calls, results = [], []
+    key = request_key("m", [{"role": "user", "content": "hi"}])
+
+    def run():
+        results.append(flight.do(key, slow("answer", calls=calls)))
+
+    threads = [threading.Thread(target=run) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert {result for result, _ in results} == {"answer"}
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+
+    def fail():
+        time.sleep(0.1)
+        raise RuntimeError("boom")
+
+    errors = []
+
+    def run():
+        try:
+            flight.do("key", fail)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 3
+    # Nothing is left in flight: the next call runs again.
+    assert flight.do("key", lambda: "ok") == ("ok", False)
+
+
+def _in_child(lock_dir, queue):
+    queue.put(SingleFlight(lock_dir).do("key", slow("from child", delay=0.5)))
+
+
+def test_processes_share_results_through_the_lock_dir(tmp_path):
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    child = context.Process(target=_in_child, args=(str(tmp_path), queue))
+    child.start()
+    time.sleep(0.2)
+    result = SingleFlight(str(tmp_path)).do("key", slow("from parent"))
+    child.join()
+    assert queue.get(timeout=1) == ("from child", False)
+    assert result == ("from child", True)
+
+
+def test_sweep_removes_expired_results_and_idle_locks(tmp_path):
+    flight = SingleFlight(str(tmp_path), result_ttl=60)
+    flight.do("key", lambda: "secret completion")
+    assert sorted(os.listdir(tmp_path)) == ["key.json", "key.lock"]
+    assert flight.sweep() == 0
+
+    flight.result_ttl = 0
+    assert flight.sweep() == 2
+    assert os.listdir(tmp_path) == []
+
+
+def test_sweep_keeps_held_locks(tmp_path):
+    flight = SingleFlight(str(tmp_path), result_ttl=0)
+    started, release = threading.Event(), threading.Event()
+
+    def held():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    thread = threading.Thread(target=flight.do, args=("key", held))
+    thread.start()
+    started.wait(5)
+    assert flight.sweep() == 0
+    assert os.listdir(tmp_path) == ["key.lock"]
+    release.set()
+    thread.join()
+
+
+def test_requests_sweep_the_directory(tmp_path):
+    flight = SingleFlight(str(tmp_path), result_ttl=0.05)
+    flight.do("old", lambda: "old completion")
+    time.sleep(0.1)
+    flight.do("new", lambda: "new completion")
+    assert sorted(os.listdir(tmp_path)) == ["new.json", "new.lock"]
@@ -0,0 +1,62 @@
+import itertools
+import re
+
+from agentic_patterns.tool_pattern.tool import tool
+from agentic_patterns.tool_pattern.tool_agent import ToolAgent
+from agentic_patterns.utils.mock_backend import MockChatClient
+
+
+@tool
+def add(a: int, b: int) -> int:
+    """
+    Adds two numbers.
+
+    Args:
+        a (int): The first number.
+        b (int): The second number.
+    """
+    return a + b
+
+
+@tool
+def double(x: int) -> int:
+    """
+    Doubles a number.
+
+    Args:
+        x (int): The number.
+    """
+    return 2 * x
+
+
+class RestartingIdsClient(MockChatClient):
+    """Numbers the tool calls of every completion from 0, as models often do."""
+
+    def create(self, messages, model, tools=None, **kwargs):
+        self._ids = itertools.count()
+        return super().create(messages, model, tools, **kwargs)
+
+
+def test_xml_call_ids_keep_increasing_across_rounds():
+    script = [
+        [("add", {"a": 1, "b": 2}), ("add", {"a": 3, "b": 4})],
+        [("double", {"x": 3})],
+    ]
+    client = RestartingIdsClient(script, answer="done")
+    agent = ToolAgent([add, double], client=client)
+    assert agent.run("Compute things.", max_rounds=3) == "done"
+
+    last = client.requests[-1]["messages"]
+    observations = [m["content"] for m in last if "<observation>" in str(m["content"])]
+    assert observations == ["<observation>{0: 3, 1: 7}<observation>", "<observation>{2: 6}<observation>"]
+    # The history shows the ids the observations are keyed by.
+    ids = [int(i) for m in last if m["role"] == "assistant" for i in re.findall(r'"id": (\d+)', m["content"])]
+    assert ids == [0, 1, 2]
+
+
+def test_synthesis_sees_every_observation():
+    script = [[("add", {"a": 1, "b": 2})], [("double", {"x": 3})]]
+    client = RestartingIdsClient(script, answer="done")
+    ToolAgent([add, double], client=client).run("Compute things.", max_rounds=2)
+    synthesis = client.requests[-1]["messages"]
+    assert [m["content"] for m in synthesis[1:]] == ['"Observation: {0: 3}"', '"Observation: {1: 6}"']
@@ -0,0 +1,106 @@
+import contextvars
+import json
+import threading
+
+import pytest
+
+from agentic_patterns.planning_pattern.react_agent import ReactAgent
+from agentic_patterns.tool_pattern.tool import tool
+from agentic_patterns.utils.mock_backend import MockChatClient
+from agentic_patterns.utils.tracing import disable_tracing
+from agentic_patterns.utils.tracing import enable_tracing
+from agentic_patterns.utils.tracing import get_tracer
+from agentic_patterns.utils.tracing import span
+
+
+@tool
+def lookup(city: str) -> str:
+    """
+    Looks up the weather of a city.
+
+    Args:
+        city (str): The city.
+    """
+    return f"sunny in {city}"
+
+
+@pytest.fixture
+def tracer():
+    tracer = enable_tracing()
+    tracer.clear()
+    yield tracer
+    disable_tracing()
+    tracer.clear()
+
+
+def exported(tracer, tmp_path):
+    path = tracer.export(str(tmp_path / "trace.json"))
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)["traceEvents"]
+
+
+def by_name(trace_events):
+    return {event["name"]: event for event in trace_events}
+
+
+def test_spans_nest_in_the_exported_trace(tracer, tmp_path):
+    with span("crew.run", agents=2):
+        with span("agent.run", agent="a"):
+            with span("llm.completion", model="m") as current:
+                current.set_attribute("prompt_tokens", 12)
+        with span("agent.run", agent="b"):
+            pass
+
+    trace_events = exported(tracer, tmp_path)
+    assert [event["name"] for event in trace_events] == ["crew.run", "agent.run", "llm.completion", "agent.run"]
+    crew, a, llm, b = trace_events
+    assert crew["args"]["parent_id"] is None
+    assert a["args"]["parent_id"] == b["args"]["parent_id"] == crew["args"]["span_id"]
+    assert llm["args"]["parent_id"] == a["args"]["span_id"]
+    assert llm["args"] | {"span_id": 0, "parent_id": 0} == {"model": "m", "prompt_tokens": 12, "span_id": 0, "parent_id": 0}
+    assert (crew["cat"], llm["cat"], llm["ph"]) == ("crew", "llm", "X")
+    for parent, child in ((crew, a), (a, llm), (crew, b)):
+        assert parent["ts"] <= child["ts"]
+        assert child["ts"] + child["dur"] <= parent["ts"] + parent["dur"]
+
+
+def test_spans_opened_in_worker_threads_keep_their_parent(tracer, tmp_path):
+    def run_tool():
+        with span("tool.run"):
+            pass
+
+    with span("agent.run", agent="map"):
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(run_tool,))
+        thread.start()
+        thread.join()
+
+    parent, child = exported(tracer, tmp_path)
+    assert child["args"]["parent_id"] == parent["args"]["span_id"]
+    assert child["tid"] != parent["tid"]
+
+
+def test_failed_spans_record_the_error(tracer, tmp_path):
+    with pytest.raises(ValueError):
+        with span("tool.run"):
+            raise ValueError("boom")
+    assert exported(tracer, tmp_path)[0]["args"]["error"] == "ValueError"
+
+
+def test_nothing_is_recorded_while_disabled(tracer):
+    disable_tracing()
+    with span("agent.run"):
+        pass
+    assert get_tracer().spans == []
+
+
+def test_agent_runs_are_traced(tracer, tmp_path):
+    client = MockChatClient([[("lookup", {"city": "Paris"})]], answer="It is sunny.")
+    ReactAgent([lookup], client=client).run("Weather in Paris?")
+    trace_events = exported(tracer, tmp_path)
+    spans = {event["args"]["span_id"]: event for event in trace_events}
+    rounds = [event for event in trace_events if event["name"] == "react.round"]
+    assert len(rounds) == 2
+    tool_runs = [event for event in trace_events if event["name"] == "tool.run"]
+    assert spans[tool_runs[0]["args"]["parent_id"]]["name"] == "react.round"
+    completions = [event for event in trace_events if event["name"] == "llm.completion"]
+    assert all(spans[event["args"]["parent_id"]]["name"] in ("react.round", "llm.route") for event in completions)